@@ -0,0 +1,93 @@
+import asyncio
+
+from boru_hatti import boru_hatti_calistir
+from gemini_motor import GeminiHatasi, GeminiMotoru
+from istemler import KATEGORILER, coklu_prompt_olustur, model_json, prompt_olustur
+from mukerrer import sayfa_sinirinda_birlestir
+from olcum import OLCUM
+from on_isleme import belge_hazirla
+from paketleme import MAX_ADET, Paketleyici
+from qr_fatura import kategori_promptu, qr_fatura_coz
+
+# --- ANALİZ HATTI (GEMINI + QR + PAKETLEME) ---
+# Streamlit'ten bağımsız: iş motorunun thread'inde koşar, st.* çağırmaz. Uygulama bu modülü (ve onunla gelen
+# Pillow / pypdf / pyzbar yükünü) ilk analiz işi başlarken yükler; giriş ekranı ve rerun'lar beklemez.
+
+async def qr_hizli_yol(motor, secilen_model, alanlar, vkn):
+    # e-Arşiv/e-Fatura QR'ı tam: görsel gönderilmez. İşyeri/kategori VKN hafızasından; bilinmeyen VKN'de kategori
+    # metin-only çağrıdan, işyeri "VKN <no>" yer tutucusu (model VKN'den ad uydurabilir, sorulmaz; kullanıcı düzeltir)
+    veri = dict(alanlar)
+    veri.pop("_kdv_orani", None)
+    bilinen = vkn.getir(alanlar["vkn"]) or {}
+    kategori = bilinen.get("kategori")
+    if not bilinen:
+        try: yanit = model_json(await motor.uret(secilen_model, [{"text": kategori_promptu(alanlar, KATEGORILER)}]))
+        except Exception: yanit = {}
+        if isinstance(yanit, dict): kategori = yanit.get("kategori")
+    veri["isyeri_adi"] = str(bilinen.get("isyeri_adi") or "").strip() or f"VKN {alanlar['vkn']}"
+    veri["kategori"] = kategori if kategori in KATEGORILER else "Diğer"
+    veri["qr_hizli"] = True
+    return veri
+
+async def ekstre_analiz_et(motor, dosya_objesi, secilen_model, parcalar):
+    # Sayfa parçaları aynı motor üzerinden paralel gider (eşzamanlılık sınırı fişlerle ortak);
+    # listeler sayfa sırasıyla birleştirilir, sayfa sınırında tekrarlanan satırlar atılır
+    async def parca_analiz_et(h):
+        parts = [{"text": prompt_olustur("ekstre", h.qr_data, h.sayfa)}, {"inline_data": {"mime_type": h.mime_type, "data": h.base64_data}}]
+        veri = model_json(await motor.uret(secilen_model, parts))
+        if isinstance(veri, dict): veri = [veri]
+        if not isinstance(veri, list): raise ValueError("JSON liste bekleniyordu")
+        return veri
+    OLCUM.sayac("ekstre_parca_toplam", len(parcalar))
+    sonuclar = await asyncio.gather(*[parca_analiz_et(h) for h in parcalar], return_exceptions=True)
+    hatalar = [f"sayfa {h.sayfa[0]}-{h.sayfa[1]}: {r}" if h.sayfa else str(r) for h, r in zip(parcalar, sonuclar) if isinstance(r, Exception)]
+    # Eksik sayfalı ekstre deftere sessizce girmesin: bir parça bile okunamazsa dosya hatalı sayılır
+    if hatalar: raise GeminiHatasi("; ".join(hatalar))
+    return sonucu_tamamla(sayfa_sinirinda_birlestir(sonuclar), dosya_objesi, parcalar[0])
+
+async def gemini_ile_analiz_et(motor, dosya_objesi, secilen_model, mod, hazir, vkn):
+    # hazir: süreç havuzunda bir kez üretilmiş ön işleme sonucu (HazirDosya; ekstrede sayfa parçaları listesi), retry'larda tekrarlanmaz
+    try:
+        if isinstance(hazir, Exception): raise hazir
+        if isinstance(hazir, list): return await ekstre_analiz_et(motor, dosya_objesi, secilen_model, hazir)
+        base64_data, mime_type, qr_data = hazir.base64_data, hazir.mime_type, hazir.qr_data
+        # QR ÖNCELİKLİ: Geçerli GİB karekodu varsa görsel yüklenmez
+        alanlar = qr_fatura_coz(qr_data) if mod == "fis" else None
+        if alanlar: veri = await qr_hizli_yol(motor, secilen_model, alanlar, vkn)
+        else:
+            parts = [{"text": prompt_olustur(mod, qr_data)}, {"inline_data": {"mime_type": mime_type, "data": base64_data}}]
+            veri = model_json(await motor.uret(secilen_model, parts))
+        return sonucu_tamamla(veri, dosya_objesi, hazir)
+    except Exception as e: return {"hata": str(e)}
+
+def sonucu_tamamla(veri, dosya_objesi, hazir):
+    # Model çıktısına dosyaya bağlı alanlar eklenir (tekli ve paketli çağrılar için ortak)
+    if isinstance(veri, list):
+        for v in veri: v["dosya_adi"] = f"Ekstre_{dosya_objesi.name}"; v["qr_gecerli"] = False
+        return veri
+    veri["dosya_adi"] = dosya_objesi.name
+    veri["qr_gecerli"] = True if hazir.qr_data else False
+    veri["qr_data"] = hazir.qr_data
+    veri["phash"] = hazir.phash
+    veri["_dosya_turu"] = "pdf" if hazir.mime_type == "application/pdf" else "jpg"
+    return veri
+
+async def toplu_analiz(api_key, isler, secilen_model, eszamanlilik, sonuc_geldi, paketle, sinirlayici, vkn):
+    # isler: [(anahtar, dosya, mod)] -> her sonuç geldikçe sonuc_geldi(anahtar, dosya, mod, sonuc)
+    # Ön işleme süreç havuzunda, API çağrıları "İşlem Hızı" kadar eşzamanlı işçide.
+    # paketle: fiş görselleri paketlenerek tek istekte gider; paketten dönmeyenler tekli çağrıya düşer.
+    # İş motorunun thread'inde çalışır: sınırlayıcı / VKN hafızası dışarıdan verilir (st.* çağrılmaz).
+    # Dönüş: (paketle okunan fiş, paket isteği, API çağrısı)
+    async with GeminiMotoru(api_key, sinirlayici, eszamanlilik) as motor:
+        paketleyici = Paketleyici(motor, secilen_model, coklu_prompt_olustur) if paketle else None
+        async def ag_asamasi(is_, hazir):
+            anahtar, d, mod = is_
+            veri = None
+            if paketleyici and mod == "fis" and not isinstance(hazir, Exception) and not qr_fatura_coz(hazir.qr_data):
+                veri = await paketleyici.gonder(hazir)
+            sonuc = sonucu_tamamla(veri, d, hazir) if veri else await gemini_ile_analiz_et(motor, d, secilen_model, mod, hazir, vkn)
+            sonuc_geldi(anahtar, d, mod, sonuc)
+        # Paket dolarken işçiler bekler: işçi sayısı paket boyuyla ölçeklenir, eşzamanlı HTTP isteği motorda sınırlı kalır
+        await boru_hatti_calistir(isler, belge_hazirla, lambda is_: (is_[1].getvalue(), is_[1].type, is_[2]), ag_asamasi,
+                                  eszamanlilik * (MAX_ADET if paketle else 1), kuyruk_boyu=eszamanlilik * 2)
+        return (paketleyici.paketlenen, paketleyici.istek, motor.cagri) if paketleyici else (0, 0, motor.cagri)
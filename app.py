@@ -1,24 +1,10 @@
 import streamlit as st
-import os
-import pandas as pd
-from PIL import Image
-import io
-import json
-import requests
-import base64
-import concurrent.futures
-import time
-from datetime import datetime
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import plotly.express as px
-import zipfile
-from pyzbar.pyzbar import decode
-import cv2
-import numpy as np
-import gc # ÇÖP TOPLAYICI (YENİ)
 
 # --- 1. AYARLAR ---
+# Giriş ekranı sadece streamlit'le çizilir; uygulama modülleri girişten sonra import edilir (pandas, ve
+# gemini_motor / modeller ile httpx), ağır olanlar ayrıca ilk kullanıldıkları yerde: gspread / oauth2client
+# (Sheets bağlantısı), plotly (Raporlar), openpyxl (Excel dışa aktarım), analiz hattı (analiz.py: Pillow, pypdf,
+# pyzbar) ilk analiz işinde. Her rerun app.py'yi baştan çalıştırır: uzak çağrılar (model / müşteri listesi) önbellekten döner.
 st.set_page_config(page_title="Muhabese AI", layout="wide", page_icon="🏢")
 
 def giris_kontrol():
@@ -37,6 +23,28 @@ def giris_kontrol():
         st.stop()
 giris_kontrol()
 
+import os
+import pandas as pd
+import json
+import time
+from datetime import datetime, date
+import uuid
+import hashlib
+import gc # ÇÖP TOPLAYICI (YENİ)
+from onbellek import SonucOnbellegi
+from gemini_motor import HizSinirlayici
+from blob_deposu import BlobDeposu, ara_sira_temizle
+import disa_aktarim
+from muhasebe import temizle_ve_sayiya_cevir, muhasebe_fisne_cevir
+from sheets_senkron import SheetsSenkron, VARSAYILAN_MUSTERI
+from defter_deposu import DefterDeposu
+from mukerrer import MukerrerIndeksi, KESIN, OLASI
+from qr_fatura import VknHafizasi
+from paketleme import MAX_ADET
+from is_motoru import IsMotoru, IsGunlugu, IsDosyasi
+from olcum import OLCUM, prometheus_ucu_baslat
+from modeller import ModelListesi
+
 API_KEY = st.secrets.get("GEMINI_API_KEY")
 if not API_KEY: st.error("API Key Eksik!"); st.stop()
 
@@ -50,16 +58,12 @@ if 'hesap_kodlari' not in st.session_state:
     }
 if 'analiz_sonuclari' not in st.session_state: st.session_state['analiz_sonuclari'] = []
 
-# --- 3. MOTORLAR ---
-def temizle_ve_sayiya_cevir(deger):
-    if pd.isna(deger) or deger == "": return 0.0
-    try:
-        s = str(deger).replace("₺", "").replace("TL", "").strip()
-        if "," in s and "." in s: s = s.replace(".", "").replace(",", ".")
-        elif "," in s: s = s.replace(",", ".")
-        return float(s)
-    except: return 0.0
+VERI_DIZINI = os.environ.get("MUHABESE_VERI_DIZINI", os.path.join(os.path.expanduser("~"), ".muhabese"))
+PROMPT_SURUMU = 2 # Promptlar değişince artır (önbellek anahtarına girer)
+if 'oturum_id' not in st.session_state: st.session_state['oturum_id'] = uuid.uuid4().hex
+if 'veri_surumu' not in st.session_state: st.session_state['veri_surumu'] = 0 # Her düzenlemede artar, dışa aktarımları geçersiz kılar
 
+# --- 3. MOTORLAR ---
 def veri_saglamasi(veri):
     try:
         tutar = temizle_ve_sayiya_cevir(veri.get("toplam_tutar", 0))
@@ -82,200 +86,247 @@ def yeni_dosya_adi_olustur(veri):
         return f"{tarih}_{yer}_{tutar}TL.{uzanti}"
     except: return f"HATA_{veri.get('dosya_adi')}"
 
-def muhasebe_fisne_cevir(df_ham):
-    hk = st.session_state['hesap_kodlari']
-    yevmiye = []
-    for index, row in df_ham.iterrows():
-        try:
-            toplam = temizle_ve_sayiya_cevir(row.get('toplam_tutar', 0))
-            kdv = temizle_ve_sayiya_cevir(row.get('toplam_kdv', 0))
-            matrah = toplam - kdv
-            tarih = str(row.get('tarih', datetime.now().strftime('%d.%m.%Y')))
-            kategori = row.get('kategori', 'Diğer')
-            gider_kodu = hk.get(kategori, hk["Diğer"])
-            aciklama = f"{kategori} - {row.get('isyeri_adi', 'Evrak')}"
-            if matrah > 0: yevmiye.append({"Tarih": tarih, "Hesap Kodu": gider_kodu, "Açıklama": aciklama, "Borç": matrah, "Alacak": 0})
-            if kdv > 0: yevmiye.append({"Tarih": tarih, "Hesap Kodu": hk["KDV"], "Açıklama": "KDV", "Borç": kdv, "Alacak": 0})
-            alacak_hesabi = hk["Banka"] if "Ekstre" in str(row.get('dosya_adi','')) else hk["Kasa"]
-            yevmiye.append({"Tarih": tarih, "Hesap Kodu": alacak_hesabi, "Açıklama": "Ödeme", "Borç": 0, "Alacak": toplam})
-        except: continue
-    return pd.DataFrame(yevmiye)
+def yevmiye_getir(dt, hk):
+    # Veri sürümü ve hesap planı aynı kaldıkça yeniden hesaplanmaz
+    anahtar = (st.session_state['veri_surumu'], json.dumps(hk, sort_keys=True))
+    onceki = st.session_state.get('_yevmiye')
+    if not onceki or onceki[0] != anahtar: st.session_state['_yevmiye'] = onceki = (anahtar, muhasebe_fisne_cevir(dt, hk))
+    return onceki[1]
 
 # --- 4. SHEETS ---
 @st.cache_resource
 def sheets_baglantisi_kur():
     if "gcp_service_account" not in st.secrets: return None
     try:
+        import gspread
+        from oauth2client.service_account import ServiceAccountCredentials
         scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
         creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(st.secrets["gcp_service_account"]), scope)
         return gspread.authorize(creds)
     except: return None
 
-def musteri_listesini_getir():
+@st.cache_resource
+def sheets_senkron_getir():
+    # Süreç genelinde tek senkron katmanı: tutamaçlar, müşteri listesi ve okunan satırlar paylaşılır
     client = sheets_baglantisi_kur()
-    if not client: return ["Varsayılan Müşteri"]
-    try:
-        sheet = client.open("Muhabese Veritabanı")
-        try: ws = sheet.worksheet("Musteriler")
-        except: ws = sheet.add_worksheet("Musteriler", 100, 2); ws.append_row(["Müşteri", "Tarih"]); ws.append_row(["Varsayılan Müşteri", str(datetime.now())])
-        return ws.col_values(1)[1:] or ["Varsayılan Müşteri"]
-    except: return ["Varsayılan Müşteri"]
+    return SheetsSenkron(client, musteri_dosyasi=os.path.join(VERI_DIZINI, "musteriler.json")) if client else None
+
+def musteri_listesini_getir():
+    # Kenar çubuğu her rerun'da çizilir: liste yerel kopyadan gelir, süresi geçince arka planda yenilenir
+    senkron = sheets_senkron_getir()
+    if not senkron: return [VARSAYILAN_MUSTERI]
+    try: return senkron.musteriler_onbellekten()
+    except: senkron.gecersiz_kil(); return [VARSAYILAN_MUSTERI]
 
 def yeni_musteri_ekle(ad):
-    client = sheets_baglantisi_kur()
-    if not client: return False
-    try:
-        sheet = client.open("Muhabese Veritabanı")
-        ws = sheet.worksheet("Musteriler")
-        if ad in ws.col_values(1): return "Mevcut"
-        ws.append_row([ad, str(datetime.now())])
-        try: 
-            ns = sheet.add_worksheet(ad, 2, 10)
-            ns.append_row(["Dosya Adı", "İşyeri", "Fiş No", "Tarih", "Kategori", "Tutar", "KDV", "Zaman", "Durum", "QR"])
-        except: pass
-        return True
-    except Exception as e: return str(e)
+    senkron = sheets_senkron_getir()
+    if not senkron: return False
+    try: return senkron.musteri_ekle(ad)
+    except Exception as e: senkron.gecersiz_kil(); return str(e)
 
 def musteri_sil(ad):
-    client = sheets_baglantisi_kur()
-    if not client: return False
-    try:
-        sheet = client.open("Muhabese Veritabanı")
-        ws = sheet.worksheet("Musteriler")
-        cell = ws.find(ad)
-        if cell: ws.delete_rows(cell.row)
-        try: sheet.del_worksheet(sheet.worksheet(ad))
-        except: pass
-        return True
-    except Exception as e: return str(e)
+    senkron = sheets_senkron_getir()
+    if not senkron: return False
+    try: return senkron.musteri_sil(ad)
+    except Exception as e: senkron.gecersiz_kil(); return str(e)
 
 def sheete_kaydet(veri, musteri):
-    client = sheets_baglantisi_kur()
-    if not client: return False
-    try:
-        sheet = client.open("Muhabese Veritabanı")
-        try: ws = sheet.worksheet(musteri)
-        except: ws = sheet.add_worksheet(musteri, 2, 10)
-        if not ws.row_values(1): ws.append_row(["Dosya Adı", "İşyeri", "Fiş No", "Tarih", "Kategori", "Tutar", "KDV", "Zaman", "Durum", "QR"])
-
-        rows = []
-        for v in veri:
-            if not isinstance(v, dict): continue
-            basarili, mesaj = veri_saglamasi(v)
-            durum = "✅" if basarili else "⚠️"
-            qr_durumu = "📱QR" if v.get("qr_gecerli") else "-"
-            temiz_ad = yeni_dosya_adi_olustur(v)
-            rows.append([temiz_ad, v.get("isyeri_adi", "-"), v.get("fiş_no", "-"), v.get("tarih", "-"), v.get("kategori", "Diğer"), str(v.get("toplam_tutar", "0")), str(v.get("toplam_kdv", "0")), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), durum, qr_durumu])
-        
-        if rows: ws.append_rows(rows); return True
-        return False
-    except: return False
-
-def sheetten_veri_cek(musteri):
-    client = sheets_baglantisi_kur()
-    if not client: return pd.DataFrame()
+    senkron = sheets_senkron_getir()
+    if not senkron: return False
+    rows = []
+    for v in veri:
+        if not isinstance(v, dict): continue
+        basarili, mesaj = veri_saglamasi(v)
+        durum = "✅" if basarili else "⚠️"
+        qr_durumu = "📱QR" if v.get("qr_gecerli") else "-"
+        temiz_ad = yeni_dosya_adi_olustur(v)
+        rows.append([temiz_ad, v.get("isyeri_adi", "-"), v.get("fiş_no", "-"), v.get("tarih", "-"), v.get("kategori", "Diğer"), str(v.get("toplam_tutar", "0")), str(v.get("toplam_kdv", "0")), datetime.now().strftime("%Y-%m-%d %H:%M:%S"), durum, qr_durumu])
+    if not rows: return False
     try:
-        sheet = client.open("Muhabese Veritabanı")
-        ws = sheet.worksheet(musteri)
-        data = ws.get_all_records()
-        if not data: return pd.DataFrame()
-        df = pd.DataFrame(data)
-        def tr_temizle(text):
-            tr_map = {"ı": "i", "ğ": "g", "ü": "u", "ş": "s", "ö": "o", "ç": "c", "İ": "i", "Ğ": "g", "Ü": "u", "Ş": "s", "Ö": "o", "Ç": "c"}
-            for k, v in tr_map.items(): text = str(text).replace(k, v)
-            return text.lower().strip().replace(" ", "").replace("_", "")
-        cols_map = {tr_temizle(c): c for c in df.columns}
-        c_tutar = next((cols_map[k] for k in cols_map if "tutar" in k), None)
-        if c_tutar: df[c_tutar] = df[c_tutar].apply(temizle_ve_sayiya_cevir)
-        return df
-    except: return pd.DataFrame()
+        # Tek kilit altında kuyruğa al ve tek append_rows ile yaz; hata olursa satırlar atılır, kullanıcı tekrar kaydedince yeniden kuyruğa girer
+        return senkron.kaydet(musteri, rows) > 0
+    except: senkron.gecersiz_kil(musteri); return False
+
+@st.cache_resource
+def defter_deposu_getir():
+    return DefterDeposu(os.path.join(VERI_DIZINI, "defter.sqlite"))
+
+def defteri_senkronla(musteri, zorla=False):
+    # Kısıtlı (30 sn) artımlı çekme; ilk / saatlik baştan çekme arka planda. Sheets'e ulaşılamazsa yerel kopya kullanılır
+    senkron = sheets_senkron_getir()
+    if not senkron: return True
+    defter = defter_deposu_getir()
+    try: defter.senkronla(musteri, senkron, zorla=zorla)
+    except: senkron.gecersiz_kil(musteri); return False
+    return defter.son_hata(musteri) is None
+
+@st.cache_resource
+def mukerrer_indeksi_getir():
+    return MukerrerIndeksi(os.path.join(VERI_DIZINI, "mukerrer.sqlite"))
+
+def mukerrerleri_bul(musteri, kayitlar):
+    # Veri sürümü değişmedikçe tekrar hesaplanmaz; her fiş O(1) indeks aramasıyla kontrol edilir
+    # Arka plandaki baştan çekme bitince (son_tam değişir) de yeniden hesaplanır
+    anahtar = (st.session_state['veri_surumu'], musteri, defter_deposu_getir().son_tam(musteri))
+    onceki = st.session_state.get('_mukerrer')
+    if not onceki or onceki[0] != anahtar:
+        defteri_senkronla(musteri)
+        indeks = mukerrer_indeksi_getir()
+        indeks.defterden_guncelle(musteri, defter_deposu_getir())
+        st.session_state['_mukerrer'] = onceki = (anahtar, indeks.toplu_kontrol(musteri, kayitlar))
+    return onceki[1]
 
 # --- 5. GEMINI & QR ---
-@st.cache_data
+@st.cache_resource
+def model_listesi_getir():
+    return ModelListesi(API_KEY, os.path.join(VERI_DIZINI, "modeller.json"))
+
 def modelleri_getir():
-    url = f"https://generativelanguage.googleapis.com/v1beta/models?key={API_KEY}"
-    try:
-        response = requests.get(url)
-        data = response.json()
-        tum = [m['name'].replace("models/", "") for m in data.get('models', []) if 'generateContent' in m.get('supportedGenerationMethods', [])]
-        f25 = [m for m in tum if "2.5-flash" in m]
-        f20 = [m for m in tum if "2.0-flash" in m]
-        f15 = [m for m in tum if "1.5-flash" in m]
-        return f25 + f20 + f15 + [m for m in tum if m not in f25+f20+f15]
-    except: return ["gemini-1.5-flash"]
-
-def qr_kodu_oku_ve_filtrele(image_bytes):
-    try:
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        decoded_objects = decode(img)
-        for obj in decoded_objects:
-            raw = obj.data.decode("utf-8")
-            if len(raw) > 10: return raw 
-        return None
-    except: return None
+    # Rerun'da API'ye gidilmez: diskteki liste (TTL dolunca arka planda yenilenir) ya da gömülü varsayılan liste
+    return model_listesi_getir().getir()
 
-def dosyayi_hazirla(uploaded_file):
-    bytes_data = uploaded_file.getvalue()
-    mime_type = uploaded_file.type
-    if mime_type == "application/pdf": return base64.b64encode(bytes_data).decode('utf-8'), mime_type
-    
-    # RAM DOSTU RESİM İŞLEME (YENİ)
-    img = Image.open(io.BytesIO(bytes_data)).convert("RGB")
-    # Maksimum boyut 1024 piksel (Google için yeterli, RAM için harika)
-    img.thumbnail((1024, 1024)) 
-    buf = io.BytesIO()
-    img.save(buf, "JPEG", quality=70) # Kaliteyi %70'e düşür (Göz fark etmez, RAM rahatlar)
-    return base64.b64encode(buf.getvalue()).decode('utf-8'), "image/jpeg"
-
-def gemini_ile_analiz_et(dosya_objesi, secilen_model, mod="fis", retries=3):
-    for attempt in range(retries):
-        try:
-            qr_data = None
-            if dosya_objesi.type != "application/pdf":
-                qr_data = qr_kodu_oku_ve_filtrele(dosya_objesi.getvalue())
-            
-            base64_data, mime_type = dosyayi_hazirla(dosya_objesi)
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/{secilen_model}:generateContent?key={API_KEY}"
-            headers = {'Content-Type': 'application/json'}
-            qr_bilgisi = f"\n[İPUCU]: QR kod bulundu: '{qr_data}'" if qr_data else ""
-
-            if mod == "fis":
-                prompt = f"""Bu belgeyi analiz et. {qr_bilgisi}
-                JSON: {{"isyeri_adi": "...", "fiş_no": "...", "tarih": "GG.AA.YYYY", "kategori": "Gıda/Akaryakıt/Kırtasiye/Teknoloji/Konaklama/Diğer", "toplam_tutar": "0.00", "toplam_kdv": "0.00"}}
-                """
-            else:
-                prompt = """Kredi kartı ekstresi satırları. JSON Liste: [{"isyeri_adi": "...", "tarih": "GG.AA.YYYY", "kategori": "...", "toplam_tutar": "0.00", "toplam_kdv": "0"}, ...]"""
-
-            payload = {"contents": [{"parts": [{"text": prompt}, {"inline_data": {"mime_type": mime_type, "data": base64_data}}]}]}
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code == 429: time.sleep(2 ** (attempt + 1)); continue 
-            if response.status_code != 200: return {"hata": f"API Hatası ({response.status_code})"}
-            
-            metin = response.json()['candidates'][0]['content']['parts'][0]['text'].replace("```json", "").replace("```", "").strip()
-            veri = json.loads(metin)
-            
-            if isinstance(veri, list):
-                for v in veri: v["dosya_adi"] = f"Ekstre_{dosya_objesi.name}"; v["qr_gecerli"] = False
-                return veri
-            else:
-                veri["dosya_adi"] = dosya_objesi.name
-                veri["qr_gecerli"] = True if qr_data else False
-                veri["_ham_dosya"] = dosya_objesi.getvalue()
-                veri["_dosya_turu"] = "pdf" if mime_type == "application/pdf" else "jpg"
-                return veri
-        except Exception as e: return {"hata": str(e)}
-    return {"hata": "Kota limiti nedeniyle işlem yapılamadı."}
-
-def arsiv_olustur(veri_listesi):
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for veri in veri_listesi:
-            if isinstance(veri, dict) and "_ham_dosya" in veri:
-                yeni_ad = yeni_dosya_adi_olustur(veri)
-                zip_file.writestr(yeni_ad, veri["_ham_dosya"])
-    return zip_buffer.getvalue()
+@st.cache_resource
+def vkn_hafizasi_getir():
+    return VknHafizasi(os.path.join(VERI_DIZINI, "vkn.sqlite"))
+
+@st.cache_resource
+def hiz_sinirlayici_getir():
+    # Süreç genelinde tek sınırlayıcı: tüm kullanıcılar aynı kotayı paylaşır
+    return HizSinirlayici(rpm=int(st.secrets.get("GEMINI_RPM", 1000)), tpm=int(st.secrets.get("GEMINI_TPM", 1_000_000)))
+
+@st.cache_resource
+def onbellek_getir():
+    ob = SonucOnbellegi(os.path.join(VERI_DIZINI, "sonuc_onbellegi.sqlite"))
+    ob.buda()
+    return ob
+
+def onbellek_anahtari(dosya_objesi, secilen_model, mod):
+    return SonucOnbellegi.anahtar(dosya_objesi.getvalue(), secilen_model, mod, PROMPT_SURUMU)
+
+def onbellekten_tamamla(sonuc, dosya_objesi, mod):
+    # Önbellekte sadece model çıktısı var; dosyaya bağlı alanlar yeniden eklenir
+    if isinstance(sonuc, list):
+        for v in sonuc: v["dosya_adi"] = f"Ekstre_{dosya_objesi.name}"
+        return sonuc
+    sonuc["dosya_adi"] = dosya_objesi.name
+    sonuc["_dosya_turu"] = "pdf" if dosya_objesi.type == "application/pdf" else "jpg"
+    if sonuc.get("qr_hizli"): # QR yolu "VKN <no>" yer tutucusuyla önbelleğe girmiş olabilir; hafıza o günden beri öğrenmiş olabilir
+        sonuc.update({k: v for k, v in (vkn_hafizasi_getir().getir(sonuc.get("vkn")) or {}).items() if v})
+    return sonuc
+
+# --- BLOB DEPOSU: Ham dosyalar RAM'de değil diskte ---
+@st.cache_resource
+def blob_kok_dizini():
+    return os.path.join(VERI_DIZINI, "blob")
+
+def blob_deposu_getir():
+    # Bu oturumun klasörü: yükleme, dışa aktarım ve temizlik sadece buraya. Uzun ömürlü süreçte de terk edilmiş
+    # oturumlar silinsin: saatte bir, arka planda
+    ara_sira_temizle(blob_kok_dizini())
+    return BlobDeposu(blob_kok_dizini(), st.session_state['oturum_id'])
+
+def is_deposu_getir():
+    # Paneldeki işin dosyaları (önizleme / ZIP için okunur): başka oturumun işi de gösterilebilir
+    oturum = st.session_state.get('is_oturumu')
+    return BlobDeposu(blob_kok_dizini(), oturum) if oturum else blob_deposu_getir()
+
+# --- ARKA PLAN İŞLERİ: Analiz script'ten bağımsız koşar, sonuçlar günlükten okunur ---
+@st.cache_resource
+def is_motoru_getir():
+    # Süreç genelinde tek motor. Kaynaklar burada (script thread'inde) alınır; arka planda st.* çağrılmaz
+    ob, kok, sinirlayici, vkn = onbellek_getir(), blob_kok_dizini(), hiz_sinirlayici_getir(), vkn_hafizasi_getir()
+
+    async def calistir(bilgi, dosyalar, bildir):
+        from analiz import toplu_analiz # İlk işte (arka plan thread'inde) yüklenir
+        depo = BlobDeposu(kok, bilgi["oturum"])
+        isler = []
+        for f in dosyalar:
+            if not depo.var_mi(f["blob"]): bildir(f["sira"], {"hata": "Dosya artık diskte yok (oturum temizlenmiş)"}); continue
+            isler.append(((f["sira"], f["anahtar"]), IsDosyasi(f["ad"], f["tur"], f["blob"], depo), f["mod"]))
+        qr_hizli = [0]
+
+        def sonuc_geldi(is_anahtari, d, mod, r):
+            sira, anahtar = is_anahtari
+            OLCUM.sayac("dosya_toplam", mod=mod, sonuc="hata" if isinstance(r, dict) and "hata" in r else "tamam")
+            if isinstance(r, dict) and "hata" not in r:
+                r["_blob"] = d.blob # Kayıt dosyanın kendisini değil, depodaki özetini taşır
+                if r.get("qr_hizli"): qr_hizli[0] += 1; OLCUM.sayac("qr_hizli_toplam")
+            if not (isinstance(r, dict) and "hata" in r): ob.kaydet(anahtar, r)
+            bildir(sira, r)
+
+        paketli, paket_istegi, api_cagrisi = await toplu_analiz(API_KEY, isler, bilgi["model"], bilgi["ayarlar"]["hiz"], sonuc_geldi, bilgi["ayarlar"]["paketle"], sinirlayici, vkn)
+        ob.buda()
+        return {"analiz": len(isler), "qr_hizli": qr_hizli[0], "paketli": paketli, "paket_istegi": paket_istegi, "api_cagrisi": api_cagrisi}
+
+    return IsMotoru(IsGunlugu(os.path.join(VERI_DIZINI, "isler.sqlite")), calistir)
+
+def is_bagla(is_id, oturum):
+    # Panel bu işin sonuçlarını gösterir. Blob'lar işin oturum klasöründen okunur; kendi oturumumuz değişmez
+    st.session_state['aktif_is'] = is_id
+    st.session_state['is_oturumu'] = oturum
+    st.session_state['is_imleci'] = 0
+    st.session_state['analiz_sonuclari'] = []
+    st.session_state['veri_surumu'] += 1
+
+def is_sonuclarini_al():
+    # Günlükteki yeni sonuçlar panele eklenir; paneldeki düzeltmeler korunur
+    is_id = st.session_state.get('aktif_is')
+    if not is_id: return 0
+    yeni = is_motoru_getir().gunluk.sonuclar(is_id, st.session_state['is_imleci'])
+    for no, veri in yeni:
+        st.session_state['analiz_sonuclari'].extend(veri if isinstance(veri, list) else [veri])
+        st.session_state['is_imleci'] = no
+    if yeni: st.session_state['veri_surumu'] += 1
+    return len(yeni)
+
+def is_durumu(canli):
+    # İlerleme paneli. canli: iş çalışırken parça (fragment) olarak birkaç saniyede bir kendini yeniler, sayfanın geri kalanını değil
+    motor = is_motoru_getir()
+    is_id = st.session_state['aktif_is']
+    b = motor.gunluk.is_bilgisi(is_id)
+    if b is None: return
+    calisiyor = motor.calisiyor_mu(is_id)
+    if canli and not calisiyor: st.rerun() # İş bitti/durdu: panel son sonuçlarla bir kez tam yenilenir, yoklama durur
+
+    st.progress((b["biten"] + b["hatali"]) / b["toplam"] if b["toplam"] else 1.0)
+    durum = "⏳ Çalışıyor" if calisiyor else {"bitti": "✅ Bitti", "durdu": "⏸️ Durdu"}.get(b["durum"], b["durum"])
+    ist = b["istatistik"]
+    ek = f" · {ist['qr_hizli']} fiş QR'dan görselsiz, {ist['paketli']} fiş {ist['paket_istegi']} paket istekte" if "qr_hizli" in ist and not calisiyor else ""
+    st.caption(f"{durum} · {b['biten']}/{b['toplam']} dosya okundu, {b['hatali']} hata{ek}")
+    if "onbellek_isabet" in ist:
+        st.caption(f"⚡ Önbellek: {ist['onbellek_isabet']} isabet" + (f", {ist['api_cagrisi']} API çağrısı" if "api_cagrisi" in ist else ""))
+    if calisiyor:
+        yeni = motor.gunluk.sonuclar(is_id, st.session_state['is_imleci'])
+        son = [v for _, veri in yeni[-5:] for v in (veri if isinstance(veri, list) else [veri])]
+        if son: st.dataframe(pd.DataFrame(son).reindex(columns=["dosya_adi", "isyeri_adi", "tarih", "toplam_tutar"]), hide_index=True, use_container_width=True)
+        c1, c2 = st.columns(2)
+        if c1.button(f"📥 {len(yeni)} yeni sonucu panele al", disabled=not yeni, use_container_width=True): st.rerun()
+        if c2.button("⏸️ Durdur", use_container_width=True): motor.durdur(is_id); st.rerun()
+    if b["hata"]: st.error(f"İş yarıda kaldı: {b['hata']}")
+    hatalar = motor.gunluk.hatalar(is_id) if not calisiyor else []
+    if hatalar:
+        st.error(f"🚨 {len(hatalar)} dosya okunamadı.")
+        st.write([f"{ad}: {hata}" for ad, hata in hatalar])
+
+# --- ÖLÇÜM: Prometheus ucu (MUHABESE_METRIK_PORTU) ve geliştirici tanılama paneli ---
+@st.cache_resource
+def metrik_ucu_getir():
+    port = os.environ.get("MUHABESE_METRIK_PORTU") or st.secrets.get("METRIK_PORTU")
+    if not port: return None
+    adres = os.environ.get("MUHABESE_METRIK_ADRESI") or st.secrets.get("METRIK_ADRESI", "127.0.0.1") # Kazıyıcı başka makinedeyse
+    try: return prometheus_ucu_baslat(int(port), adres=adres) # GET /metrics (Prometheus), diğer yollar JSON
+    except OSError: return None # Port dolu (ör. ikinci süreç): panel yine çalışır
+
+def tanilama_paneli():
+    ozet = OLCUM.ozet()
+    st.caption(f"Ölçüm başlangıcı: {datetime.fromtimestamp(ozet['baslangic']):%d.%m.%Y %H:%M:%S}")
+    if ozet["sureler"]: st.dataframe(pd.DataFrame(ozet["sureler"]), hide_index=True, use_container_width=True)
+    if ozet["sayaclar"]: st.dataframe(pd.DataFrame(ozet["sayaclar"]), hide_index=True, use_container_width=True)
+    c1, c2 = st.columns(2)
+    c1.download_button("JSON", OLCUM.json, file_name="olcum.json", mime="application/json", use_container_width=True)
+    if c2.button("Sıfırla", use_container_width=True): OLCUM.sifirla(); st.rerun()
+
+metrik_ucu_getir()
 
 # --- 6. ARAYÜZ ---
 with st.sidebar:
@@ -291,21 +342,31 @@ with st.sidebar:
             yeni = st.text_input("Firma Adı", key="new_c")
             if yeni and yeni_musteri_ekle(yeni) == True: st.success("Eklendi!"); time.sleep(1); st.rerun()
         if st.button("Sil", use_container_width=True):
-            sil = st.selectbox("Silinecek", [m for m in musteriler if m!="Varsayılan Müşteri"], key="del_c")
+            sil = st.selectbox("Silinecek", [m for m in musteriler if m!=VARSAYILAN_MUSTERI], key="del_c")
             if musteri_sil(sil): st.success("Silindi!"); time.sleep(1); st.rerun()
 
     st.divider()
     modeller = modelleri_getir()
     model = st.selectbox("AI Modeli", modeller, index=0)
-    hiz = st.slider("İşlem Hızı", 1, 20, 10) 
+    hiz = st.slider("İşlem Hızı", 1, 20, 10, help="Aynı anda Gemini'ye gönderilen istek sayısı (eşzamanlılık hedefi)")
+    paketle = st.toggle("Çoklu Fiş Paketleme", value=True, help=f"Fiş görselleri {MAX_ADET}'e kadar paketlenip tek istekte gönderilir (dakikalık istek kotasını korur)")
     
     if st.button("❌ Ekranı Temizle", use_container_width=True):
         st.session_state['uploader_key'] += 1
         if 'analiz_sonuclari' in st.session_state: del st.session_state['analiz_sonuclari']
+        st.session_state.pop('aktif_is', None)
+        st.session_state.pop('is_oturumu', None)
+        # Sadece bu oturumun klasörü silinir, o da içinde hâlâ çalışan bir iş yoksa
+        if not is_motoru_getir().gunluk.calisan_var(st.session_state['oturum_id']): blob_deposu_getir().temizle()
+        st.session_state['veri_surumu'] += 1
         # HAFIZA TEMİZLİĞİ (RAM BOŞALTMA)
         gc.collect()
         st.rerun()
 
+    # Geliştirici paneli: sadece secrets TANI_PANELI ile (URL'den açılamaz)
+    if st.secrets.get("TANI_PANELI", False):
+        with st.expander("🩺 Tanılama"): tanilama_paneli()
+
 t1, t2, t3 = st.tabs([f"📤 {secili} - Evraklar", "📊 Raporlar", "⚙️ Hesap Planı"])
 
 # --- TAB 1: EVRAK İŞLEME ---
@@ -316,59 +377,74 @@ with t1:
     with c2: ekstre = st.file_uploader("Ekstre", type=['pdf','jpg'], accept_multiple_files=True, key=f"e_{st.session_state['uploader_key']}")
     
     if st.button("🚀 Analizi Başlat", type="primary", use_container_width=True):
-        tum = []
-        hatalar = []
-        bar = st.progress(0)
-        
-        # BATCH İŞLEME (Hafızayı korumak için)
-        if fisler:
-            total_fis = len(fisler)
-            chunk_size = 50 # 50'şerlik paketler
-            for i in range(0, total_fis, chunk_size):
-                chunk = fisler[i:i + chunk_size]
-                with concurrent.futures.ThreadPoolExecutor(max_workers=hiz) as exe:
-                    futures = {exe.submit(gemini_ile_analiz_et, d, model, "fis"): d for d in chunk}
-                    for f in concurrent.futures.as_completed(futures):
-                        r = f.result()
-                        if "hata" not in r: tum.append(r)
-                        else: hatalar.append(f"{futures[f].name}: {r['hata']}")
-                        bar.progress((len(tum)+len(hatalar))/total_fis)
-                gc.collect() # RAM Temizle
-
-        if ekstre:
-            with st.spinner("Ekstre taranıyor..."):
-                for d in ekstre:
-                    r = gemini_ile_analiz_et(d, model, "ekstre")
-                    if isinstance(r, list): tum.extend(r)
-                    elif "hata" in r: hatalar.append(f"{d.name}: {r['hata']}")
-    
-        if tum:
-            st.session_state['analiz_sonuclari'] = tum
-            st.success(f"✅ {len(tum)} belge okundu! Aşağıdan kontrol edip onaylayın.")
-        if hatalar:
-            st.error(f"🚨 {len(hatalar)} dosya okunamadı."); st.write(hatalar)
+        secilenler = [(d, "fis") for d in (fisler or [])] + [(d, "ekstre") for d in (ekstre or [])]
+        if secilenler:
+            ob = onbellek_getir()
+            depo = blob_deposu_getir()
+            dosyalar = []
+            # Dosyalar diske, iş günlüğe yazılır; önbellekte olanlar (daha önce okunmuş) baştan bitmiş sayılır
+            for d, mod in secilenler:
+                anahtar = onbellek_anahtari(d, model, mod)
+                blob = depo.koy(d.getvalue())
+                r = ob.getir(anahtar)
+                OLCUM.sayac("onbellek_toplam", sonuc="iska" if r is None else "isabet")
+                if r is not None:
+                    r = onbellekten_tamamla(r, d, mod)
+                    if isinstance(r, dict): r["_blob"] = blob
+                dosyalar.append({"ad": d.name, "tur": d.type, "mod": mod, "blob": blob, "anahtar": anahtar, "sonuc": r})
+            motor = is_motoru_getir()
+            is_id = motor.gunluk.is_olustur(secili, st.session_state['oturum_id'], model, {"hiz": hiz, "paketle": paketle}, dosyalar)
+            motor.baslat(is_id)
+            is_bagla(is_id, st.session_state['oturum_id'])
+            # Dosyalar artık blob deposunda: yükleyiciyi sıfırla ki Streamlit kendi kopyasını bıraksın
+            st.session_state['uploader_key'] += 1
+            gc.collect() # RAM Temizle
+            st.rerun()
+
+    with st.expander("🗂️ Analiz İşleri"):
+        motor = is_motoru_getir()
+        isler = motor.gunluk.isler(secili)
+        if not isler: st.caption("Bu müşteri için iş yok.")
+        for b in isler:
+            calisiyor = motor.calisiyor_mu(b["is_id"])
+            c1, c2, c3 = st.columns([3, 1, 1])
+            durum = "⏳" if calisiyor else {"bitti": "✅", "durdu": "⏸️"}.get(b["durum"], "•")
+            c1.write(f"{durum} {datetime.fromtimestamp(b['olusturma']):%d.%m.%Y %H:%M} · {b['biten']}/{b['toplam']} dosya, {b['hatali']} hata")
+            if c2.button("Göster", key=f"is_goster_{b['is_id']}", use_container_width=True, disabled=b["is_id"] == st.session_state.get('aktif_is')):
+                is_bagla(b["is_id"], b["oturum"]); st.rerun()
+            # Devam: bitmiş dosyalar atlanır, hatalılar yeniden denenir
+            if not calisiyor and (b["biten"] < b["toplam"]) and c3.button("Devam Et", key=f"is_devam_{b['is_id']}", use_container_width=True):
+                motor.baslat(b["is_id"]); is_bagla(b["is_id"], b["oturum"]); st.rerun()
+
+    if st.session_state.get('aktif_is'):
+        is_sonuclarini_al()
+        canli = is_motoru_getir().calisiyor_mu(st.session_state['aktif_is'])
+        st.fragment(is_durumu, run_every=2 if canli else None)(canli)
 
     # --- KONTROL & DÜZELTME PANELI ---
     if 'analiz_sonuclari' in st.session_state and st.session_state['analiz_sonuclari']:
         veriler = st.session_state['analiz_sonuclari']
         temiz_veriler = [v for v in veriler if isinstance(v, dict)]
+        mukerrerler = mukerrerleri_bul(secili, temiz_veriler)
         liste_opsiyonlari = []
         for i, v in enumerate(temiz_veriler):
             basarili, mesaj = veri_saglamasi(v)
-            ikon = "✅" if basarili else "⚠️"
+            ikon = ("🔁" if mukerrerler[i][0] == KESIN else "❔") if mukerrerler[i] else ("✅" if basarili else "⚠️")
             liste_opsiyonlari.append(f"{ikon} {i+1}. {v.get('isyeri_adi', 'Bilinmiyor')} ({v.get('toplam_tutar','0')} TL)")
 
         if liste_opsiyonlari:
             secilen_etiket = st.selectbox("Düzenlenecek Fişi Seçin:", liste_opsiyonlari)
             secilen_index = liste_opsiyonlari.index(secilen_etiket)
             secili_veri = temiz_veriler[secilen_index]
+            if mukerrerler[secilen_index]: st.warning(mukerrerler[secilen_index][1])
 
             col_sol, col_sag = st.columns([1, 1])
             with col_sol:
                 with st.expander("📸 Belge Görselini Göster", expanded=False):
-                    if "_ham_dosya" in secili_veri:
+                    depo = is_deposu_getir()
+                    if depo.var_mi(secili_veri.get("_blob")):
                         if secili_veri["_dosya_turu"] == "pdf": st.info("📄 PDF Dosyası")
-                        else: st.image(secili_veri["_ham_dosya"], caption="Belge", use_column_width=True)
+                        else: st.image(depo.yol(secili_veri["_blob"]), caption="Belge", use_column_width=True)
                     else: st.info("Görsel yok")
 
             with col_sag:
@@ -385,38 +461,85 @@ with t1:
                             "isyeri_adi": y_isyeri, "tarih": y_tarih, 
                             "toplam_tutar": y_tutar, "toplam_kdv": y_kdv, "kategori": y_kat
                         })
+                        st.session_state['veri_surumu'] += 1
                         st.success("Güncellendi!"); time.sleep(0.5); st.rerun()
 
         st.divider()
+        # Kesin mükerrerler (aynı QR / aynı fiş) varsayılan olarak kaydedilmez; olası olanlar sadece uyarılır
+        kesin_sayisi = sum(1 for m in mukerrerler if m and m[0] == KESIN)
+        olasi_sayisi = sum(1 for m in mukerrerler if m and m[0] == OLASI)
+        mukerrerleri_kaydet = False
+        if olasi_sayisi: st.info(f"❔ {olasi_sayisi} belge kayıtlı bir belgeye benziyor (listede ❔). Kontrol edin; bunlar kaydedilir.")
+        if kesin_sayisi:
+            st.warning(f"🔁 {kesin_sayisi} belge daha önce kaydedilmiş (aynı QR ya da aynı fiş). Bunlar varsayılan olarak kaydedilmez.")
+            mukerrerleri_kaydet = st.checkbox("Kesin mükerrerleri de kaydet")
         if st.button("💾 VERİTABANINA KAYDET (ONAYLA)", type="primary", use_container_width=True):
-            if sheete_kaydet(temiz_veriler, secili):
+            kaydedilecek = [v for v, m in zip(temiz_veriler, mukerrerler) if mukerrerleri_kaydet or not m or m[0] != KESIN]
+            if sheete_kaydet(kaydedilecek, secili):
+                defter_deposu_getir().eskit(secili) # Raporlar yeni satırları hemen çeksin
+                mukerrer_indeksi_getir().ekle(secili, kaydedilecek)
+                vkn_hafizasi_getir().ogren(kaydedilecek) # Düzeltilmiş işyeri/kategori sonraki QR'larda kullanılır
+                st.session_state['veri_surumu'] += 1
                 st.balloons()
                 st.success("Tüm veriler Google Sheets'e işlendi!")
             else: st.error("Kayıt hatası!")
 
-        dt = pd.DataFrame(temiz_veriler)
-        st.dataframe(dt.drop(columns=["_ham_dosya", "_dosya_turu", "qr_data", "qr_icerigi"], errors='ignore'), use_container_width=True)
+        dt = pd.DataFrame(temiz_veriler).drop(columns=["_blob", "_dosya_turu", "qr_data", "qr_icerigi", "phash", "vkn", "ettn", "qr_hizli"], errors='ignore')
+        st.dataframe(dt, use_container_width=True)
+
+        # DIŞA AKTARIM: Sadece indir'e basınca üretilir (ayrı thread), veri sürümü değişene kadar diskte saklanır
+        # Dosyalar işin klasöründen okunur, üretilen dosyalar bu oturumun klasörüne yazılır (başka oturumla paylaşılmaz)
+        depo = is_deposu_getir()
+        surum = st.session_state['veri_surumu']
+        hk = dict(st.session_state['hesap_kodlari'])
+        disa_dizin = os.path.join(blob_deposu_getir().dizin, "disa_aktarim")
+        bicim = st.radio("Tablo biçimi", list(disa_aktarim.TABLO_BICIMLERI), horizontal=True, help="Hafif Excel / CSV büyük listelerde daha hızlı ve az bellekle yazılır")
+        uzanti = disa_aktarim.TABLO_BICIMLERI[bicim]
+        kayitlar = list(temiz_veriler)
+        yevmiye, denge_raporu = yevmiye_getir(dt, hk)
+        if not denge_raporu.empty:
+            with st.expander(f"⚖️ {len(denge_raporu)} belgede borç/alacak tutmuyor"):
+                st.dataframe(denge_raporu, use_container_width=True)
+
+        def zip_uret():
+            return disa_aktarim.dosya_oku(disa_aktarim.onbellekli_uret(disa_dizin, surum, "arsiv.zip", lambda yol: disa_aktarim.arsiv_olustur(kayitlar, depo, yol, yeni_dosya_adi_olustur)))
+        def liste_uret():
+            return disa_aktarim.dosya_oku(disa_aktarim.onbellekli_uret(disa_dizin, surum, f"liste_{bicim}.{uzanti}", lambda yol: disa_aktarim.tablo_yaz(dt, yol, bicim)))
+        def fis_uret():
+            ad = f"muhasebe_{hashlib.md5(json.dumps(hk, sort_keys=True).encode()).hexdigest()[:8]}_{bicim}.{uzanti}"
+            return disa_aktarim.dosya_oku(disa_aktarim.onbellekli_uret(disa_dizin, surum, ad, lambda yol: disa_aktarim.tablo_yaz(yevmiye, yol, bicim)))
 
         c1, c2, c3 = st.columns(3)
-        with c1: st.download_button("📦 ZIP İndir", arsiv_olustur(temiz_veriler), "arsiv.zip", "application/zip", use_container_width=True)
-        with c2: 
-            buf1 = io.BytesIO()
-            with pd.ExcelWriter(buf1, engine='openpyxl') as w: 
-                dt.drop(columns=["_ham_dosya", "_dosya_turu", "qr_data", "qr_icerigi"], errors='ignore').to_excel(w, index=False)
-            st.download_button("📥 Excel İndir", buf1.getvalue(), "liste.xlsx", use_container_width=True)
-        with c3:
-            buf2 = io.BytesIO()
-            with pd.ExcelWriter(buf2, engine='openpyxl') as w: muhasebe_fisne_cevir(dt).to_excel(w, index=False)
-            st.download_button("📥 Fiş Kaydı İndir", buf2.getvalue(), "muhasebe.xlsx", type="primary", use_container_width=True)
+        with c1: st.download_button("📦 ZIP İndir", zip_uret, "arsiv.zip", "application/zip", use_container_width=True)
+        with c2: st.download_button(f"📥 {bicim} İndir", liste_uret, f"liste.{uzanti}", disa_aktarim.MIME[uzanti], use_container_width=True)
+        with c3: st.download_button("📥 Fiş Kaydı İndir", fis_uret, f"muhasebe.{uzanti}", disa_aktarim.MIME[uzanti], type="primary", use_container_width=True)
 
 with t2:
     st.header("Yönetim Paneli")
-    if st.button("🔄 Güncelle"): st.rerun()
-    df = sheetten_veri_cek(secili)
-    if not df.empty:
-        cols = {tr_temizle(c): c for c in df.columns}
-        c_t = next((cols[k] for k in cols if "tutar" in k), None)
-        if c_t: st.metric("Toplam", f"{df[c_t].sum():,.2f} ₺"); st.dataframe(df)
+    # Raporlar yerel defterden okunur; Sheets'ten sadece yeni satırlar, en fazla 30 sn'de bir çekilir
+    defter = defter_deposu_getir()
+    zorla = st.button("🔄 Güncelle")
+    if not defteri_senkronla(secili, zorla=zorla): st.caption("⚠️ Sheets'e ulaşılamadı, yerel kopya gösteriliyor.")
+    elif defter.cekiliyor_mu(secili): st.caption("⏳ Defter Sheets'ten baştan çekiliyor, şimdilik yerel kopya gösteriliyor.")
+
+    ilk, son = defter.tarih_araligi(secili)
+    bas, bit = None, None
+    if ilk:
+        aralik = st.date_input("Tarih Aralığı", (date.fromisoformat(ilk), date.fromisoformat(son)))
+        # Tam aralık seçiliyse filtre yok (tarihi okunamayan satırlar da toplama girsin)
+        if isinstance(aralik, tuple) and len(aralik) == 2 and aralik != (date.fromisoformat(ilk), date.fromisoformat(son)): bas, bit = aralik
+    ozet = defter.ozet(secili, bas, bit)
+    if ozet["adet"]:
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Toplam", f"{ozet['tutar']:,.2f} ₺"); m2.metric("KDV", f"{ozet['kdv']:,.2f} ₺"); m3.metric("Belge", ozet["adet"])
+        import plotly.express as px
+        g1, g2 = st.columns(2)
+        kat = defter.kategori_dagilimi(secili, bas, bit)
+        with g1: st.plotly_chart(px.pie(kat, names="kategori", values="tutar", title="Kategori Dağılımı"), use_container_width=True)
+        aylik = defter.aylik_dagilim(secili, bas, bit)
+        with g2:
+            if not aylik.empty: st.plotly_chart(px.bar(aylik, x="ay", y=["tutar", "kdv"], title="Aylık Harcama", barmode="group"), use_container_width=True)
+        st.dataframe(defter.kayitlar(secili, bas, bit), use_container_width=True)
     else: st.info("Veri yok.")
 
 with t3:
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# --- BLOB DEPOSU (DİSK) ---
+# Ham dosyalar session_state yerine diskte, içerik özetiyle (sha256) saklanır.
+# Kayıtlar sadece özeti ("_blob") taşır; ZIP / önizleme dosyayı gerektiğinde diskten okur.
+# Her oturumun kendi klasörü vardır; oturum temizlenince ya da uzun süre dokunulmayınca silinir.
+
+TEMIZLIK_ARALIGI = 3600 # Terk edilmiş oturum taraması en fazla bu sıklıkta (sn)
+_son_temizlik = {}
+_temizlik_kilidi = threading.Lock()
+
+class BlobDeposu:
+    def __init__(self, kok, oturum):
+        self.dizin = os.path.join(kok, oturum)
+        os.makedirs(self.dizin, exist_ok=True)
+        os.utime(self.dizin) # Son erişim: terk edilmiş oturum temizliği buna bakar
+
+    def yol(self, anahtar):
+        return os.path.join(self.dizin, anahtar)
+
+    def koy(self, veri):
+        anahtar = hashlib.sha256(veri).hexdigest()
+        hedef = self.yol(anahtar)
+        if not os.path.exists(hedef):
+            # Önce geçici dosyaya yazılır, sonra atomik taşınır: yarım dosya okunmaz
+            fd, gecici = tempfile.mkstemp(dir=self.dizin, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f: f.write(veri)
+            os.replace(gecici, hedef)
+        return anahtar
+
+    def var_mi(self, anahtar):
+        return bool(anahtar) and os.path.exists(self.yol(anahtar))
+
+    def oku(self, anahtar):
+        with open(self.yol(anahtar), "rb") as f: return f.read()
+
+    def temizle(self):
+        shutil.rmtree(self.dizin, ignore_errors=True)
+        os.makedirs(self.dizin, exist_ok=True)
+
+def eski_oturumlari_temizle(kok, max_yas=24 * 3600):
+    if not os.path.isdir(kok): return
+    sinir = time.time() - max_yas
+    for ad in os.listdir(kok):
+        yol = os.path.join(kok, ad)
+        try:
+            if os.path.isdir(yol) and os.path.getmtime(yol) < sinir: shutil.rmtree(yol, ignore_errors=True)
+        except OSError: pass
+
+def ara_sira_temizle(kok, aralik=TEMIZLIK_ARALIGI):
+    # Her çağrıda değil, kök başına `aralik` saniyede bir: tarama arka planda, çağıran beklemez
+    with _temizlik_kilidi:
+        if time.time() - _son_temizlik.get(kok, 0) < aralik: return False
+        _son_temizlik[kok] = time.time()
+    threading.Thread(target=eski_oturumlari_temizle, args=(kok,), name="blob-temizlik", daemon=True).start()
+    return True
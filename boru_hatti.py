@@ -0,0 +1,90 @@
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import havuz_isci
+from olcum import OLCUM
+
+# --- İKİ AŞAMALI BORU HATTI ---
+# 1. aşama (CPU): QR / decode / yeniden boyutlandırma -> çekirdek sayısı kadar süreç (GIL yok)
+# 2. aşama (AĞ): Gemini çağrıları -> "İşlem Hızı" kadar eşzamanlı işçi
+# Aradaki kuyruk sınırlı: hazırlanmış ama gönderilmemiş yük birikmez, RAM sabit kalır.
+
+ISLEMCI = os.cpu_count() or 2
+_havuz = None
+_havuz_kilit = threading.Lock()
+
+def islem_havuzu():
+    # Süreç genelinde tek havuz; tüm oturumlar paylaşır. forkserver: Streamlit thread'leri fork'lanmaz, işçiler
+    # havuz_isci'yi yüklemiş sunucudan çatallanır ve __main__'i (app.py) yeniden çalıştırmaz.
+    # forkserver olmayan platformda (Windows) spawn işçileri app.py'yi yeniden yürütürdü: ön işleme thread havuzunda
+    global _havuz
+    with _havuz_kilit:
+        if _havuz is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                ana = getattr(sys.modules.get("__main__"), "__file__", None)
+                if ana: os.environ[havuz_isci.ANA_DOSYA] = os.path.normpath(os.path.abspath(ana)) # forkserver açılırken okunur
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload(["havuz_isci", "on_isleme"]) # numpy/PIL bir kez yüklenir, çocuklar kopyalar
+                _havuz = ProcessPoolExecutor(max_workers=ISLEMCI, mp_context=ctx, initializer=havuz_isci.baslat)
+            else: _havuz = ThreadPoolExecutor(max_workers=ISLEMCI, thread_name_prefix="on-isleme", initializer=havuz_isci.baslat)
+        return _havuz
+
+async def havuzu_isit():
+    # İşçileri önceden başlatır (ilk dosyalar süreç açılışını beklemesin); event loop'u bloklamaz
+    loop = asyncio.get_running_loop()
+    havuz = islem_havuzu()
+    await asyncio.gather(*[loop.run_in_executor(havuz, os.getpid) for _ in range(ISLEMCI)])
+
+def _havuzu_sifirla():
+    # Bir işçi süreç çökerse (ör. OOM) havuz kalıcı bozulur; sonraki çağrı yenisini kurar
+    global _havuz
+    with _havuz_kilit:
+        if _havuz is not None: _havuz.shutdown(wait=False, cancel_futures=True)
+        _havuz = None
+
+async def boru_hatti_calistir(isler, hazirla_fn, hazirla_argumanlari, ag_asamasi, eszamanlilik, kuyruk_boyu=None):
+    # hazirla_fn(*hazirla_argumanlari(is_)) süreç havuzunda çalışır (modül seviyesinde, pickle edilebilir olmalı).
+    # await ag_asamasi(is_, hazir) ağ aşamasıdır; hazırlık hata verdiyse hazir bir Exception nesnesidir.
+    loop = asyncio.get_running_loop()
+    havuz = islem_havuzu()
+    await havuzu_isit()
+    isci_sayisi = max(1, min(eszamanlilik, len(isler)))
+    kuyruk = asyncio.Queue(maxsize=kuyruk_boyu or isci_sayisi * 2)
+    hazirlik_siniri = asyncio.Semaphore(ISLEMCI)
+
+    async def hazirla(is_):
+        try:
+            t0 = time.perf_counter()
+            try: hazir = await loop.run_in_executor(havuz, hazirla_fn, *hazirla_argumanlari(is_))
+            except BrokenProcessPool as e: _havuzu_sifirla(); hazir = e
+            except Exception as e: hazir = e
+            OLCUM.sure_ekle("hazirlik_saniye", time.perf_counter() - t0) # Havuz bekleme + süreçler arası aktarım dahil
+            if not isinstance(hazir, Exception): OLCUM.hazir_olcumlerini_ekle(hazir)
+            await kuyruk.put((is_, hazir, t0, time.perf_counter())) # Kuyruk doluysa burada bekler (geri basınç)
+        finally: hazirlik_siniri.release()
+
+    async def uretici():
+        gorevler = []
+        for is_ in isler:
+            await hazirlik_siniri.acquire()
+            gorevler.append(asyncio.create_task(hazirla(is_)))
+        await asyncio.gather(*gorevler)
+        for _ in range(isci_sayisi): await kuyruk.put(None)
+
+    async def isci():
+        while (oge := await kuyruk.get()) is not None:
+            is_, hazir, t_bas, t_kuyruk = oge
+            t_ag = time.perf_counter()
+            OLCUM.sure_ekle("kuyruk_bekleme_saniye", t_ag - t_kuyruk)
+            try: await ag_asamasi(is_, hazir)
+            except Exception: pass # ag_asamasi hatayı kendisi raporlar; işçi ölürse kuyruk tıkanır
+            OLCUM.sure_ekle("ag_asamasi_saniye", time.perf_counter() - t_ag)
+            OLCUM.sure_ekle("dosya_saniye", time.perf_counter() - t_bas) # Uçtan uca: hazırlık başı -> sonuç
+
+    await asyncio.gather(uretici(), *[isci() for _ in range(isci_sayisi)])
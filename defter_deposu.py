@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from muhasebe import tutar_serisine_cevir
+
+# --- YEREL DEFTER DEPOSU (SQLITE, TİPLİ KOLONLAR) ---
+# Raporlar sekmesi Sheets'i her açılışta baştan okumaz: müşteri sayfası buraya artımlı
+# (satır sayısına göre) çekilir, tutarlar/tarihler bir kez ayrıştırılıp REAL / ISO tarih olarak saklanır.
+# Toplamlar, kategori ve aylık kırılımlar doğrudan SQL ile hesaplanır.
+# Baştan çekme (ilk senkron, saatlik tam yenileme) sayfanın çizimini bekletmez: arka planda yapılır,
+# o sırada sorgular yerel kopyadan cevaplanır.
+
+KOLONLAR = {"dosyaadi": "dosya_adi", "isyeri": "isyeri", "fisno": "fis_no", "tarih": "tarih_ham", "kategori": "kategori",
+            "tutar": "tutar", "kdv": "kdv", "zaman": "zaman", "durum": "durum", "qr": "qr"}
+
+def tr_temizle(text):
+    tr_map = {"ı": "i", "ğ": "g", "ü": "u", "ş": "s", "ö": "o", "ç": "c", "İ": "i", "Ğ": "g", "Ü": "u", "Ş": "s", "Ö": "o", "Ç": "c"}
+    for k, v in tr_map.items(): text = str(text).replace(k, v)
+    return text.lower().strip().replace(" ", "").replace("_", "")
+
+def tarih_serisine_cevir(seri):
+    # "GG.AA.YYYY" (/, - ayırıcıları da) -> "YYYY-AA-GG"; ISO gelirse olduğu gibi; okunamayan -> None
+    s = seri.astype("string").str.strip()
+    gun_ay = pd.to_datetime(s.str.replace("/", ".", regex=False).str.replace("-", ".", regex=False), format="%d.%m.%Y", errors="coerce")
+    iso = pd.to_datetime(s, format="%Y-%m-%d", errors="coerce")
+    t = gun_ay.fillna(iso)
+    return t.dt.strftime("%Y-%m-%d").where(t.notna(), None)
+
+class DefterDeposu:
+    def __init__(self, yol, min_aralik=30, tam_yenileme=3600):
+        os.makedirs(os.path.dirname(os.path.abspath(yol)), exist_ok=True)
+        self.min_aralik = min_aralik # Bu süre dolmadan Sheets'e tekrar gidilmez (sekme her rerun'da çizilir)
+        self.tam_yenileme = tam_yenileme # Silinen/düzeltilen satırlar için arada bir baştan çekilir
+        self._kilit = threading.Lock()
+        self._cekiliyor = set() # Arka planda baştan çekilen müşteriler
+        self._son_deneme = {} # musteri -> son baştan çekme denemesi (başarısızsa min_aralik dolmadan tekrar denenmez)
+        self._hatalar = {} # musteri -> son baştan çekmenin hatası
+        self._db = sqlite3.connect(yol, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS defter (
+                musteri TEXT NOT NULL, satir INTEGER NOT NULL, dosya_adi TEXT, isyeri TEXT, fis_no TEXT,
+                tarih TEXT, tarih_ham TEXT, kategori TEXT, tutar REAL NOT NULL DEFAULT 0, kdv REAL NOT NULL DEFAULT 0,
+                zaman TEXT, durum TEXT, qr TEXT, PRIMARY KEY (musteri, satir));
+            CREATE INDEX IF NOT EXISTS ix_defter_tarih ON defter(musteri, tarih);
+            CREATE TABLE IF NOT EXISTS senkron (
+                musteri TEXT PRIMARY KEY, satir_sayisi INTEGER NOT NULL, baslik TEXT NOT NULL,
+                son_senkron REAL NOT NULL, son_tam REAL NOT NULL);
+        """)
+        self._db.commit()
+
+    # --- SENKRON ---
+    def _durum(self, musteri):
+        return self._db.execute("SELECT satir_sayisi, baslik, son_senkron, son_tam FROM senkron WHERE musteri=?", (musteri,)).fetchone()
+
+    def eskit(self, musteri):
+        # Sheets'e yeni yazıldı: bir sonraki senkronla() beklemeden çeksin
+        with self._kilit:
+            self._db.execute("UPDATE senkron SET son_senkron=0 WHERE musteri=?", (musteri,)); self._db.commit()
+
+    def senkronla(self, musteri, sheets, zorla=False):
+        # sheets: SheetsSenkron. Dönüş: eklenen satır sayısı (baştan çekme arka plana verildiyse 0)
+        simdi = time.time()
+        with self._kilit:
+            if musteri in self._cekiliyor: return 0
+            durum = self._durum(musteri)
+        if durum and not zorla and simdi - durum[2] < self.min_aralik: return 0
+        if durum is None or simdi - durum[3] > self.tam_yenileme:
+            self._arka_planda_tam_cek(musteri, sheets)
+            return 0
+        return self._cek(musteri, sheets, durum)
+
+    def cekiliyor_mu(self, musteri):
+        return musteri in self._cekiliyor
+
+    def son_hata(self, musteri):
+        return self._hatalar.get(musteri)
+
+    def _arka_planda_tam_cek(self, musteri, sheets):
+        with self._kilit:
+            if musteri in self._cekiliyor or time.time() - self._son_deneme.get(musteri, 0) < self.min_aralik: return
+            self._cekiliyor.add(musteri); self._son_deneme[musteri] = time.time()
+
+        def cek():
+            try:
+                self._cek(musteri, sheets, None)
+                self._hatalar.pop(musteri, None)
+            except Exception as e:
+                self._hatalar[musteri] = str(e) or type(e).__name__
+                sheets.gecersiz_kil(musteri)
+            finally:
+                with self._kilit: self._cekiliyor.discard(musteri)
+        threading.Thread(target=cek, name="defter-tam", daemon=True).start()
+
+    def _cek(self, musteri, sheets, durum):
+        # durum None: baştan (silinen/düzeltilen satırlar dahil), değilse bilinen satırdan sonrası
+        simdi = time.time()
+        tam = durum is None
+        bilinen = 0 if tam else durum[0]
+        baslik, satirlar = sheets.yeni_satirlar(musteri, bilinen, None if tam else json.loads(durum[1]))
+        kayitlar = self._cevir(musteri, baslik, satirlar, bilinen)
+        with self._kilit:
+            if tam: self._db.execute("DELETE FROM defter WHERE musteri=?", (musteri,))
+            if not kayitlar.empty:
+                self._db.executemany(f"INSERT OR REPLACE INTO defter ({','.join(kayitlar.columns)}) VALUES ({','.join('?' * len(kayitlar.columns))})",
+                                     kayitlar.itertuples(index=False, name=None))
+            self._db.execute("INSERT OR REPLACE INTO senkron VALUES (?, ?, ?, ?, ?)",
+                             (musteri, bilinen + len(satirlar), json.dumps(baslik, ensure_ascii=False), simdi, simdi if tam else durum[3]))
+            self._db.commit()
+        return len(satirlar)
+
+    @staticmethod
+    def _cevir(musteri, baslik, satirlar, bilinen):
+        if not baslik or not satirlar: return pd.DataFrame()
+        df = pd.DataFrame([(list(r) + [""] * len(baslik))[:len(baslik)] for r in satirlar], columns=range(len(baslik)))
+        cikti = pd.DataFrame({"musteri": musteri, "satir": range(bilinen + 1, bilinen + len(satirlar) + 1)})
+        for i, ad in enumerate(baslik):
+            hedef = KOLONLAR.get(tr_temizle(ad))
+            if hedef and hedef not in cikti: cikti[hedef] = df[i].to_numpy()
+        for k in KOLONLAR.values():
+            if k not in cikti: cikti[k] = None
+        cikti["tutar"] = tutar_serisine_cevir(cikti["tutar"])
+        cikti["kdv"] = tutar_serisine_cevir(cikti["kdv"])
+        cikti["tarih"] = tarih_serisine_cevir(cikti["tarih_ham"]).to_numpy()
+        cikti = cikti.astype(object).where(cikti.notna(), None)
+        return cikti
+
+    # --- SORGULAR ---
+    def _filtre(self, musteri, bas, son):
+        kosul, param = ["musteri=?"], [musteri]
+        if bas: kosul.append("defter.tarih>=?"); param.append(str(bas))
+        if son: kosul.append("defter.tarih<=?"); param.append(str(son))
+        return " AND ".join(kosul), param
+
+    def _sorgu(self, sql, param):
+        with self._kilit: return pd.read_sql_query(sql, self._db, params=param)
+
+    def son_satir(self, musteri):
+        with self._kilit: return self._db.execute("SELECT COALESCE(MAX(satir), 0) FROM defter WHERE musteri=?", (musteri,)).fetchone()[0]
+
+    def son_tam(self, musteri):
+        # Son tam (baştan) çekimin zamanı: değiştiyse satır numaraları kaymış / satırlar silinmiş olabilir
+        with self._kilit:
+            s = self._db.execute("SELECT son_tam FROM senkron WHERE musteri=?", (musteri,)).fetchone()
+        return s[0] if s else None
+
+    def satirlar_sonrasi(self, musteri, satir):
+        # Mükerrer indeksi için: (satir, isyeri, fis_no, tarih, tutar)
+        with self._kilit:
+            return self._db.execute("SELECT satir, isyeri, fis_no, tarih, tutar FROM defter WHERE musteri=? AND satir>? ORDER BY satir", (musteri, satir)).fetchall()
+
+    def tarih_araligi(self, musteri):
+        with self._kilit: return self._db.execute("SELECT MIN(tarih), MAX(tarih) FROM defter WHERE musteri=? AND tarih IS NOT NULL", (musteri,)).fetchone()
+
+    def ozet(self, musteri, bas=None, son=None):
+        kosul, param = self._filtre(musteri, bas, son)
+        with self._kilit:
+            adet, tutar, kdv = self._db.execute(f"SELECT COUNT(*), COALESCE(SUM(tutar), 0), COALESCE(SUM(kdv), 0) FROM defter WHERE {kosul}", param).fetchone()
+        return {"adet": adet, "tutar": tutar, "kdv": kdv}
+
+    def kategori_dagilimi(self, musteri, bas=None, son=None):
+        kosul, param = self._filtre(musteri, bas, son)
+        return self._sorgu(f"SELECT COALESCE(NULLIF(kategori, ''), 'Diğer') AS kategori, SUM(tutar) AS tutar, COUNT(*) AS adet FROM defter WHERE {kosul} GROUP BY 1 ORDER BY 2 DESC", param)
+
+    def aylik_dagilim(self, musteri, bas=None, son=None):
+        kosul, param = self._filtre(musteri, bas, son)
+        return self._sorgu(f"SELECT substr(tarih, 1, 7) AS ay, SUM(tutar) AS tutar, SUM(kdv) AS kdv FROM defter WHERE {kosul} AND defter.tarih IS NOT NULL GROUP BY 1 ORDER BY 1", param)
+
+    def kayitlar(self, musteri, bas=None, son=None, limit=500):
+        kosul, param = self._filtre(musteri, bas, son)
+        return self._sorgu(f"""SELECT dosya_adi AS "Dosya Adı", isyeri AS "İşyeri", fis_no AS "Fiş No", tarih_ham AS "Tarih", kategori AS "Kategori",
+            tutar AS "Tutar", kdv AS "KDV", zaman AS "Zaman", durum AS "Durum", qr AS "QR" FROM defter WHERE {kosul}
+            ORDER BY defter.tarih DESC, defter.satir DESC LIMIT ?""", param + [limit]) # "defter.": takma ad "Tarih" ham kolonu gölgelemesin
@@ -0,0 +1,112 @@
+"""Açılış / rerun benchmark'ı: import süreleri ve ilk çizime kadar geçen süre.
+
+Kullanım:
+    python dev/bench_baslangic.py --soguk 3 --rerun 10 --json baslangic.json
+
+1) Import süreleri: app.py'nin modül seviyesindeki import'ları (her açılışta ödenen) ve fonksiyon içindeki
+   ertelenmiş import'lar (ilk kullanımda ödenen) ayrı bir süreçte `python -X importtime` ile ölçülür.
+2) İlk çizim: her soğuk açılış yeni bir süreçte Streamlit AppTest ile koşar. Giriş ekranı, girişten sonraki
+   ilk sayfa ve ardışık rerun'lar (kullanıcı tıklaması) ölçülür. Veri dizini geçicidir, Gemini adresi
+   erişilemez bir yerel porta yönlenir: uzak çağrı bekleyen bir adım varsa süreye açıkça yansır.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(KOK, "app.py")
+AGIR = ("gspread", "oauth2client", "plotly", "openpyxl", "analiz", "on_isleme", "pypdf", "pyzbar")
+
+def app_importlari():
+    # (modül seviyesinde, fonksiyon içinde) import edilen kök modül adları
+    agac = ast.parse(open(APP, encoding="utf-8").read())
+    ust, ic = [], []
+    for dugum in ast.walk(agac):
+        if isinstance(dugum, ast.Import): adlar = [a.name for a in dugum.names]
+        elif isinstance(dugum, ast.ImportFrom) and dugum.module: adlar = [dugum.module]
+        else: continue
+        (ust if dugum in agac.body else ic).extend(adlar)
+    return list(dict.fromkeys(ust)), [a for a in dict.fromkeys(ic) if a not in ust]
+
+def import_sureleri(moduller):
+    # -X importtime: her modül için kümülatif süre (µs); sadece istenen modüllerin satırları alınır
+    kod = "\n".join(f"import {m}" for m in moduller) # app.py sırasıyla: ortak alt modüller ilk import edene yazılır
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", kod], cwd=KOK, capture_output=True, text=True)
+    sureler = {}
+    for satir in p.stderr.splitlines():
+        if not satir.startswith("import time:") or "|" not in satir: continue
+        try: _, kumulatif, ad = [p.strip() for p in satir.split(":", 1)[1].split("|")]
+        except ValueError: continue
+        if ad in moduller and ad not in sureler: sureler[ad] = int(kumulatif) / 1e6
+    return sureler
+
+def cocuk(rerun):
+    # Yeni bir süreçte: streamlit import, giriş ekranı, ilk sayfa, rerun'lar
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t_st = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.secrets["GEMINI_API_KEY"] = "bench"
+    at.run()
+    t_giris = time.perf_counter()
+    giriste = sorted(m for m in AGIR if m in sys.modules)
+    at.session_state["giris_yapildi"] = True
+    at.run()
+    t_ilk = time.perf_counter()
+    if at.exception: raise SystemExit(f"Uygulama hata verdi: {at.exception}")
+    ilkte = sorted(m for m in AGIR if m in sys.modules)
+    rerunlar = []
+    for _ in range(rerun):
+        t = time.perf_counter(); at.run(); rerunlar.append(time.perf_counter() - t)
+    print(json.dumps({"streamlit_import_sn": t_st - t0, "giris_ekrani_sn": t_giris - t_st, "ilk_sayfa_sn": t_ilk - t_giris,
+                      "toplam_ilk_cizim_sn": t_ilk - t0, "rerun_sn": rerunlar, "giriste_yuklu": giriste, "ilk_sayfada_yuklu": ilkte}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--soguk", type=int, default=3, help="Soğuk açılış sayısı (her biri yeni süreç)")
+    ap.add_argument("--rerun", type=int, default=10, help="Açılış başına ölçülen rerun")
+    ap.add_argument("--json", help="Sonuçları bu dosyaya da yaz")
+    ap.add_argument("--cocuk", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.cocuk: return cocuk(args.rerun)
+
+    ust, ic = app_importlari()
+    sureler = import_sureleri(ust + ic)
+    print("Import süreleri (kümülatif, yeni süreçte):")
+    for baslik, liste in (("modül seviyesi (ilk açılış)", ust), ("fonksiyon içi (ilk kullanım)", ic)):
+        toplam = sum(sureler.get(m, 0) for m in liste)
+        print(f"  {baslik}: {toplam:.3f} sn")
+        for m in sorted(liste, key=lambda m: -sureler.get(m, 0))[:8]: print(f"    {m:<32} {sureler.get(m, 0):.3f}")
+
+    acilislar = []
+    for i in range(args.soguk):
+        with tempfile.TemporaryDirectory() as veri:
+            ortam = dict(os.environ, MUHABESE_VERI_DIZINI=veri, GEMINI_TEMEL_URL="http://127.0.0.1:9")
+            p = subprocess.run([sys.executable, os.path.abspath(__file__), "--cocuk", "--rerun", str(args.rerun)],
+                               cwd=KOK, env=ortam, capture_output=True, text=True)
+        satir = next((s for s in reversed(p.stdout.splitlines()) if s.startswith("{")), None)
+        if p.returncode or not satir: raise SystemExit(f"Ölçüm süreci başarısız:\n{p.stdout[-2000:]}\n{p.stderr[-2000:]}")
+        acilislar.append(json.loads(satir))
+
+    ortanca = lambda ad: statistics.median(a[ad] for a in acilislar)
+    rerunlar = sorted(r for a in acilislar for r in a["rerun_sn"])
+    print(f"\nİlk çizim ({args.soguk} soğuk açılış, ortanca):")
+    print(f"  streamlit import       {ortanca('streamlit_import_sn'):.3f} sn")
+    print(f"  giriş ekranı           {ortanca('giris_ekrani_sn'):.3f} sn")
+    print(f"  girişten sonra ilk sayfa {ortanca('ilk_sayfa_sn'):.3f} sn")
+    print(f"  toplam                 {ortanca('toplam_ilk_cizim_sn'):.3f} sn")
+    if rerunlar:
+        print(f"Rerun ({len(rerunlar)} adet): p50 {rerunlar[len(rerunlar) // 2]:.3f} sn, p95 {rerunlar[min(len(rerunlar) - 1, int(0.95 * len(rerunlar)))]:.3f} sn")
+    print(f"Giriş ekranında yüklü ağır modüller: {', '.join(acilislar[-1]['giriste_yuklu']) or '-'}")
+    print(f"İlk sayfada yüklü ağır modüller: {', '.join(acilislar[-1]['ilk_sayfada_yuklu']) or '-'}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump({"import": sureler, "acilislar": acilislar}, f, ensure_ascii=False, indent=1)
+
+if __name__ == "__main__":
+    main()
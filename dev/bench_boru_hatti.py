@@ -0,0 +1,147 @@
+"""Boru hattı benchmark'ı: fikstür korpusu sahte Gemini sunucusuna karşı, farklı "İşlem Hızı" değerleriyle.
+
+Kullanım:
+    python dev/bench_boru_hatti.py klasor/ --eszamanlilik 1,5,10,20 --gecikme 0.8 --rpm 300
+
+Klasör verilmezse sentetik fiş görselleri üretilir. Sahte sunucu gerçek API gibi
+gecikir (görsel sayısıyla artan, ±%20 oynak) ve --rpm aşılınca 429 + Retry-After döner.
+Dosyalar uygulamanın kendi hattından geçer (analiz.toplu_analiz: süreç havuzunda ön işleme, GeminiMotoru,
+--paketle ile Paketleyici, gerçek istemler). Her eşzamanlılık için okunan / hatalı dosya, dosya/sn (sadece
+okunanlar), dosya başı p50/p95 gecikme, istek / 429 / yeniden deneme sayıları ve aşama süreleri (olcum.OLCUM) raporlanır.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MIME = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".pdf": "application/pdf"}
+
+def sahte_sunucu(gecikme, rpm):
+    istekler = deque()
+    kilit = threading.Lock()
+
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_POST(self):
+            govde = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with kilit:
+                simdi = time.monotonic()
+                while istekler and simdi - istekler[0] > 60: istekler.popleft()
+                asildi = rpm and len(istekler) >= rpm
+                if not asildi: istekler.append(simdi)
+            if asildi:
+                self.send_response(429); self.send_header("Retry-After", "1"); self.send_header("Content-Length", "0"); self.end_headers(); return
+            parts = govde["contents"][0]["parts"]
+            adet = sum(1 for p in parts if "inline_data" in p)
+            time.sleep(gecikme * (1 + 0.15 * (adet - 1)) * random.uniform(0.8, 1.2))
+            fis = {"isyeri_adi": "TEST A.Ş.", "fiş_no": "0001", "tarih": "01.02.2024", "kategori": "Gıda", "toplam_tutar": "100.00", "toplam_kdv": "10.00"}
+            metin = json.dumps([dict(fis, parca=i) for i in range(1, adet + 1)] if adet > 1 else fis, ensure_ascii=False)
+            cevap = json.dumps({"candidates": [{"content": {"parts": [{"text": metin}]}}],
+                                "usageMetadata": {"promptTokenCount": 258 * adet + 120, "candidatesTokenCount": 60 * adet, "totalTokenCount": 318 * adet + 120}}).encode()
+            self.send_response(200); self.send_header("Content-Length", str(len(cevap))); self.end_headers(); self.wfile.write(cevap)
+
+        def log_message(self, *a): pass
+
+    sunucu = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, daemon=True).start()
+    return sunucu
+
+def sentetik_uret(klasor, adet):
+    from PIL import Image, ImageDraw
+    rng = random.Random(0)
+    for i in range(adet):
+        img = Image.new("RGB", (1240, 1754), "white")
+        c = ImageDraw.Draw(img)
+        for satir in range(40):
+            c.text((80, 80 + satir * 40), f"URUN {rng.randint(1000, 9999)}  x{rng.randint(1, 5)}   {rng.uniform(1, 500):.2f} TL", fill="black")
+        img.save(os.path.join(klasor, f"fis_{i}.jpg"), quality=85)
+
+class BenchDosyasi:
+    # toplu_analiz'in beklediği UploadedFile arayüzü: name / type / getvalue()
+    def __init__(self, yol):
+        self.yol, self.name, self.type = yol, os.path.basename(yol), MIME[os.path.splitext(yol)[1].lower()]
+
+    def getvalue(self):
+        with open(self.yol, "rb") as f: return f.read()
+
+async def calistir(dosyalar, eszamanlilik, paketle, vkn):
+    # Dönüş: [(dosya adı, hata)]
+    from analiz import toplu_analiz
+    from gemini_motor import HizSinirlayici
+
+    hatalar = []
+    def sonuc_geldi(anahtar, d, mod, sonuc):
+        if isinstance(sonuc, dict) and "hata" in sonuc: hatalar.append((d.name, sonuc["hata"]))
+    isler = [(yol, BenchDosyasi(yol), "fis") for yol in dosyalar]
+    await toplu_analiz("bench", isler, "bench", eszamanlilik, sonuc_geldi, paketle, HizSinirlayici(rpm=100_000, tpm=10 ** 9), vkn)
+    return hatalar
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("klasor", nargs="?")
+    ap.add_argument("--adet", type=int, default=60, help="Sentetik korpus boyu")
+    ap.add_argument("--eszamanlilik", default="1,5,10,20")
+    ap.add_argument("--gecikme", type=float, default=0.8, help="Sahte sunucunun istek başı ortalama gecikmesi (sn)")
+    ap.add_argument("--rpm", type=int, default=0, help="Sahte sunucunun dakikalık istek sınırı (0: sınırsız)")
+    ap.add_argument("--paketle", action="store_true")
+    ap.add_argument("--json", help="Sonuçları bu dosyaya da yaz")
+    args = ap.parse_args()
+
+    # gemini_motor adresi import anında okur: uygulama modülleri sahte sunucu açıldıktan sonra yüklenir
+    sunucu = sahte_sunucu(args.gecikme, args.rpm)
+    os.environ["GEMINI_TEMEL_URL"] = f"http://127.0.0.1:{sunucu.server_port}"
+    from boru_hatti import havuzu_isit
+    from olcum import OLCUM
+    from qr_fatura import VknHafizasi
+
+    gecici = tempfile.TemporaryDirectory()
+    klasor = args.klasor
+    if not klasor:
+        klasor = os.path.join(gecici.name, "korpus")
+        os.makedirs(klasor)
+        sentetik_uret(klasor, args.adet)
+    dosyalar = sorted(y for y in glob.glob(os.path.join(klasor, "*")) if os.path.splitext(y)[1].lower() in MIME)
+    vkn = VknHafizasi(os.path.join(gecici.name, "vkn.sqlite"))
+    asyncio.run(havuzu_isit()) # Havuz açılışı ölçüme girmesin
+
+    sonuclar = []
+    print(f"{len(dosyalar)} dosya, gecikme {args.gecikme}s, rpm {args.rpm or '∞'}, paketleme {'açık' if args.paketle else 'kapalı'}")
+    print(f"{'hız':>4} {'okunan':>7} {'hata':>5} {'dosya/sn':>9} {'p50 sn':>8} {'p95 sn':>8} {'istek':>6} {'429':>5} {'tekrar':>6}")
+    for n in [int(x) for x in args.eszamanlilik.split(",")]:
+        OLCUM.sifirla()
+        t0 = time.perf_counter()
+        hatalar = asyncio.run(calistir(dosyalar, n, args.paketle, vkn))
+        sure = time.perf_counter() - t0
+        ozet = OLCUM.ozet()
+        dosya = next((s for s in ozet["sureler"] if s["ad"] == "dosya_saniye"), {})
+        sayac = lambda ad, **et: sum(s["deger"] for s in ozet["sayaclar"] if s["ad"] == ad and all(s.get(k) == v for k, v in et.items()))
+        okunan = len(dosyalar) - len(hatalar)
+        satir = {"eszamanlilik": n, "sure_sn": round(sure, 2), "okunan": okunan, "hata": len(hatalar), "dosya_sn": round(okunan / sure, 2),
+                 "p50_sn": dosya.get("p50_sn"), "p95_sn": dosya.get("p95_sn"), "istek": int(sayac("gemini_istek_toplam")),
+                 "http_429": int(sayac("gemini_istek_toplam", durum="429")), "yeniden_deneme": int(sayac("gemini_yeniden_deneme_toplam")),
+                 "asamalar": ozet["sureler"], "hatalar": hatalar[:5]}
+        sonuclar.append(satir)
+        print(f"{n:>4} {okunan:>7} {len(hatalar):>5} {satir['dosya_sn']:>9} {satir['p50_sn']:>8} {satir['p95_sn']:>8} {satir['istek']:>6} {satir['http_429']:>5} {satir['yeniden_deneme']:>6}")
+
+    for s in sonuclar:
+        if s["hatalar"]: print(f"Hız {s['eszamanlilik']}: {s['hata']} dosya okunamadı, ör. {s['hatalar'][0][0]}: {s['hatalar'][0][1][:120]}")
+    print("\nSon çalıştırmanın aşamaları (p50 / p95 sn):")
+    for s in sonuclar[-1]["asamalar"]:
+        etiket = ",".join(f"{k}={v}" for k, v in s.items() if k not in ("ad", "adet", "toplam_sn", "p50_sn", "p95_sn", "max_sn"))
+        print(f"  {s['ad']}{'{' + etiket + '}' if etiket else ''}: {s['p50_sn']} / {s['p95_sn']} (n={s['adet']})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(sonuclar, f, ensure_ascii=False, indent=1)
+    sunucu.shutdown()
+    gecici.cleanup()
+
+if __name__ == "__main__":
+    main()
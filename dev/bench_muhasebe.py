@@ -0,0 +1,76 @@
+"""Yevmiye motoru benchmark'ı: eski iterrows döngüsü vs sütunsal muhasebe_fisne_cevir.
+
+Kullanım:
+    python dev/bench_muhasebe.py --satir 1000 10000 100000
+
+Her boyutta iki yöntemin süresi ölçülür ve çıktıların aynı olduğu doğrulanır.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from muhasebe import muhasebe_fisne_cevir, temizle_ve_sayiya_cevir
+
+HK = {"Gıda": "770.01", "Ulaşım": "770.02", "Kırtasiye": "770.03", "Teknoloji": "770.04", "Konaklama": "770.05",
+      "Diğer": "770.99", "KDV": "191.18", "Kasa": "100.01", "Banka": "102.01"}
+
+def eski_muhasebe_fisne_cevir(df_ham, hk):
+    # Önceki sürüm (satır satır), karşılaştırma için aynen korunmuştur
+    yevmiye = []
+    for index, row in df_ham.iterrows():
+        try:
+            toplam = temizle_ve_sayiya_cevir(row.get('toplam_tutar', 0))
+            kdv = temizle_ve_sayiya_cevir(row.get('toplam_kdv', 0))
+            matrah = toplam - kdv
+            tarih = str(row.get('tarih', datetime.now().strftime('%d.%m.%Y')))
+            kategori = row.get('kategori', 'Diğer')
+            gider_kodu = hk.get(kategori, hk["Diğer"])
+            aciklama = f"{kategori} - {row.get('isyeri_adi', 'Evrak')}"
+            if matrah > 0: yevmiye.append({"Tarih": tarih, "Hesap Kodu": gider_kodu, "Açıklama": aciklama, "Borç": matrah, "Alacak": 0})
+            if kdv > 0: yevmiye.append({"Tarih": tarih, "Hesap Kodu": hk["KDV"], "Açıklama": "KDV", "Borç": kdv, "Alacak": 0})
+            alacak_hesabi = hk["Banka"] if "Ekstre" in str(row.get('dosya_adi','')) else hk["Kasa"]
+            yevmiye.append({"Tarih": tarih, "Hesap Kodu": alacak_hesabi, "Açıklama": "Ödeme", "Borç": 0, "Alacak": toplam})
+        except: continue
+    return pd.DataFrame(yevmiye)
+
+def ornek_veri(n, tohum=0):
+    rng = np.random.default_rng(tohum)
+    tutar = rng.uniform(1, 5000, n).round(2)
+    kdv = (tutar * rng.choice([0, 0.01, 0.1, 0.2, 1.5], n, p=[0.2, 0.2, 0.3, 0.29, 0.01])).round(2) # %1 hatalı (KDV > toplam)
+    bicim = rng.integers(0, 4, n)
+    def yaz(x, b):
+        if b == 0: return f"{x:.2f}"
+        if b == 1: return f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") # 1.234,56
+        if b == 2: return f"{x:.2f} TL".replace(".", ",")
+        return f"₺{x:.2f}"
+    return pd.DataFrame({
+        "isyeri_adi": rng.choice(["MİGROS", "SHELL", "D&R", "HİLTON"], n),
+        "tarih": "15.01.2025",
+        "kategori": rng.choice(list(HK)[:6] + ["Akaryakıt"], n),
+        "toplam_tutar": [yaz(x, b) for x, b in zip(tutar, bicim)],
+        "toplam_kdv": [yaz(x, b) for x, b in zip(kdv, bicim)],
+        "dosya_adi": rng.choice(["fis.jpg", "Ekstre_kart.pdf"], n),
+    })
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--satir", type=int, nargs="+", default=[1000, 10000, 100000])
+    a = ap.parse_args()
+    print(f"{'satır':>8} {'eski (s)':>10} {'yeni (s)':>10} {'hızlanma':>9}  aynı")
+    for n in a.satir:
+        df = ornek_veri(n)
+        t = time.perf_counter(); eski = eski_muhasebe_fisne_cevir(df, HK); t_eski = time.perf_counter() - t
+        t = time.perf_counter(); yeni, rapor = muhasebe_fisne_cevir(df, HK); t_yeni = time.perf_counter() - t
+        metin = ["Tarih", "Hesap Kodu", "Açıklama"]
+        ayni = eski.shape == yeni.shape and (eski[metin].values == yeni[metin].values).all() and \
+            np.allclose(eski[["Borç", "Alacak"]].astype(float), yeni[["Borç", "Alacak"]])
+        print(f"{n:>8} {t_eski:>10.3f} {t_yeni:>10.3f} {t_eski / t_yeni:>8.0f}x  {'evet' if ayni else 'HAYIR'}  (dengesiz: {len(rapor)})")
+
+if __name__ == "__main__":
+    main()
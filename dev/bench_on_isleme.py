@@ -0,0 +1,99 @@
+"""Ön işleme benchmark'ı: eski (cv2 + PIL, her denemede) vs yeni (tek decode).
+
+Kullanım:
+    python dev/bench_on_isleme.py klasor/ --deneme 2
+
+Klasör verilmezse 12MP sentetik JPEG'ler üretilir. Üretim ve her yöntem
+ayrı süreçlerde çalışır, böylece tepe RSS değerleri birbirini etkilemez.
+Eski yöntem için opencv-python-headless kurulu olmalıdır.
+"""
+import argparse
+import base64
+import glob
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def eski_yontem(bytes_data, deneme):
+    # Önceki gemini_ile_analiz_et: her denemede cv2 ile QR + PIL ile yeniden kodlama
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from pyzbar.pyzbar import decode
+    for _ in range(deneme):
+        img = cv2.imdecode(np.frombuffer(bytes_data, np.uint8), cv2.IMREAD_COLOR)
+        decode(img)
+        del img
+        pil = Image.open(io.BytesIO(bytes_data)).convert("RGB")
+        pil.thumbnail((1024, 1024))
+        buf = io.BytesIO()
+        pil.save(buf, "JPEG", quality=70)
+        base64.b64encode(buf.getvalue())
+
+def yeni_yontem(bytes_data, deneme):
+    from on_isleme import goruntu_hazirla
+    goruntu_hazirla(bytes_data, "image/jpeg")
+
+def sentetik_uret(klasor, adet):
+    import numpy as np
+    from PIL import Image
+    rng = np.random.default_rng(0)
+    for i in range(adet):
+        # Fotoğraf benzeri: yumuşak gradyan + gürültü (tamamen rastgele gürültü JPEG'i anlamsız büyütür)
+        y, x = np.mgrid[0:3000, 0:4000]
+        taban = ((x + y * (i + 1)) % 256).astype(np.uint8)
+        gurultu = rng.integers(0, 24, size=(3000, 4000), dtype=np.uint8)
+        kanal = taban + gurultu
+        Image.fromarray(np.dstack([kanal, kanal[::-1], kanal[:, ::-1]])).save(os.path.join(klasor, f"sentetik_{i}.jpg"), quality=90)
+
+def calistir(yontem, dosyalar, deneme):
+    fn = {"eski": eski_yontem, "yeni": yeni_yontem}[yontem]
+    sureler = []
+    for yol in dosyalar:
+        with open(yol, "rb") as f: veri = f.read()
+        t = time.process_time()
+        fn(veri, deneme)
+        sureler.append(time.process_time() - t)
+    tepe_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"yontem": yontem, "ort_cpu_ms": 1000 * sum(sureler) / len(sureler), "maks_cpu_ms": 1000 * max(sureler), "tepe_rss_mb": tepe_kb / 1024}))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("klasor", nargs="?")
+    ap.add_argument("--deneme", type=int, default=1, help="Eski yöntemde 429 sonrası tekrar sayısı dahil deneme adedi")
+    ap.add_argument("--adet", type=int, default=5, help="Sentetik görsel adedi")
+    ap.add_argument("--_alt", choices=["eski", "yeni"], help=argparse.SUPPRESS)
+    ap.add_argument("--_dosyalar", nargs="*", help=argparse.SUPPRESS)
+    ap.add_argument("--_uret", help=argparse.SUPPRESS)
+    a = ap.parse_args()
+
+    if a._alt: return calistir(a._alt, a._dosyalar, a.deneme)
+    if a._uret: return sentetik_uret(a._uret, a.adet)
+
+    gecici = None
+    if a.klasor: dosyalar = sorted(glob.glob(os.path.join(a.klasor, "*.jp*g")) + glob.glob(os.path.join(a.klasor, "*.png")))
+    else:
+        gecici = tempfile.mkdtemp()
+        # Ayrı süreçte: ru_maxrss exec'ten sonra da korunduğu için ana süreç küçük kalmalı
+        subprocess.run([sys.executable, __file__, "--_uret", gecici, "--adet", str(a.adet)], check=True)
+        dosyalar = sorted(glob.glob(os.path.join(gecici, "*.jpg")))
+    if not dosyalar: sys.exit("Görsel bulunamadı")
+
+    print(f"{len(dosyalar)} görsel, deneme={a.deneme}")
+    for yontem in ["eski", "yeni"]:
+        cikti = subprocess.run([sys.executable, __file__, "--_alt", yontem, "--deneme", str(a.deneme), "--_dosyalar", *dosyalar], capture_output=True, text=True)
+        if cikti.returncode != 0: print(f"{yontem}: HATA\n{cikti.stderr.strip()}"); continue
+        r = json.loads(cikti.stdout)
+        print(f"{yontem:5s}  CPU/görsel: {r['ort_cpu_ms']:8.1f} ms (maks {r['maks_cpu_ms']:.1f})  tepe RSS: {r['tepe_rss_mb']:7.1f} MB")
+    if gecici: shutil.rmtree(gecici, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
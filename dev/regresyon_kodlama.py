@@ -0,0 +1,158 @@
+"""Kodlama regresyonu: eski sabit kodlama (1024px/q70 RGB, PDF ham) vs bütçeli kodlama, istek başı bayt ve alan doğruluğu.
+
+Kullanım:
+    python dev/regresyon_kodlama.py korpus/ --profiller eski,uyarlamali,webp
+    GEMINI_API_KEY=... python dev/regresyon_kodlama.py korpus/ --model gemini-2.5-flash --json rapor.json
+
+Korpus klasöründe fiş görselleri / PDF'ler ve beklenen alanları içeren beklenen.json bulunur:
+    {"fis_1.jpg": {"isyeri_adi": "...", "fiş_no": "...", "tarih": "GG.AA.YYYY", "toplam_tutar": "0.00", "toplam_kdv": "0.00"}, ...}
+Klasör verilmezse beklenen değerleri bilinen sentetik fişler (iri yazılı seyrek, sık yazılı A4, uzun termal) üretilir.
+GEMINI_API_KEY yoksa sadece çevrimdışı ölçüm yapılır (bayt, hazırlık süresi, gönderilen görselde metin satırı
+yüksekliği: okunabilirlik için kaba bir vekil, ~6 px altı rakamlar belirsizleşir). Varsa her profil aynı üretim
+istemiyle (istemler.prompt_olustur) gerçek API'ye gönderilir; alan doğruluğu, istek gecikmesi ve token raporlanır.
+Alanlar mükerrer tespitindeki normalleştirmeyle karşılaştırılır (büyük/küçük harf, Türkçe karakter, tarih biçimi, tutar ±0.01).
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MIME = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp", ".pdf": "application/pdf"}
+PROFILLER = {"eski": {"uyarlamali": False}, "uyarlamali": {"uyarlamali": True, "bicim": "jpeg"}, "webp": {"uyarlamali": True, "bicim": "webp"}}
+ALANLAR = ("isyeri_adi", "fiş_no", "tarih", "toplam_tutar", "toplam_kdv")
+
+def sentetik_uret(klasor, adet):
+    from PIL import Image, ImageDraw, ImageFont
+    rng = random.Random(0)
+    beklenen = {}
+    for i in range(adet):
+        tur = ("seyrek", "a4", "termal")[i % 3]
+        # seyrek: iri puntolu az satır (uyarlamalı kodlamada 1024'ün altına iner); a4 / termal: küçük puntolu sık yazı
+        boyut, satir_sayisi, aralik, punto = {"seyrek": ((1240, 1754), 12, 90, 40), "a4": ((1240, 1754), 70, 22, 11), "termal": ((576, 2600), 110, 22, 11)}[tur]
+        yazi_tipi = ImageFont.load_default(size=punto)
+        img = Image.new("RGB", boyut, "white")
+        c = ImageDraw.Draw(img)
+        isyeri, fis_no = f"ORNEK MARKET {rng.randint(10, 99)} A.S.", f"{rng.randint(1, 9999):04d}"
+        tarih = f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.2024"
+        tutarlar = [round(rng.uniform(1, 200), 2) for _ in range(satir_sayisi - 8)]
+        toplam = round(sum(tutarlar), 2)
+        kdv = round(toplam * 0.20 / 1.20, 2)
+        satirlar = [isyeri, "ISTANBUL", f"TARIH: {tarih}", f"FIS NO: {fis_no}", ""]
+        satirlar += [f"URUN {rng.randint(1000, 9999)} x{rng.randint(1, 5)}   {t:.2f}" for t in tutarlar]
+        satirlar += [f"TOPKDV  {kdv:.2f}", f"TOPLAM  {toplam:.2f}"]
+        for n, metin in enumerate(satirlar): c.text((30, 30 + n * aralik), metin, fill="black", font=yazi_tipi)
+        ad = f"{tur}_{i}.jpg"
+        img.save(os.path.join(klasor, ad), quality=90)
+        beklenen[ad] = {"isyeri_adi": isyeri, "fiş_no": fis_no, "tarih": tarih, "toplam_tutar": f"{toplam:.2f}", "toplam_kdv": f"{kdv:.2f}"}
+    with open(os.path.join(klasor, "beklenen.json"), "w", encoding="utf-8") as f: json.dump(beklenen, f, ensure_ascii=False, indent=1)
+
+def alan_dogru_mu(alan, beklenen, gelen):
+    from muhasebe import temizle_ve_sayiya_cevir
+    from mukerrer import _sade, _tarih
+    if alan in ("toplam_tutar", "toplam_kdv"): return abs(temizle_ve_sayiya_cevir(beklenen) - temizle_ve_sayiya_cevir(gelen)) <= 0.01
+    if alan == "tarih": return _tarih(beklenen) != "" and _tarih(beklenen) == _tarih(gelen)
+    return _sade(beklenen) == _sade(gelen)
+
+def gonderilen_satir(h):
+    # Gönderilen görselde ölçülen metin satırı yüksekliği (px); PDF ya da ölçülemezse None
+    import base64, io
+    from PIL import Image
+    from on_isleme import satir_yuksekligi
+    if h.mime_type == "application/pdf": return None
+    with Image.open(io.BytesIO(base64.b64decode(h.base64_data))) as img: return satir_yuksekligi(img.convert("L"))
+
+def hazirla(dosyalar, profil):
+    from on_isleme import goruntu_hazirla
+    hazirlar, sureler = {}, []
+    for yol in dosyalar:
+        with open(yol, "rb") as f: veri = f.read()
+        t0 = time.perf_counter()
+        hazirlar[os.path.basename(yol)] = goruntu_hazirla(veri, MIME[os.path.splitext(yol)[1].lower()], **PROFILLER[profil])
+        sureler.append(time.perf_counter() - t0)
+    return hazirlar, sureler
+
+async def analiz_et(hazirlar, api_key, model, eszamanlilik):
+    from gemini_motor import GeminiMotoru, HizSinirlayici
+    from istemler import model_json, prompt_olustur
+
+    async with GeminiMotoru(api_key, HizSinirlayici(rpm=int(os.environ.get("GEMINI_RPM", 1000))), eszamanlilik) as motor:
+        async def tek(ad, h):
+            parts = [{"text": prompt_olustur("fis", h.qr_data)}, {"inline_data": {"mime_type": h.mime_type, "data": h.base64_data}}]
+            t0 = time.perf_counter()
+            try: veri = model_json(await motor.uret(model, parts))
+            except Exception as e: veri = {"hata": str(e)}
+            return ad, (veri if isinstance(veri, dict) else {"hata": "JSON nesne değil"}), time.perf_counter() - t0
+        return await asyncio.gather(*[tek(ad, h) for ad, h in hazirlar.items()])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("klasor", nargs="?")
+    ap.add_argument("--adet", type=int, default=12, help="Sentetik korpus boyu")
+    ap.add_argument("--profiller", default="eski,uyarlamali,webp")
+    ap.add_argument("--model", default="gemini-2.5-flash")
+    ap.add_argument("--eszamanlilik", type=int, default=5)
+    ap.add_argument("--json", help="Raporu bu dosyaya da yaz")
+    args = ap.parse_args()
+
+    from olcum import OLCUM, yuzdelik
+
+    gecici = None
+    klasor = args.klasor
+    if not klasor:
+        gecici = tempfile.TemporaryDirectory()
+        klasor = gecici.name
+        sentetik_uret(klasor, args.adet)
+    dosyalar = sorted(y for y in glob.glob(os.path.join(klasor, "*")) if os.path.splitext(y)[1].lower() in MIME)
+    beklenen_yolu = os.path.join(klasor, "beklenen.json")
+    beklenen = {}
+    if os.path.exists(beklenen_yolu):
+        with open(beklenen_yolu, encoding="utf-8") as f: beklenen = json.load(f)
+    api_key = os.environ.get("GEMINI_API_KEY")
+    print(f"{len(dosyalar)} dosya, {len(beklenen)} beklenen kayıt, {'API: ' + args.model if api_key else 'çevrimdışı (GEMINI_API_KEY yok)'}")
+
+    rapor = []
+    for profil in args.profiller.split(","):
+        hazirlar, sureler = hazirla(dosyalar, profil)
+        baytlar = [h.bayt for h in hazirlar.values()]
+        satirlar = [s for s in map(gonderilen_satir, hazirlar.values()) if s]
+        satir = {"profil": profil, "dosya": len(hazirlar), "bayt_ort_kb": round(sum(baytlar) / max(1, len(baytlar)) / 1024, 1),
+                 "bayt_p95_kb": round(yuzdelik(baytlar, 0.95) / 1024, 1), "hazirlik_p50_sn": round(yuzdelik(sureler, 0.5), 3),
+                 "satir_min_px": min(satirlar, default=None), "satir_p50_px": yuzdelik(satirlar, 0.5) if satirlar else None}
+        if api_key:
+            OLCUM.sifirla()
+            sonuclar = asyncio.run(analiz_et(hazirlar, api_key, args.model, args.eszamanlilik))
+            gecikmeler = [s for _, _, s in sonuclar]
+            dogru, toplam, hatali = {a: 0 for a in ALANLAR}, {a: 0 for a in ALANLAR}, 0
+            for ad, veri, _ in sonuclar:
+                if "hata" in veri: hatali += 1
+                for alan, deger in beklenen.get(ad, {}).items():
+                    if alan not in toplam: continue
+                    toplam[alan] += 1
+                    dogru[alan] += alan_dogru_mu(alan, deger, veri.get(alan, ""))
+            istem_token = sum(s["deger"] for s in OLCUM.ozet()["sayaclar"] if s["ad"] == "gemini_token_toplam" and s.get("tur") == "istem")
+            satir.update({"istek_p50_sn": round(yuzdelik(gecikmeler, 0.5), 2), "istek_p95_sn": round(yuzdelik(gecikmeler, 0.95), 2),
+                          "istem_token_ort": round(istem_token / max(1, len(sonuclar))), "hatali": hatali,
+                          "alan_dogrulugu": {a: round(dogru[a] / toplam[a], 3) for a in ALANLAR if toplam[a]},
+                          "dogruluk": round(sum(dogru.values()) / max(1, sum(toplam.values())), 3)})
+        rapor.append(satir)
+
+    print(f"{'profil':<11} {'ort KB':>7} {'p95 KB':>7} {'hazırlık':>9} {'satır min':>9} {'satır p50':>9}" + (f" {'p50 sn':>7} {'p95 sn':>7} {'token':>6} {'hata':>5} {'doğruluk':>9}" if api_key else ""))
+    for s in rapor:
+        print(f"{s['profil']:<11} {s['bayt_ort_kb']:>7} {s['bayt_p95_kb']:>7} {s['hazirlik_p50_sn']:>9} {str(s['satir_min_px']):>9} {str(s['satir_p50_px']):>9}"
+              + (f" {s['istek_p50_sn']:>7} {s['istek_p95_sn']:>7} {s['istem_token_ort']:>6} {s['hatali']:>5} {s['dogruluk']:>9}" if api_key else ""))
+    if api_key:
+        print("\nAlan bazında doğruluk:")
+        for s in rapor: print(f"  {s['profil']:<11} " + "  ".join(f"{a}={v}" for a, v in s["alan_dogrulugu"].items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(rapor, f, ensure_ascii=False, indent=1)
+    if gecici: gecici.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Yerel sahte gspread: SheetsSenkron'u Google'a gitmeden denemek için.
+
+Sadece uygulamanın kullandığı çağrılar vardır. Her istemci çağrısı
+`istemci.cagrilar` sayacına yazılır; böylece önbellek/kuyruk katmanının
+kaç API isteği yaptığı ölçülebilir.
+
+    from dev.sahte_gspread import SahteIstemci
+    senkron = SheetsSenkron(SahteIstemci())
+"""
+import re
+from collections import Counter
+from types import SimpleNamespace
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_to_rowcol
+
+class SahteWorksheet:
+    def __init__(self, istemci, title):
+        self._istemci = istemci
+        self.title = title
+        self.satirlar = []
+
+    def _say(self, ad): self._istemci.cagrilar[ad] += 1
+
+    def row_values(self, n):
+        self._say("row_values")
+        return list(self.satirlar[n - 1]) if n <= len(self.satirlar) else []
+
+    def col_values(self, n):
+        self._say("col_values")
+        return [r[n - 1] for r in self.satirlar if len(r) >= n]
+
+    def get_all_values(self):
+        self._say("get_all_values")
+        genislik = max((len(r) for r in self.satirlar), default=0)
+        return [list(r) + [""] * (genislik - len(r)) for r in self.satirlar]
+
+    def get_values(self, aralik):
+        self._say("get_values")
+        bas, son = aralik.split(":")
+        satir, _ = a1_to_rowcol(bas)
+        son_sutun = a1_to_rowcol(son + "1" if not re.search(r"\d", son) else son)[1]
+        return [(list(r) + [""] * son_sutun)[:son_sutun] for r in self.satirlar[satir - 1:]]
+
+    def append_row(self, satir):
+        self._say("append_row")
+        self.satirlar.append([str(v) for v in satir])
+
+    def append_rows(self, satirlar):
+        self._say("append_rows")
+        self.satirlar.extend([str(v) for v in s] for s in satirlar)
+
+    def find(self, deger):
+        self._say("find")
+        for i, r in enumerate(self.satirlar):
+            if deger in r: return SimpleNamespace(row=i + 1, col=r.index(deger) + 1)
+        return None
+
+    def delete_rows(self, n):
+        self._say("delete_rows")
+        del self.satirlar[n - 1]
+
+class SahteSpreadsheet:
+    def __init__(self, istemci):
+        self._istemci = istemci
+        self.sayfalar = {}
+
+    def worksheet(self, ad):
+        self._istemci.cagrilar["worksheet"] += 1
+        if ad not in self.sayfalar: raise WorksheetNotFound(ad)
+        return self.sayfalar[ad]
+
+    def add_worksheet(self, ad, rows, cols):
+        self._istemci.cagrilar["add_worksheet"] += 1
+        self.sayfalar[ad] = SahteWorksheet(self._istemci, ad)
+        return self.sayfalar[ad]
+
+    def del_worksheet(self, ws):
+        self._istemci.cagrilar["del_worksheet"] += 1
+        self.sayfalar.pop(ws.title, None)
+
+class SahteIstemci:
+    def __init__(self):
+        self.cagrilar = Counter()
+        self.dosyalar = {}
+
+    def open(self, ad):
+        self.cagrilar["open"] += 1
+        return self.dosyalar.setdefault(ad, SahteSpreadsheet(self))
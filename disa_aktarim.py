@@ -0,0 +1,65 @@
+import glob
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+
+# --- DIŞA AKTARIM (İSTEĞE BAĞLI, SÜRÜM ÖNBELLEKLİ) ---
+# Dosyalar sadece kullanıcı indir'e basınca üretilir ve veri sürümü değişene kadar diskte saklanır.
+# ZIP doğrudan geçici dosyaya yazılır; zaten sıkıştırılmış görseller/PDF'ler tekrar sıkıştırılmaz (STORED).
+
+SIKISTIRILMIS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".pdf", ".zip"}
+TABLO_BICIMLERI = {"Excel": "xlsx", "Hafif Excel": "xlsx", "CSV": "csv"}
+MIME = {"zip": "application/zip", "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "csv": "text/csv"}
+
+def onbellekli_uret(dizin, surum, ad, uret):
+    # dizin/<surum>_<ad> yoksa uret(gecici_yol) ile yazılır; eski sürümlerin dosyaları silinir.
+    # Geçici dosyalar "." ile başlar: glob onları görmez, başka bir oturumun temizliği yazılmakta olanı silmez
+    os.makedirs(dizin, exist_ok=True)
+    hedef = os.path.join(dizin, f"{surum}_{ad}")
+    if not os.path.exists(hedef):
+        for eski in glob.glob(os.path.join(dizin, "*_*")):
+            if not os.path.basename(eski).startswith(f"{surum}_"):
+                try: os.remove(eski)
+                except OSError: pass
+        fd, gecici = tempfile.mkstemp(dir=dizin, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            uret(gecici)
+            os.replace(gecici, hedef)
+        finally:
+            if os.path.exists(gecici): os.remove(gecici)
+    return hedef
+
+def arsiv_olustur(veri_listesi, depo, yol, ad_fn):
+    with zipfile.ZipFile(yol, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for veri in veri_listesi:
+            if isinstance(veri, dict) and depo.var_mi(veri.get("_blob")):
+                yeni_ad = ad_fn(veri)
+                sikistirma = zipfile.ZIP_STORED if os.path.splitext(yeni_ad)[1].lower() in SIKISTIRILMIS else zipfile.ZIP_DEFLATED
+                zip_file.write(depo.yol(veri["_blob"]), yeni_ad, compress_type=sikistirma)
+
+def _hucre(v):
+    if v is None or (isinstance(v, float) and v != v): return None
+    if isinstance(v, (list, dict, tuple, set)): return str(v)
+    return v
+
+def hafif_xlsx_yaz(df, yol):
+    # openpyxl write_only: satırlar akış halinde yazılır, hücre nesneleri RAM'de tutulmaz
+    from openpyxl import Workbook # İlk dışa aktarımda yüklenir (uygulama açılışında değil)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append([str(c) for c in df.columns])
+    for satir in df.itertuples(index=False, name=None):
+        ws.append([_hucre(v) for v in satir])
+    wb.save(yol)
+
+def tablo_yaz(df, yol, bicim="Excel"):
+    if bicim == "CSV": df.to_csv(yol, index=False, sep=";", encoding="utf-8-sig") # Türkçe Excel ";" ayırıcı bekler
+    elif bicim == "Hafif Excel": hafif_xlsx_yaz(df, yol)
+    else:
+        with pd.ExcelWriter(yol, engine='openpyxl') as w: df.to_excel(w, index=False)
+
+def dosya_oku(yol):
+    with open(yol, "rb") as f: return f.read()
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from olcum import OLCUM
+
+# --- GEMINI ASENKRON MOTOR ---
+# Tek bir havuzlu (keep-alive) HTTP istemcisi + tüm oturumların paylaştığı
+# dakikalık istek (RPM) ve token (TPM) sınırlayıcısı.
+# Yerel sahte sunucuya karşı test için GEMINI_TEMEL_URL ortam değişkeni kullanılır.
+
+TEMEL_URL = os.environ.get("GEMINI_TEMEL_URL", "https://generativelanguage.googleapis.com/v1beta")
+GORSEL_TOKEN = 258 # Gemini'nin görsel başına saydığı yaklaşık token
+
+class GeminiHatasi(Exception):
+    pass
+
+class TokenKovasi:
+    def __init__(self, dakikalik, kapasite=None):
+        self.hiz = dakikalik / 60.0
+        self.kapasite = float(kapasite or dakikalik)
+        self.seviye = self.kapasite
+        self.son = time.monotonic()
+
+    def _doldur(self, simdi):
+        self.seviye = min(self.kapasite, self.seviye + (simdi - self.son) * self.hiz)
+        self.son = simdi
+
+    def bekleme(self, n, simdi):
+        # Yeterli token varsa düşer ve 0 döner; yoksa kaç saniye beklenmesi gerektiğini söyler
+        self._doldur(simdi)
+        n = min(n, self.kapasite)
+        if self.seviye >= n: return 0.0
+        return (n - self.seviye) / self.hiz
+
+    def dus(self, n): self.seviye -= n
+
+class HizSinirlayici:
+    # Thread-safe; farklı event loop'lardan (her Streamlit çalıştırması kendi loop'unu açar) ortak kullanılabilir
+    def __init__(self, rpm=1000, tpm=1_000_000):
+        self.istekler = TokenKovasi(rpm)
+        self.tokenler = TokenKovasi(tpm)
+        self._kilit = threading.Lock()
+        self._duraklat = 0.0
+
+    async def al(self, token_tahmini):
+        while True:
+            with self._kilit:
+                simdi = time.monotonic()
+                bekle = max(self._duraklat - simdi, self.istekler.bekleme(1, simdi), self.tokenler.bekleme(token_tahmini, simdi))
+                if bekle <= 0:
+                    self.istekler.dus(1); self.tokenler.dus(min(token_tahmini, self.tokenler.kapasite))
+                    return
+            await asyncio.sleep(bekle + random.uniform(0, 0.05))
+
+    def duzelt(self, ek_token):
+        # Gerçek kullanım (usageMetadata) tahminden fazlaysa fark kovadan düşülür
+        if ek_token > 0:
+            with self._kilit: self.tokenler.dus(ek_token)
+
+    def duraklat(self, sure):
+        # 429 geldiğinde herkes birlikte bekler; tek tek thread uyutmak yerine ortak kapı
+        with self._kilit: self._duraklat = max(self._duraklat, time.monotonic() + sure)
+
+def token_tahmini(parts):
+    toplam = 0
+    for p in parts:
+        if "text" in p: toplam += len(p["text"]) // 4 + 1
+        elif "inline_data" in p:
+            d = p["inline_data"]
+            toplam += GORSEL_TOKEN if d.get("mime_type", "").startswith("image/") else max(GORSEL_TOKEN, len(d.get("data", "")) // 1500)
+    return toplam + 256 # cevap payı
+
+def _retry_after(response):
+    deger = response.headers.get("Retry-After")
+    if not deger: return None
+    try: return max(0.0, float(deger))
+    except ValueError: pass
+    try: return max(0.0, parsedate_to_datetime(deger).timestamp() - time.time())
+    except: return None
+
+class GeminiMotoru:
+    def __init__(self, api_key, sinirlayici, eszamanlilik=10, retries=5, zaman_asimi=120, temel_url=None):
+        self.api_key = api_key
+        self.sinirlayici = sinirlayici
+        self.eszamanlilik = max(1, int(eszamanlilik))
+        self.retries = retries
+        self.zaman_asimi = zaman_asimi
+        self.temel_url = (temel_url or TEMEL_URL).rstrip("/")
+        self._sem = None
+        self._istemci = None
+        self.cagri = 0 # uret() çağrısı (yeniden denemeler hariç): işin "API çağrısı" sayısı
+
+    async def __aenter__(self):
+        self._sem = asyncio.Semaphore(self.eszamanlilik)
+        limitler = httpx.Limits(max_connections=self.eszamanlilik, max_keepalive_connections=self.eszamanlilik)
+        self._istemci = httpx.AsyncClient(limits=limitler, timeout=httpx.Timeout(self.zaman_asimi, connect=10))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._istemci.aclose()
+
+    @staticmethod
+    def _bekleme(attempt, taban=1.0, tavan=60.0):
+        # "Full jitter": tüm işçiler aynı anda geri dönmesin
+        return random.uniform(taban, min(tavan, taban * 2 ** (attempt + 1)))
+
+    async def uret(self, model, parts):
+        url = f"{self.temel_url}/models/{model}:generateContent"
+        payload = {"contents": [{"parts": parts}]}
+        tahmin = token_tahmini(parts)
+        son_hata = "Bilinmeyen hata"
+        self.cagri += 1
+        for attempt in range(self.retries):
+            if attempt: OLCUM.sayac("gemini_yeniden_deneme_toplam")
+            with OLCUM.sure("gemini_kota_bekleme_saniye"): await self.sinirlayici.al(tahmin)
+            t0 = time.perf_counter()
+            try:
+                async with self._sem:
+                    response = await self._istemci.post(url, params={"key": self.api_key}, json=payload)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                OLCUM.sure_ekle("gemini_istek_saniye", time.perf_counter() - t0, durum="baglanti")
+                OLCUM.sayac("gemini_istek_toplam", durum="baglanti")
+                son_hata = f"Bağlantı hatası ({type(e).__name__})"
+                await asyncio.sleep(self._bekleme(attempt)); continue
+            OLCUM.sure_ekle("gemini_istek_saniye", time.perf_counter() - t0, durum=str(response.status_code))
+            OLCUM.sayac("gemini_istek_toplam", durum=str(response.status_code))
+            OLCUM.sayac("gemini_gonderilen_bayt_toplam", len(response.request.content))
+
+            if response.status_code == 429:
+                son_hata = "Kota limiti nedeniyle işlem yapılamadı."
+                sure = _retry_after(response)
+                self.sinirlayici.duraklat(sure if sure is not None else self._bekleme(attempt))
+                continue
+            if response.status_code >= 500:
+                son_hata = f"API Hatası ({response.status_code})"
+                sure = _retry_after(response)
+                await asyncio.sleep(sure if sure is not None else self._bekleme(attempt)); continue
+            if response.status_code != 200: raise GeminiHatasi(f"API Hatası ({response.status_code})")
+
+            cevap = response.json()
+            meta = cevap.get("usageMetadata", {})
+            for tur, alan in (("istem", "promptTokenCount"), ("cevap", "candidatesTokenCount"), ("toplam", "totalTokenCount")):
+                if meta.get(alan): OLCUM.sayac("gemini_token_toplam", meta[alan], tur=tur)
+            kullanim = meta.get("totalTokenCount")
+            if kullanim: self.sinirlayici.duzelt(kullanim - tahmin)
+            try: return cevap['candidates'][0]['content']['parts'][0]['text']
+            except (KeyError, IndexError): raise GeminiHatasi("Boş model cevabı")
+        raise GeminiHatasi(son_hata)
@@ -0,0 +1,19 @@
+import os
+import sys
+
+# --- SÜREÇ HAVUZU İŞÇİSİ ---
+# forkserver bu modülü (ve on_isleme'yi) bir kez yükler; havuz işçileri ondan çatallanır.
+# multiprocessing her yeni işçide ebeveynin __main__ dosyasını yeniden çalıştırır (Streamlit altında app.py:
+# st.secrets yok, havuz bozulur); işçinin __main__'i zaten o dosyaysa atlar. forkserver'ın kendi ana modülü
+# (-c ile çalışır, dosyası yoktur) burada ebeveynin bildirdiği yola işaretlenir: ebeveyndeki sys.modules'a dokunulmaz.
+
+ANA_DOSYA = "MUHABESE_HAVUZ_ANA_DOSYA" # Ebeveynin __main__ dosyası (boru_hatti.islem_havuzu yazar)
+
+_ana = sys.modules.get("__main__")
+if os.environ.get(ANA_DOSYA) and _ana is not None and getattr(_ana, "__file__", None) is None:
+    _ana.__file__ = os.environ[ANA_DOSYA]
+
+def baslat():
+    # ProcessPoolExecutor initializer'ı: işçi başına bir kez. Ön işleme modülü (numpy / PIL / pyzbar) burada
+    # yüklenir; forkserver önceden yüklediyse maliyeti yoktur
+    import on_isleme # noqa: F401
@@ -0,0 +1,171 @@
+import asyncio
+import gc
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+# --- ARKA PLAN İŞ MOTORU (KALICI GÜNLÜK) ---
+# Analiz script çalıştırması içinde değil, süreç genelinde tek bir arka plan thread'inin event loop'unda koşar.
+# Dosyalar blob deposunda, iş tanımı ve her dosyanın sonucu geldiği anda SQLite günlüğündedir:
+# rerun / kopan bağlantı işi durdurmaz, süreç ölürse iş "durdu" kalır ve devam ettirildiğinde
+# sadece bitmemiş dosyalar işlenir. Farklı müşterilerin işleri aynı anda koşabilir (kota ortak sınırlayıcıda).
+
+BEKLIYOR, CALISIYOR, BITTI, DURDU, HATA = "bekliyor", "calisiyor", "bitti", "durdu", "hata"
+
+@dataclass
+class IsDosyasi:
+    # UploadedFile yerine geçer: içerik blob deposundan okunur
+    name: str
+    type: str
+    blob: str
+    depo: object
+
+    def getvalue(self): return self.depo.oku(self.blob)
+
+class IsGunlugu:
+    def __init__(self, yol):
+        os.makedirs(os.path.dirname(os.path.abspath(yol)), exist_ok=True)
+        self._kilit = threading.Lock()
+        self._db = sqlite3.connect(yol, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS isler (
+                is_id TEXT PRIMARY KEY, musteri TEXT NOT NULL, oturum TEXT NOT NULL, model TEXT NOT NULL, ayarlar TEXT NOT NULL,
+                durum TEXT NOT NULL, hata TEXT, istatistik TEXT, olusturma REAL NOT NULL, guncelleme REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_isler_musteri ON isler(musteri, olusturma);
+            CREATE TABLE IF NOT EXISTS dosyalar (
+                is_id TEXT NOT NULL, sira INTEGER NOT NULL, ad TEXT NOT NULL, tur TEXT, mod TEXT NOT NULL,
+                blob TEXT NOT NULL, anahtar TEXT NOT NULL, durum TEXT NOT NULL, hata TEXT, PRIMARY KEY (is_id, sira));
+            CREATE TABLE IF NOT EXISTS sonuclar (
+                no INTEGER PRIMARY KEY AUTOINCREMENT, is_id TEXT NOT NULL, sira INTEGER NOT NULL, veri TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_sonuclar_is ON sonuclar(is_id, no);
+        """)
+        self._db.commit()
+
+    def is_olustur(self, musteri, oturum, model, ayarlar, dosyalar):
+        # dosyalar: [{"ad", "tur", "mod", "blob", "anahtar", "sonuc"}]; sonuc doluysa (önbellek isabeti) dosya baştan bitmiştir
+        is_id = uuid.uuid4().hex[:12]
+        simdi = time.time()
+        istatistik = {"onbellek_isabet": sum(1 for d in dosyalar if d.get("sonuc") is not None)}
+        with self._kilit:
+            self._db.execute("INSERT INTO isler VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?)",
+                             (is_id, musteri, oturum, model, json.dumps(ayarlar), BEKLIYOR, json.dumps(istatistik), simdi, simdi))
+            for sira, d in enumerate(dosyalar):
+                bitti = d.get("sonuc") is not None
+                self._db.execute("INSERT INTO dosyalar VALUES (?, ?, ?, ?, ?, ?, ?, ?, NULL)",
+                                 (is_id, sira, d["ad"], d["tur"], d["mod"], d["blob"], d["anahtar"], BITTI if bitti else BEKLIYOR))
+                if bitti: self._db.execute("INSERT INTO sonuclar (is_id, sira, veri) VALUES (?, ?, ?)", (is_id, sira, json.dumps(d["sonuc"], ensure_ascii=False)))
+            self._db.commit()
+        return is_id
+
+    def dosya_sonucu(self, is_id, sira, sonuc):
+        # Tek işlemde: sonuç satırı + dosya durumu (süreç arada ölürse dosya ya bitmiş ya bekliyor görünür)
+        with self._kilit:
+            if isinstance(sonuc, dict) and "hata" in sonuc:
+                self._db.execute("UPDATE dosyalar SET durum=?, hata=? WHERE is_id=? AND sira=?", (HATA, str(sonuc["hata"]), is_id, sira))
+            else:
+                self._db.execute("INSERT INTO sonuclar (is_id, sira, veri) VALUES (?, ?, ?)", (is_id, sira, json.dumps(sonuc, ensure_ascii=False)))
+                self._db.execute("UPDATE dosyalar SET durum=?, hata=NULL WHERE is_id=? AND sira=?", (BITTI, is_id, sira))
+            self._db.execute("UPDATE isler SET guncelleme=? WHERE is_id=?", (time.time(), is_id))
+            self._db.commit()
+
+    def durum_yaz(self, is_id, durum, hata=None, istatistik=None):
+        # istatistik mevcut olanla birleşir: sayılar öncekilere eklenir (devam ettirilen işte her çalıştırma kendi
+        # dosyalarını sayar), oluşturmadaki önbellek sayısı korunur
+        with self._kilit:
+            if istatistik is not None:
+                eski = self._db.execute("SELECT istatistik FROM isler WHERE is_id=?", (is_id,)).fetchone()
+                eski = json.loads(eski[0]) if eski and eski[0] else {}
+                istatistik = {**eski, **{k: eski.get(k, 0) + v if isinstance(v, (int, float)) else v for k, v in istatistik.items()}}
+            self._db.execute("UPDATE isler SET durum=?, hata=?, istatistik=COALESCE(?, istatistik), guncelleme=? WHERE is_id=?",
+                             (durum, hata, json.dumps(istatistik) if istatistik is not None else None, time.time(), is_id))
+            self._db.commit()
+
+    def yarim_kalanlari_durdur(self):
+        # Süreç yeni başladı: "çalışıyor" görünen işlerin thread'i artık yok
+        with self._kilit:
+            self._db.execute("UPDATE isler SET durum=? WHERE durum IN (?, ?)", (DURDU, CALISIYOR, BEKLIYOR)); self._db.commit()
+
+    def bekleyen_dosyalar(self, is_id):
+        # Devam ederken bitmiş dosyalar atlanır; hatalılar yeniden denenir
+        with self._kilit:
+            satirlar = self._db.execute("SELECT sira, ad, tur, mod, blob, anahtar FROM dosyalar WHERE is_id=? AND durum!=? ORDER BY sira", (is_id, BITTI)).fetchall()
+        return [dict(zip(("sira", "ad", "tur", "mod", "blob", "anahtar"), s)) for s in satirlar]
+
+    _OZET = """SELECT i.is_id, i.musteri, i.oturum, i.model, i.ayarlar, i.durum, i.hata, i.istatistik, i.olusturma, i.guncelleme,
+                      COUNT(d.sira), COALESCE(SUM(d.durum='bitti'), 0), COALESCE(SUM(d.durum='hata'), 0)
+               FROM isler i LEFT JOIN dosyalar d ON d.is_id = i.is_id"""
+
+    @staticmethod
+    def _ozet_satiri(s):
+        b = dict(zip(("is_id", "musteri", "oturum", "model", "ayarlar", "durum", "hata", "istatistik", "olusturma", "guncelleme",
+                      "toplam", "biten", "hatali"), s))
+        b["ayarlar"] = json.loads(b["ayarlar"])
+        b["istatistik"] = json.loads(b["istatistik"]) if b["istatistik"] else {}
+        return b
+
+    def is_bilgisi(self, is_id):
+        with self._kilit: s = self._db.execute(self._OZET + " WHERE i.is_id=? GROUP BY i.is_id", (is_id,)).fetchone()
+        return self._ozet_satiri(s) if s else None
+
+    def isler(self, musteri, limit=10):
+        with self._kilit:
+            satirlar = self._db.execute(self._OZET + " WHERE i.musteri=? GROUP BY i.is_id ORDER BY i.olusturma DESC LIMIT ?", (musteri, limit)).fetchall()
+        return [self._ozet_satiri(s) for s in satirlar]
+
+    def calisan_var(self, oturum):
+        with self._kilit: return self._db.execute("SELECT 1 FROM isler WHERE oturum=? AND durum=? LIMIT 1", (oturum, CALISIYOR)).fetchone() is not None
+
+    def sonuclar(self, is_id, sonra=0):
+        # Artımlı: [(no, veri)]; panel son aldığı "no"dan sonrasını ister
+        with self._kilit:
+            satirlar = self._db.execute("SELECT no, veri FROM sonuclar WHERE is_id=? AND no>? ORDER BY no", (is_id, sonra)).fetchall()
+        return [(no, json.loads(veri)) for no, veri in satirlar]
+
+    def hatalar(self, is_id):
+        with self._kilit: return self._db.execute("SELECT ad, hata FROM dosyalar WHERE is_id=? AND durum=? ORDER BY sira", (is_id, HATA)).fetchall()
+
+class IsMotoru:
+    def __init__(self, gunluk, calistir):
+        # await calistir(bilgi, dosyalar, bildir) -> istatistik (dict); bildir(sira, sonuc) her dosya bittiğinde çağrılır
+        self.gunluk = gunluk
+        self.calistir = calistir
+        self._kilit = threading.Lock()
+        self._isler = {} # is_id -> concurrent.futures.Future
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="is-motoru", daemon=True).start()
+        gunluk.yarim_kalanlari_durdur()
+
+    def calisiyor_mu(self, is_id):
+        with self._kilit: f = self._isler.get(is_id)
+        return f is not None and not f.done()
+
+    def baslat(self, is_id):
+        # Yeni ya da durmuş işi (kaldığı yerden) başlatır; zaten çalışıyorsa False
+        with self._kilit:
+            f = self._isler.get(is_id)
+            if f is not None and not f.done(): return False
+            self.gunluk.durum_yaz(is_id, CALISIYOR)
+            self._isler[is_id] = asyncio.run_coroutine_threadsafe(self._yurut(is_id), self._loop)
+            return True
+
+    def durdur(self, is_id):
+        with self._kilit: f = self._isler.get(is_id)
+        if f is not None: f.cancel() # Görev loop içinde iptal edilir; bitmiş dosyalar günlükte kalır
+
+    async def _yurut(self, is_id):
+        durum, hata, istatistik = DURDU, None, None
+        try:
+            dosyalar = self.gunluk.bekleyen_dosyalar(is_id)
+            if dosyalar:
+                istatistik = await self.calistir(self.gunluk.is_bilgisi(is_id), dosyalar, lambda sira, sonuc: self.gunluk.dosya_sonucu(is_id, sira, sonuc))
+            durum = BITTI
+        except asyncio.CancelledError: pass
+        except Exception as e: hata = str(e)
+        finally:
+            self.gunluk.durum_yaz(is_id, durum, hata, istatistik)
+            gc.collect() # RAM Temizle
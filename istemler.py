@@ -0,0 +1,26 @@
+import json
+
+from olcum import OLCUM
+
+# --- İSTEMLER ---
+# Gemini istemleri ve yanıt ayrıştırma. Uygulama ve geliştirici araçları (dev/regresyon_kodlama.py) aynı istemi kullanır.
+
+KATEGORILER = ["Gıda", "Akaryakıt", "Kırtasiye", "Teknoloji", "Konaklama", "Diğer"]
+
+def prompt_olustur(mod, qr_data=None, sayfa=None):
+    qr_bilgisi = f"\n[İPUCU]: QR kod bulundu: '{qr_data}'" if qr_data else ""
+    if mod == "fis":
+        return f"""Bu belgeyi analiz et. {qr_bilgisi}
+        JSON: {{"isyeri_adi": "...", "fiş_no": "...", "tarih": "GG.AA.YYYY", "kategori": "Gıda/Akaryakıt/Kırtasiye/Teknoloji/Konaklama/Diğer", "toplam_tutar": "0.00", "toplam_kdv": "0.00"}}
+        """
+    parca_bilgisi = f"Bu, {sayfa[2]} sayfalık ekstrenin {sayfa[0]}-{sayfa[1]}. sayfaları; sadece bu sayfalardaki harcama satırlarını ver (devreden bakiye / ara toplam satırlarını alma). " if sayfa else ""
+    return parca_bilgisi + """Kredi kartı ekstresi satırları. JSON Liste: [{"isyeri_adi": "...", "tarih": "GG.AA.YYYY", "kategori": "...", "toplam_tutar": "0.00", "toplam_kdv": "0"}, ...]"""
+
+def coklu_prompt_olustur(adet):
+    # Paketli istek: her görselin önünde "[Parça k]" etiketi var, yanıt parça numarasıyla eşlenir
+    return f"""Aşağıda {adet} ayrı fiş/fatura görseli var; her birinin önünde "[Parça k]" etiketi (varsa QR ipucu) bulunuyor. Görselleri birbirine karıştırma.
+        Her parça için bir nesne. Sadece JSON Liste: [{{"parca": 1, "isyeri_adi": "...", "fiş_no": "...", "tarih": "GG.AA.YYYY", "kategori": "Gıda/Akaryakıt/Kırtasiye/Teknoloji/Konaklama/Diğer", "toplam_tutar": "0.00", "toplam_kdv": "0.00"}}, ...]
+        """
+
+def model_json(metin):
+    with OLCUM.sure("json_cozumleme_saniye"): return json.loads(metin.replace("```json", "").replace("```", "").strip())
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+import time
+
+import httpx
+
+from gemini_motor import TEMEL_URL
+from olcum import OLCUM
+
+# --- MODEL LİSTESİ (TTL + GÖMÜLÜ YEDEK) ---
+# Kenar çubuğu her rerun'da çizilir; liste API'ye sorulmadan hemen döner. Son başarılı liste diskte saklanır
+# (süreç yeniden başlayınca da geçerli), TTL dolunca arka planda yenilenir. Hiç liste yoksa ya da API'ye
+# ulaşılamazsa gömülü varsayılan liste kullanılır; sayfa hiçbir durumda uzak çağrıyı beklemez.
+
+VARSAYILAN_MODELLER = ["gemini-2.5-flash", "gemini-2.5-flash-lite", "gemini-2.0-flash", "gemini-2.0-flash-lite", "gemini-2.5-pro"]
+MODEL_TTL = int(os.environ.get("MUHABESE_MODEL_TTL", 24 * 3600))
+HATA_BEKLEME = 300 # Yenileme başarısızsa tekrar denemeden önce (sn)
+ONCELIK = ("2.5-flash", "2.0-flash", "1.5-flash") # Listede önce bunlar (sırasıyla), sonra kalanlar
+
+def sirala(tum):
+    gruplar = [[m for m in tum if o in m] for o in ONCELIK]
+    onde = [m for g in gruplar for m in g]
+    return onde + [m for m in tum if m not in onde]
+
+def modelleri_cek(api_key, temel_url=TEMEL_URL, zaman_asimi=10):
+    with OLCUM.sure("model_listesi_saniye"):
+        r = httpx.get(f"{temel_url.rstrip('/')}/models", params={"key": api_key, "pageSize": 1000}, timeout=zaman_asimi)
+    r.raise_for_status()
+    tum = [m["name"].replace("models/", "") for m in r.json().get("models", []) if "generateContent" in m.get("supportedGenerationMethods", [])]
+    if not tum: raise ValueError("Model listesi boş")
+    return sirala(tum)
+
+class ModelListesi:
+    def __init__(self, api_key, yol, ttl=MODEL_TTL, temel_url=TEMEL_URL):
+        self.api_key = api_key
+        self.yol = yol
+        self.ttl = ttl
+        self.temel_url = temel_url
+        self._kilit = threading.Lock()
+        self._liste = None
+        self._zaman = 0.0 # Listenin çekildiği an
+        self._son_deneme = 0.0
+        self._yenileniyor = False
+        try:
+            with open(yol, encoding="utf-8") as f: kayit = json.load(f)
+            if kayit.get("modeller"): self._liste, self._zaman = list(kayit["modeller"]), float(kayit.get("zaman", 0))
+        except (OSError, ValueError, AttributeError): pass
+
+    def getir(self):
+        # Her zaman hemen döner; eski ya da eksikse yenileme arka planda başlar
+        if self._liste is None or time.time() - self._zaman >= self.ttl: self._arka_planda_yenile()
+        return list(self._liste or VARSAYILAN_MODELLER)
+
+    def _arka_planda_yenile(self):
+        with self._kilit:
+            if self._yenileniyor or time.time() - self._son_deneme < HATA_BEKLEME: return
+            self._yenileniyor, self._son_deneme = True, time.time()
+        threading.Thread(target=self.yenile, name="model-listesi", daemon=True).start()
+
+    def yenile(self):
+        try:
+            liste = modelleri_cek(self.api_key, self.temel_url)
+            self._liste, self._zaman = liste, time.time()
+            os.makedirs(os.path.dirname(os.path.abspath(self.yol)), exist_ok=True)
+            gecici = f"{self.yol}.{os.getpid()}.tmp"
+            with open(gecici, "w", encoding="utf-8") as f: json.dump({"zaman": self._zaman, "modeller": liste}, f)
+            os.replace(gecici, self.yol)
+            return True
+        except Exception:
+            OLCUM.sayac("model_listesi_hata_toplam")
+            return False
+        finally:
+            with self._kilit: self._yenileniyor = False
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# --- MUHASEBE MOTORU (SÜTUNSAL) ---
+# Satır satır iterrows yerine tüm tablo tek seferde: tutarlar vektörel ayrıştırılır,
+# hesap kodları sözlük eşlemesiyle bulunur, Borç/Alacak satırları dizi işlemleriyle üretilir.
+
+YEVMIYE_KOLONLARI = ["Tarih", "Hesap Kodu", "Açıklama", "Borç", "Alacak"]
+DENGE_TOLERANSI = 0.005
+
+def temizle_ve_sayiya_cevir(deger):
+    if pd.isna(deger) or deger == "": return 0.0
+    try:
+        s = str(deger).replace("₺", "").replace("TL", "").strip()
+        if "," in s and "." in s: s = s.replace(".", "").replace(",", ".")
+        elif "," in s: s = s.replace(",", ".")
+        return float(s)
+    except: return 0.0
+
+def tutar_serisine_cevir(seri):
+    # temizle_ve_sayiya_cevir'in vektörel karşılığı: "1.234,50 TL" -> 1234.5, okunamayan -> 0.0
+    s = seri.astype("string").str.replace("₺", "", regex=False).str.replace("TL", "", regex=False).str.strip()
+    ikisi_de = s.str.contains(",", regex=False) & s.str.contains(".", regex=False)
+    s = s.mask(ikisi_de.fillna(False), s.str.replace(".", "", regex=False)) # Binlik ayırıcı nokta
+    s = s.str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").fillna(0.0).astype(float)
+
+def _kolon(df, ad, varsayilan):
+    if ad in df.columns: return df[ad].fillna(varsayilan)
+    return pd.Series(varsayilan, index=df.index)
+
+def muhasebe_fisne_cevir(df_ham, hk):
+    # Dönüş: (yevmiye, denge_raporu). Rapor borç ve alacağı tutmayan kaynak satırları listeler.
+    bos = pd.DataFrame(columns=YEVMIYE_KOLONLARI)
+    if df_ham is None or df_ham.empty: return bos, pd.DataFrame(columns=["Satır", "Tarih", "Açıklama", "Borç", "Alacak", "Fark"])
+
+    toplam = tutar_serisine_cevir(_kolon(df_ham, 'toplam_tutar', 0)).to_numpy()
+    kdv = tutar_serisine_cevir(_kolon(df_ham, 'toplam_kdv', 0)).to_numpy()
+    matrah = toplam - kdv
+    tarih = _kolon(df_ham, 'tarih', datetime.now().strftime('%d.%m.%Y')).astype(str).to_numpy()
+    kategori = _kolon(df_ham, 'kategori', 'Diğer').astype(str)
+    gider_kodu = kategori.map(hk).fillna(hk["Diğer"]).to_numpy()
+    aciklama = (kategori + " - " + _kolon(df_ham, 'isyeri_adi', 'Evrak').astype(str)).to_numpy()
+    ekstre = _kolon(df_ham, 'dosya_adi', '').astype(str).str.contains("Ekstre", regex=False).to_numpy()
+    alacak_hesabi = np.where(ekstre, hk["Banka"], hk["Kasa"])
+    sira = np.arange(len(df_ham))
+
+    def blok(maske, hesap, acik, borc, alacak, alt):
+        return pd.DataFrame({"Tarih": tarih[maske], "Hesap Kodu": hesap[maske] if isinstance(hesap, np.ndarray) else hesap,
+                             "Açıklama": acik[maske] if isinstance(acik, np.ndarray) else acik,
+                             "Borç": borc[maske], "Alacak": alacak[maske], "_sira": sira[maske], "_alt": alt})
+
+    sifir = np.zeros(len(df_ham))
+    hepsi = np.ones(len(df_ham), dtype=bool)
+    yevmiye = pd.concat([
+        blok(matrah > 0, gider_kodu, aciklama, matrah, sifir, 0),
+        blok(kdv > 0, hk["KDV"], "KDV", kdv, sifir, 1),
+        blok(hepsi, alacak_hesabi, "Ödeme", sifir, toplam, 2),
+    ], ignore_index=True)
+    # Her kaynak satırın fişleri yan yana: gider, KDV, ödeme
+    yevmiye = yevmiye.sort_values(["_sira", "_alt"], kind="mergesort").drop(columns=["_sira", "_alt"]).reset_index(drop=True)
+
+    borc = np.where(matrah > 0, matrah, 0) + np.where(kdv > 0, kdv, 0)
+    fark = borc - toplam
+    dengesiz = np.abs(fark) > DENGE_TOLERANSI
+    rapor = pd.DataFrame({"Satır": sira[dengesiz] + 1, "Tarih": tarih[dengesiz], "Açıklama": aciklama[dengesiz],
+                          "Borç": borc[dengesiz], "Alacak": toplam[dengesiz], "Fark": fark[dengesiz]})
+    return yevmiye, rapor
@@ -0,0 +1,180 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from datetime import date
+
+from defter_deposu import tr_temizle
+from muhasebe import temizle_ve_sayiya_cevir
+
+# --- MÜKERRER FİŞ İNDEKSİ ---
+# Müşteri başına bir kez kurulur, sonra artımlı güncellenir; her yeni fiş O(1) sözlük aramasıyla kontrol edilir.
+# Anahtarlar:
+#   "alan"  : normalize (işyeri, fiş no, tarih, tutar) -> kesin mükerrer
+#   "gevsek_fis" / "gevsek_ekstre": (tarih, tutar) -> olası mükerrer. Sadece fiş ile ekstre satırı arasında aranır
+#             (aynı harcamanın iki kaydı); fiş no'su farklı iki fiş ya da aynı ekstrenin iki satırı eşleşmez
+#   "qr"    : QR içeriğinin özeti -> kesin mükerrer
+#   "bant"  : 64 bit dHash'in 16 bitlik 4 bandı -> Hamming <= 3 olan benzer görseller (güvercin yuvası: en az bir bant tutar)
+# Kontrol sonucu (seviye, açıklama): KESIN olanlar varsayılan olarak kaydedilmez, OLASI olanlar sadece uyarılır.
+
+BANT_SAYISI = 4
+HAMMING_SINIRI = 3
+SINIR_PENCERESI = 5 # Ekstre parçaları birleşirken sayfa sınırında karşılaştırılan satır sayısı
+KESIN, OLASI = "kesin", "olasi"
+ARANAN = {"gevsek_fis": "gevsek_ekstre", "gevsek_ekstre": "gevsek_fis"} # Gevşek anahtar karşı türde aranır
+
+def _sade(metin):
+    return "".join(c for c in tr_temizle(metin) if c.isalnum())
+
+def _tarih(deger):
+    # "GG.AA.YYYY" / "GG/AA/YYYY" / "YYYY-AA-GG" -> "YYYY-AA-GG"; okunamazsa ""
+    parca = str(deger or "").strip().replace("/", ".").replace("-", ".").split(".")
+    if len(parca) != 3: return ""
+    y, m, d = parca if len(parca[0]) == 4 else parca[::-1]
+    try: return date(int(y), int(m), int(d)).isoformat()
+    except ValueError: return ""
+
+def _fis_no(deger):
+    # Ekstre satırlarında (ve Sheets'te "-") fiş no yoktur
+    return _sade(deger).lstrip("0") if deger and str(deger) not in ("-", "...") else ""
+
+def anahtarlar(kayit, isyeri=None, fis_no=None, tarih=None, tutar=None):
+    # kayit: analiz sonucu (dict). Defter satırları için alanlar ayrıca verilebilir.
+    if kayit is not None:
+        isyeri, fis_no, tarih, tutar = kayit.get("isyeri_adi"), kayit.get("fiş_no"), kayit.get("tarih"), kayit.get("toplam_tutar")
+    tutar = round(tutar if isinstance(tutar, float) else temizle_ve_sayiya_cevir(tutar), 2)
+    tarih = _tarih(tarih)
+    cikti = []
+    if tutar > 0 and tarih:
+        fis = _fis_no(fis_no)
+        cikti.append(("alan", f"{_sade(isyeri)}|{fis}|{tarih}|{tutar:.2f}"))
+        cikti.append(("gevsek_fis" if fis else "gevsek_ekstre", f"{tarih}|{tutar:.2f}"))
+    if kayit is not None:
+        if kayit.get("qr_data"): cikti.append(("qr", hashlib.sha1(str(kayit["qr_data"]).strip().encode("utf-8")).hexdigest()))
+        if kayit.get("phash"):
+            h = int(kayit["phash"], 16)
+            cikti += [("bant", f"{i}:{(h >> (16 * i)) & 0xFFFF:04x}") for i in range(BANT_SAYISI)]
+    return cikti
+
+def _satir_anahtari(v):
+    return f"{_sade(v.get('isyeri_adi'))}|{_tarih(v.get('tarih'))}|{temizle_ve_sayiya_cevir(v.get('toplam_tutar')):.2f}"
+
+def sayfa_sinirinda_birlestir(parcalar, pencere=SINIR_PENCERESI):
+    # Ekstre parçalarının satır listeleri sayfa sırasıyla birleştirilir. Bir parçanın ilk satırlarından biri
+    # önceki parçanın son satırlarından biriyle aynıysa (sayfa başında tekrarlanan / iki sayfaya bölünen satır) atılır.
+    # Aynı sayfa içindeki gerçek tekrarlar (aynı gün, aynı işyeri, aynı tutar) korunur.
+    birlesik = []
+    for parca in parcalar:
+        kuyruk = Counter(_satir_anahtari(v) for v in birlesik[-pencere:])
+        for j, v in enumerate(v for v in parca if isinstance(v, dict)):
+            a = _satir_anahtari(v)
+            if j < pencere and kuyruk[a] > 0: kuyruk[a] -= 1; continue
+            birlesik.append(v)
+    return birlesik
+
+class MukerrerIndeksi:
+    def __init__(self, yol):
+        os.makedirs(os.path.dirname(os.path.abspath(yol)), exist_ok=True)
+        self._kilit = threading.Lock()
+        self._db = sqlite3.connect(yol, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS anahtar (musteri TEXT NOT NULL, tur TEXT NOT NULL, deger TEXT NOT NULL, kaynak TEXT, phash TEXT,
+                PRIMARY KEY (musteri, tur, deger, kaynak));
+            CREATE TABLE IF NOT EXISTS durum (musteri TEXT PRIMARY KEY, son_satir INTEGER NOT NULL);
+        """)
+        # Eski şemaya eklenen kolonlar: bag = kaydedilen fişin "alan" anahtarı (QR / görsel anahtarları Sheets'te olmadığı için
+        # yeniden kurulumda sadece fiş defterde hâlâ duruyorsa korunur), tam = indekslenen defterin son tam çekim zamanı
+        for tablo, kolon in (("anahtar", "bag TEXT"), ("durum", "tam REAL")):
+            try: self._db.execute(f"ALTER TABLE {tablo} ADD COLUMN {kolon}")
+            except sqlite3.OperationalError: pass # Kolon zaten var
+        self._db.commit()
+        self._bellek = {} # musteri -> {tur: {deger: [(kaynak, phash)]}}
+
+    def _yukle(self, musteri):
+        if musteri not in self._bellek:
+            ind = defaultdict(lambda: defaultdict(list))
+            for tur, deger, kaynak, phash in self._db.execute("SELECT tur, deger, kaynak, phash FROM anahtar WHERE musteri=?", (musteri,)):
+                ind[tur][deger].append((kaynak, phash))
+            self._bellek[musteri] = ind
+        return self._bellek[musteri]
+
+    def _ekle(self, musteri, anahtar_listesi, kaynak, phash=None, bag=None):
+        ind = self._yukle(musteri)
+        for tur, deger in anahtar_listesi:
+            if (kaynak, phash) not in ind[tur][deger]: ind[tur][deger].append((kaynak, phash))
+        self._db.executemany("INSERT OR IGNORE INTO anahtar (musteri, tur, deger, kaynak, phash, bag) VALUES (?, ?, ?, ?, ?, ?)",
+                             [(musteri, t, d, kaynak, phash, bag) for t, d in anahtar_listesi])
+
+    def defterden_guncelle(self, musteri, defter):
+        # Sheets geçmişi (yerel defter) artımlı eklenir: sadece son indekslenen satırdan sonrakiler.
+        # Defter baştan çekildiyse (silinen / düzeltilen satırlar, kayan satır numaraları) indeks yeniden kurulur
+        with self._kilit:
+            satir = self._db.execute("SELECT son_satir, tam FROM durum WHERE musteri=?", (musteri,)).fetchone()
+            son, tam = satir if satir else (0, None)
+            defter_tam = defter.son_tam(musteri)
+            if satir and (tam != defter_tam or son > defter.son_satir(musteri)):
+                # sifirla + baştan tarama; kaydedilen fişlerin QR / görsel anahtarları (Sheets'te yoklar) fiş defterde
+                # hâlâ duruyorsa (alan anahtarı yeniden bulunduysa) geri eklenir, silinmiş fişinkiler atılır
+                sakla = self._db.execute("SELECT tur, deger, kaynak, phash, bag FROM anahtar WHERE musteri=? AND bag IS NOT NULL AND tur IN ('qr', 'bant')",
+                                         (musteri,)).fetchall()
+                self._sifirla(musteri)
+                son = self._defteri_tara(musteri, defter, 0)
+                alanlar = self._yukle(musteri).get("alan", {})
+                for tur, deger, kaynak, phash, bag in sakla:
+                    if bag in alanlar: self._ekle(musteri, [(tur, deger)], kaynak, phash, bag)
+            else: son = self._defteri_tara(musteri, defter, son)
+            self._db.execute("INSERT OR REPLACE INTO durum (musteri, son_satir, tam) VALUES (?, ?, ?)", (musteri, son, defter_tam))
+            self._db.commit()
+
+    def _defteri_tara(self, musteri, defter, son):
+        for no, isyeri, fis_no, tarih, tutar in defter.satirlar_sonrasi(musteri, son):
+            self._ekle(musteri, anahtarlar(None, isyeri, fis_no, tarih, float(tutar or 0)), f"Sheets satır {no + 1}")
+            son = max(son, no)
+        return son
+
+    def ekle(self, musteri, kayitlar):
+        # Kaydedilen fişler: QR ve görsel özeti Sheets'te olmadığı için buradan eklenir
+        with self._kilit:
+            for k in kayitlar:
+                a = anahtarlar(k)
+                self._ekle(musteri, a, k.get("dosya_adi", "-"), k.get("phash"), next((d for t, d in a if t == "alan"), None))
+            self._db.commit()
+
+    def _sifirla(self, musteri):
+        self._db.execute("DELETE FROM anahtar WHERE musteri=?", (musteri,))
+        self._db.execute("DELETE FROM durum WHERE musteri=?", (musteri,))
+        self._bellek.pop(musteri, None)
+
+    def sifirla(self, musteri):
+        with self._kilit:
+            self._sifirla(musteri)
+            self._db.commit()
+
+    @staticmethod
+    def _bul(ind, anahtar_listesi, phash, grup=None):
+        # grup: aynı ekstrenin satırları birbirinin mükerreri sayılmaz (aynı gün aynı tutarlı iki gerçek harcama)
+        bulunan = {}
+        for tur, deger in anahtar_listesi:
+            for kaynak, aday, *aday_grup in ind.get(ARANAN.get(tur, tur), {}).get(deger, []):
+                if grup and aday_grup and aday_grup[0] == grup: continue
+                if tur == "bant":
+                    if not (phash and aday and bin(int(phash, 16) ^ int(aday, 16)).count("1") <= HAMMING_SINIRI): continue
+                bulunan.setdefault(tur.split("_")[0], kaynak)
+        if "qr" in bulunan: return KESIN, f"🔁 Mükerrer (aynı QR: {bulunan['qr']})"
+        if "alan" in bulunan: return KESIN, f"🔁 Mükerrer (aynı fiş: {bulunan['alan']})"
+        if "bant" in bulunan: return OLASI, f"❔ Olası mükerrer (benzer görsel: {bulunan['bant']})"
+        if "gevsek" in bulunan: return OLASI, f"❔ Olası mükerrer (fiş ve ekstre satırı, aynı tarih ve tutar: {bulunan['gevsek']})"
+        return None
+
+    def toplu_kontrol(self, musteri, kayitlar):
+        # Her kayıt için None ya da (KESIN / OLASI, açıklama); aynı yüklemedeki tekrarlar da yakalanır
+        with self._kilit: ind = self._yukle(musteri)
+        parti = defaultdict(lambda: defaultdict(list))
+        sonuc = []
+        for i, k in enumerate(kayitlar):
+            a = anahtarlar(k)
+            grup = k.get("dosya_adi") if not _fis_no(k.get("fiş_no")) else None
+            sonuc.append(self._bul(ind, a, k.get("phash")) or self._bul(parti, a, k.get("phash"), grup))
+            for tur, deger in a: parti[tur][deger].append((f"bu yüklemede #{i+1}", k.get("phash"), grup))
+        return sonuc
@@ -0,0 +1,138 @@
+import bisect
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- ÖLÇÜM (SAYAÇ + SÜRE) ---
+# Süreç genelinde tek kayıt defteri (OLCUM). Aşamalar süre ölçer (sure / sure_ekle), olaylar sayaç artırır (sayac).
+# Süreler Prometheus histogramı olarak kovalara, ayrıca p50/p95 için son örneklere yazılır.
+# Dışa aktarım: prometheus() metni (isteğe bağlı küçük HTTP ucu) ve ozet() / JSON (tanılama paneli).
+# Süreç havuzunda ölçülenler (ön işleme süreleri, bayt) sonuçla birlikte döner ve ana süreçte işlenir.
+
+ONEK = "muhabese_"
+ACIKLAMALAR = { # Prometheus "# HELP" satırları; sayaçlar dışa aktarımda "_toplam" yerine "_total" ile biter
+    "dosya": "Analiz edilen dosyalar (mod, sonuç)",
+    "ekstre_parca": "Modele gönderilen ekstre parçaları",
+    "gemini_gonderilen_bayt": "Gemini isteklerinin gövde baytı",
+    "gemini_istek": "Gemini HTTP istekleri (durum kodu ya da baglanti)",
+    "gemini_token": "Gemini usageMetadata token sayıları (istem, cevap, toplam)",
+    "gemini_yeniden_deneme": "Gemini isteği yeniden denemeleri",
+    "model_listesi_hata": "Model listesi alınamadı",
+    "onbellek": "Sonuç önbelleği aramaları (isabet, iska)",
+    "paket_fis": "Paket isteklerindeki fişler (okundu, tekliye düştü)",
+    "paket_istek": "Birden çok fiş içeren Gemini istekleri",
+    "qr_hizli": "QR'dan görselsiz okunan fişler",
+    "sheets_yazilan_satir": "Google Sheets'e yazılan satırlar",
+    "yuk_bayt": "Modele gönderilen hazır dosya baytı (biçim)",
+    "yuklenen_bayt": "Kullanıcının yüklediği ham dosya baytı",
+    "ag_asamasi_saniye": "Dosya başına ağ aşaması süresi",
+    "dosya_saniye": "Dosya başına uçtan uca süre (hazırlık başı -> sonuç)",
+    "gemini_istek_saniye": "Gemini HTTP isteği süresi",
+    "gemini_kota_bekleme_saniye": "RPM / TPM sınırlayıcısında bekleme",
+    "hazirlik_saniye": "Ön işleme süresi, havuz bekleme ve aktarım dahil",
+    "json_cozumleme_saniye": "Model cevabının JSON çözümlemesi",
+    "kuyruk_bekleme_saniye": "Hazır dosyanın ağ aşamasını beklemesi",
+    "model_listesi_saniye": "Model listesi isteği süresi",
+    "on_isleme_saniye": "Havuz sürecinde ön işleme aşamaları (decode, qr, kodla, pdf_kucult)",
+    "sheets_okuma_saniye": "Google Sheets okuma süresi",
+    "sheets_yazma_saniye": "Google Sheets yazma süresi",
+}
+KOVALAR = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ORNEK_SAYISI = 2048
+
+def _etiket_metni(etiketler):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in etiketler) + "}" if etiketler else ""
+
+def _baslik(ad, aciklama, tur):
+    return [f"# HELP {ad} {aciklama}", f"# TYPE {ad} {tur}"]
+
+def yuzdelik(degerler, oran):
+    if not degerler: return 0.0
+    s = sorted(degerler)
+    return s[min(len(s) - 1, int(oran * len(s)))]
+
+class Olcum:
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self.sifirla()
+
+    def sifirla(self):
+        with self._kilit:
+            self._sayaclar = defaultdict(float) # (ad, etiketler) -> değer
+            self._sureler = {} # (ad, etiketler) -> {"kova": [...], "toplam": s, "adet": n, "ornek": deque}
+            self.baslangic = time.time()
+
+    def sayac(self, ad, n=1, **etiketler):
+        with self._kilit: self._sayaclar[(ad, tuple(sorted(etiketler.items())))] += n
+
+    def sure_ekle(self, ad, saniye, **etiketler):
+        anahtar = (ad, tuple(sorted(etiketler.items())))
+        with self._kilit:
+            h = self._sureler.get(anahtar)
+            if h is None: h = self._sureler[anahtar] = {"kova": [0] * len(KOVALAR), "toplam": 0.0, "adet": 0, "ornek": deque(maxlen=ORNEK_SAYISI)}
+            i = bisect.bisect_left(KOVALAR, saniye)
+            if i < len(KOVALAR): h["kova"][i] += 1
+            h["toplam"] += saniye; h["adet"] += 1; h["ornek"].append(saniye)
+
+    @contextmanager
+    def sure(self, ad, **etiketler):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.sure_ekle(ad, time.perf_counter() - t0, **etiketler)
+
+    def hazir_olcumlerini_ekle(self, hazir):
+        # Süreç havuzundan dönen HazirDosya (ya da listesi): aşama süreleri ve yüklenen / gönderilen bayt
+        for h in hazir if isinstance(hazir, list) else [hazir]:
+            for asama, saniye in (getattr(h, "sureler", None) or {}).items(): self.sure_ekle("on_isleme_saniye", saniye, asama=asama)
+            if getattr(h, "ham_bayt", 0): self.sayac("yuklenen_bayt_toplam", h.ham_bayt)
+            if getattr(h, "bayt", 0): self.sayac("yuk_bayt_toplam", h.bayt, bicim=h.mime_type)
+
+    # --- DIŞA AKTARIM ---
+    def ozet(self):
+        with self._kilit:
+            sayaclar = [{"ad": ad, **dict(et), "deger": v} for (ad, et), v in sorted(self._sayaclar.items())]
+            sureler = [{"ad": ad, **dict(et), "adet": h["adet"], "toplam_sn": round(h["toplam"], 3),
+                        "p50_sn": round(yuzdelik(h["ornek"], 0.5), 4), "p95_sn": round(yuzdelik(h["ornek"], 0.95), 4),
+                        "max_sn": round(max(h["ornek"], default=0), 4)} for (ad, et), h in sorted(self._sureler.items())]
+        return {"baslangic": self.baslangic, "sayaclar": sayaclar, "sureler": sureler}
+
+    def json(self):
+        return json.dumps(self.ozet(), ensure_ascii=False, indent=1)
+
+    def prometheus(self):
+        satirlar = []
+        with self._kilit:
+            turler = set()
+            for (ad, et), v in sorted(self._sayaclar.items()):
+                kok = ad.removesuffix("_toplam")
+                if ad not in turler: satirlar += _baslik(f"{ONEK}{kok}_total", ACIKLAMALAR.get(kok, kok), "counter"); turler.add(ad)
+                satirlar.append(f"{ONEK}{kok}_total{_etiket_metni(et)} {v:g}")
+            for (ad, et), h in sorted(self._sureler.items()):
+                if ad not in turler: satirlar += _baslik(f"{ONEK}{ad}", ACIKLAMALAR.get(ad, ad), "histogram"); turler.add(ad)
+                birikimli = 0
+                for sinir, n in zip(KOVALAR, h["kova"]):
+                    birikimli += n
+                    satirlar.append(f"{ONEK}{ad}_bucket{_etiket_metni(et + (('le', f'{sinir:g}'),))} {birikimli}")
+                satirlar.append(f"{ONEK}{ad}_bucket{_etiket_metni(et + (('le', '+Inf'),))} {h['adet']}")
+                satirlar.append(f"{ONEK}{ad}_sum{_etiket_metni(et)} {h['toplam']:.6f}")
+                satirlar.append(f"{ONEK}{ad}_count{_etiket_metni(et)} {h['adet']}")
+        return "\n".join(satirlar) + "\n"
+
+OLCUM = Olcum()
+
+def prometheus_ucu_baslat(port, olcum=OLCUM, adres="127.0.0.1"):
+    # GET /metrics -> Prometheus metin biçimi. Streamlit'in kendi sunucusuna uç eklenemediği için ayrı bir thread'de.
+    # Varsayılan sadece yerel: ölçümler (dosya sayıları, hatalar) dışarı açılacaksa adres bilerek verilir
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_GET(self):
+            govde = olcum.prometheus().encode("utf-8") if self.path.startswith("/metrics") else olcum.json().encode("utf-8")
+            tur = "text/plain; version=0.0.4" if self.path.startswith("/metrics") else "application/json"
+            self.send_response(200); self.send_header("Content-Type", tur); self.send_header("Content-Length", str(len(govde)))
+            self.end_headers(); self.wfile.write(govde)
+        def log_message(self, *a): pass
+    sunucu = ThreadingHTTPServer((adres, port), Isleyici)
+    threading.Thread(target=sunucu.serve_forever, name="olcum-ucu", daemon=True).start()
+    return sunucu
@@ -0,0 +1,200 @@
+import base64
+import io
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image, features
+from pypdf import PdfReader, PdfWriter
+from pyzbar.pyzbar import decode
+
+# --- ÖN İŞLEME (TEK DECODE, BÜTÇELİ KODLAMA) ---
+# Her dosya bir kez açılır: JPEG'ler "draft" ile küçültülmüş decode edilir,
+# QR aynı görüntünün gri küçük kopyasında aranır, yükleme için görsel aynı kopyadan üretilir.
+# Tam çözünürlük sadece küçük kopyada QR bulunamazsa açılır.
+# Uyarlamalı kodlama (MUHABESE_UYARLAMALI_KODLAMA=1): çözünürlük metin satırı yüksekliğinden seçilir (küçük puntolu
+# sık yazılı belge büyük, iri yazılı seyrek fiş MIN_BOYUT'a kadar küçük gider), renksiz belgeler gri gider,
+# sonuç bayt bütçesine sığana kadar kalite/boyut düşürülür; bütçeyi aşan PDF'lerin gömülü görselleri küçültülür.
+# Alan doğruluğu dev/regresyon_kodlama.py ile gerçek API'de ölçülene kadar varsayılan eski sabit 1024px/q70 kodlamadır.
+
+HEDEF_BOYUT = 1024 # Eski sabit uzun kenar (uyarlamali=False); uyarlamalı kodlamada satır ölçülemezse
+EN_BUYUK_BOYUT = 1800 # Uyarlamalı kodlamada uzun kenar üst sınırı
+SATIR_HEDEF = 6 # Gönderilen görselde metin satırı yüksekliği (px); küçültme bunun altına indirmez
+KISA_KENAR_MIN = 720 # Draft decode'da kısa kenar alt sınırı (ince uzun termal fiş)
+MIN_BOYUT = 800 # Uyarlamalı kodlamada uzun kenar alt sınırı (satır ölçüsü ve bütçe küçültmesi)
+KALITELER = (65, 55, 45) # İlk adım eski q70'in altında
+RENK_ESIGI = 18 # Ortalama doygunluk bunun altındaysa belge gri kodlanır
+BAYT_BUTCESI = int(os.environ.get("MUHABESE_BAYT_BUTCESI", 150 * 1024)) # Görsel başına (base64 öncesi)
+PDF_BUTCESI = int(os.environ.get("MUHABESE_PDF_BUTCESI", 2 * 1024 * 1024))
+PDF_GORSEL_BOYUT = 1800 # PDF küçültmede gömülü görsellerin uzun kenarı
+GORSEL_BICIMI = os.environ.get("MUHABESE_GORSEL_BICIMI", "jpeg").lower() # "jpeg" / "webp"
+UYARLAMALI = os.environ.get("MUHABESE_UYARLAMALI_KODLAMA", "0") == "1" # Doğruluk ölçülene kadar kapalı
+QR_BOYUT = 1600 # QR taraması için uzun kenar
+EKSTRE_SAYFA = 2 # Ekstre PDF'lerinde istek başına sayfa
+
+@dataclass
+class HazirDosya:
+    base64_data: str
+    mime_type: str
+    qr_data: str = None
+    phash: str = None # 64 bit dHash (hex), mükerrer görsel tespiti için
+    sayfa: tuple = None # Ekstre parçası: (ilk sayfa, son sayfa, toplam sayfa)
+    sureler: dict = None # Aşama süreleri (sn); havuz sürecinde ölçülür, ana süreçte ölçüme işlenir
+    ham_bayt: int = 0 # Yüklenen dosya
+    bayt: int = 0 # Gönderilen yük (base64 öncesi)
+
+def dhash(gri):
+    # gri: PIL "L" görüntü. 9x8'e küçült, yan yana pikselleri karşılaştır -> 64 bit
+    k = np.asarray(gri.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    bitler = (k[:, 1:] > k[:, :-1]).flatten()
+    return f"{int(''.join('1' if b else '0' for b in bitler), 2):016x}"
+
+def qr_kodu_oku_ve_filtrele(gri):
+    # gri: 2 boyutlu uint8 numpy dizisi (veya PIL "L" görüntüsü)
+    try:
+        for obj in decode(gri):
+            raw = obj.data.decode("utf-8", errors="ignore")
+            if len(raw) > 10: return raw
+        return None
+    except: return None
+
+def _olcekli_boyut(boyut, uzun_kenar, kisa_kenar=0):
+    k = min(1.0, max(uzun_kenar / max(boyut), kisa_kenar / min(boyut)))
+    return max(1, int(boyut[0] * k)), max(1, int(boyut[1] * k))
+
+def satir_yuksekligi(gri):
+    # Metin satırı yüksekliği (px, gri'nin ölçeğinde): mürekkep içeren ardışık piksel satırlarının ortanca boyu.
+    # Kenar yoğunluğu puntoyu ayırt etmez (küçük puntolu sık A4 az kenar pikseli verir), satır boyu eder.
+    # 3'ten az satır bulunursa (fotoğraf, boş sayfa) None
+    a = np.asarray(gri, dtype=np.int16)
+    if a.ndim != 2 or a.shape[0] < 8: return None
+    murekkep = (a < np.median(a) - 60).mean(axis=1) > 0.002
+    kenar = np.diff(np.concatenate(([0], murekkep.astype(np.int8), [0])))
+    boylar = np.flatnonzero(kenar == -1) - np.flatnonzero(kenar == 1)
+    boylar = boylar[(boylar >= 3) & (boylar < a.shape[0] // 10)]
+    return float(np.median(boylar)) if len(boylar) >= 3 else None
+
+def renkli_mi(rgb):
+    k = rgb.copy()
+    k.thumbnail((256, 256))
+    a = np.asarray(k, dtype=np.int16)
+    return float((a.max(axis=2) - a.min(axis=2)).mean()) > RENK_ESIGI
+
+def hedef_boyut(boyut, satir):
+    # satir: boyut ölçeğinde satır yüksekliği. Satır SATIR_HEDEF'e inene kadar küçültülür, büyütülmez;
+    # uzun kenar MIN_BOYUT-EN_BUYUK_BOYUT arasında kalır (iri yazılı seyrek belge 1024'ün altına iner). Satır ölçülemediyse eski HEDEF_BOYUT
+    if not satir: return _olcekli_boyut(boyut, HEDEF_BOYUT)
+    return _olcekli_boyut(boyut, min(EN_BUYUK_BOYUT, max(MIN_BOYUT, max(boyut) * SATIR_HEDEF / satir)))
+
+def _kaydet(img, bicim, kalite):
+    buf = io.BytesIO()
+    if bicim == "webp": img.save(buf, "WEBP", quality=kalite, method=4)
+    else: img.save(buf, "JPEG", quality=kalite, optimize=True)
+    return buf.getvalue()
+
+def butceli_kodla(img, butce=BAYT_BUTCESI, bicim=GORSEL_BICIMI):
+    # Kalite adım adım düşer; yetmezse boyut %80'e iner (MIN_BOYUT'a kadar). Bütçeye sığan ilk sonuç döner
+    if bicim == "webp" and not features.check("webp"): bicim = "jpeg"
+    while True:
+        for kalite in KALITELER:
+            veri = _kaydet(img, bicim, kalite)
+            if len(veri) <= butce: return veri, f"image/{bicim}"
+        if max(img.size) <= MIN_BOYUT: return veri, f"image/{bicim}"
+        img = img.resize(_olcekli_boyut(img.size, max(MIN_BOYUT, int(max(img.size) * 0.8))), Image.LANCZOS)
+
+def pdf_kucult(bytes_data, butce=PDF_BUTCESI):
+    # Bütçeyi aşan PDF: gömülü görseller PDF_GORSEL_BOYUT'a indirilip yeniden sıkıştırılır, içerik akışları
+    # sıkıştırılır, tekrarlanan nesneler birleştirilir. Küçülmezse ya da okunamazsa orijinali döner.
+    if len(bytes_data) <= butce: return bytes_data
+    try:
+        okuyucu = PdfReader(io.BytesIO(bytes_data))
+        if okuyucu.is_encrypted: okuyucu.decrypt("")
+        yazici = PdfWriter(clone_from=okuyucu)
+        for sayfa in yazici.pages:
+            for gorsel in sayfa.images:
+                try:
+                    im = gorsel.image
+                    im.thumbnail((PDF_GORSEL_BOYUT, PDF_GORSEL_BOYUT))
+                    if im.mode not in ("L", "RGB"): im = im.convert("RGB")
+                    if im.mode == "RGB" and not renkli_mi(im): im = im.convert("L")
+                    gorsel.replace(im, quality=60)
+                except Exception: continue # Maskeli / desteklenmeyen görsel olduğu gibi kalır
+            sayfa.compress_content_streams()
+        yazici.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+        buf = io.BytesIO()
+        yazici.write(buf)
+        return buf.getvalue() if buf.tell() < len(bytes_data) else bytes_data
+    except Exception: return bytes_data
+
+def goruntu_hazirla(bytes_data, mime_type, uyarlamali=UYARLAMALI, bicim=GORSEL_BICIMI):
+    # uyarlamali=False: eski sabit kodlama (RGB, 1024px, q70, PDF ham) - regresyon karşılaştırması için
+    if mime_type == "application/pdf":
+        t0 = time.perf_counter()
+        veri = pdf_kucult(bytes_data) if uyarlamali else bytes_data
+        return HazirDosya(base64.b64encode(veri).decode('utf-8'), mime_type, sureler={"pdf_kucult": time.perf_counter() - t0},
+                          ham_bayt=len(bytes_data), bayt=len(veri))
+
+    t0 = time.perf_counter()
+    img = Image.open(io.BytesIO(bytes_data))
+    tam_boyut = img.size
+    # JPEG: DCT ölçekleme ile 1/2, 1/4, 1/8 boyutta decode (12MP fotoğrafta asıl kazanç burada)
+    if img.format == "JPEG": img.draft("RGB", _olcekli_boyut(tam_boyut, max(QR_BOYUT, EN_BUYUK_BOYUT), KISA_KENAR_MIN))
+    rgb = img.convert("RGB")
+    img.close()
+
+    t1 = time.perf_counter()
+    gri = rgb.convert("L")
+    gri.thumbnail((QR_BOYUT, QR_BOYUT))
+    qr_data = qr_kodu_oku_ve_filtrele(np.asarray(gri))
+    phash = dhash(gri)
+    if qr_data is None and gri.size != tam_boyut:
+        # Küçük kopyada bulunamadı: sadece bu durumda tam çözünürlüğe dönülür
+        if rgb.size == tam_boyut: qr_data = qr_kodu_oku_ve_filtrele(np.asarray(rgb.convert("L")))
+        else:
+            with Image.open(io.BytesIO(bytes_data)) as tam:
+                qr_data = qr_kodu_oku_ve_filtrele(np.asarray(tam.convert("L")))
+
+    t2 = time.perf_counter()
+    if uyarlamali:
+        satir = satir_yuksekligi(gri)
+        hedef = hedef_boyut(rgb.size, satir * rgb.size[1] / gri.size[1] if satir else None)
+        if hedef != rgb.size: rgb = rgb.resize(hedef, Image.LANCZOS)
+        veri, mime = butceli_kodla(rgb if renkli_mi(rgb) else rgb.convert("L"), bicim=bicim)
+    else:
+        rgb.thumbnail((HEDEF_BOYUT, HEDEF_BOYUT))
+        veri, mime = _kaydet(rgb, "jpeg", 70), "image/jpeg"
+    del gri
+    sureler = {"decode": t1 - t0, "qr": t2 - t1, "kodla": time.perf_counter() - t2}
+    return HazirDosya(base64.b64encode(veri).decode('utf-8'), mime, qr_data, phash, sureler=sureler, ham_bayt=len(bytes_data), bayt=len(veri))
+
+def pdf_parcala(bytes_data, sayfa_basina=EKSTRE_SAYFA):
+    # PDF -> [(sayfa, parça PDF baytları)], sayfa = (ilk, son, toplam). Bölünmesi gerekmiyorsa ya da
+    # okunamıyorsa (bozuk / şifre çözülemedi) tek parça: [(None, bütün dosya)]
+    try:
+        okuyucu = PdfReader(io.BytesIO(bytes_data))
+        if okuyucu.is_encrypted: okuyucu.decrypt("") # Bankaların boş kullanıcı şifreli ekstreleri
+        toplam = len(okuyucu.pages)
+        if toplam <= sayfa_basina: return [(None, bytes_data)]
+        parcalar = []
+        for bas in range(0, toplam, sayfa_basina):
+            son = min(bas + sayfa_basina, toplam)
+            yazici = PdfWriter()
+            for i in range(bas, son): yazici.add_page(okuyucu.pages[i])
+            buf = io.BytesIO()
+            yazici.write(buf)
+            parcalar.append(((bas + 1, son, toplam), buf.getvalue()))
+        return parcalar
+    except Exception: return [(None, bytes_data)]
+
+def belge_hazirla(bytes_data, mime_type, mod):
+    # Süreç havuzunda çalışır. Fiş -> HazirDosya; ekstre -> sayfa parçalarından [HazirDosya] (paralel gönderilir)
+    if mod != "ekstre": return goruntu_hazirla(bytes_data, mime_type)
+    if mime_type != "application/pdf": return [goruntu_hazirla(bytes_data, mime_type)]
+    t0 = time.perf_counter()
+    parcalar = pdf_parcala(bytes_data)
+    t1 = time.perf_counter()
+    parcalar = [(sayfa, pdf_kucult(veri)) for sayfa, veri in parcalar]
+    sureler = {"pdf_bol": t1 - t0, "pdf_kucult": time.perf_counter() - t1}
+    return [HazirDosya(base64.b64encode(veri).decode('utf-8'), mime_type, sayfa=sayfa, sureler=sureler if i == 0 else None,
+                       ham_bayt=len(bytes_data) if i == 0 else 0, bayt=len(veri)) for i, (sayfa, veri) in enumerate(parcalar)]
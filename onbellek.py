@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- SONUÇ ÖNBELLEĞİ (İÇERİK ADRESLİ) ---
+# Anahtar: dosya baytları + model + mod ("fis"/"ekstre") + prompt sürümü.
+# Aynı fiş tekrar yüklendiğinde Gemini'ye gitmeden sonuç buradan döner.
+
+class SonucOnbellegi:
+    def __init__(self, yol, max_boyut=256 * 1024 * 1024, max_yas=30 * 24 * 3600):
+        os.makedirs(os.path.dirname(os.path.abspath(yol)), exist_ok=True)
+        self.max_boyut = max_boyut
+        self.max_yas = max_yas
+        self._kilit = threading.Lock()
+        self._db = sqlite3.connect(yol, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS sonuclar (
+            anahtar TEXT PRIMARY KEY, veri TEXT NOT NULL, boyut INTEGER NOT NULL,
+            olusturma REAL NOT NULL, son_erisim REAL NOT NULL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_son_erisim ON sonuclar(son_erisim)")
+        self._db.commit()
+
+    @staticmethod
+    def anahtar(dosya_bytes, model, mod, prompt_surumu):
+        h = hashlib.sha256(dosya_bytes)
+        h.update(f"|{model}|{mod}|{prompt_surumu}".encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def _sadelestir(sonuc):
+        # "_" ile başlayan alanlar (ham dosya vb.) önbelleğe yazılmaz
+        if isinstance(sonuc, list): return [SonucOnbellegi._sadelestir(s) for s in sonuc]
+        if isinstance(sonuc, dict): return {k: v for k, v in sonuc.items() if not str(k).startswith("_")}
+        return sonuc
+
+    def getir(self, anahtar):
+        with self._kilit:
+            satir = self._db.execute("SELECT veri, olusturma FROM sonuclar WHERE anahtar=?", (anahtar,)).fetchone()
+            if not satir: return None
+            simdi = time.time()
+            if simdi - satir[1] > self.max_yas:
+                self._db.execute("DELETE FROM sonuclar WHERE anahtar=?", (anahtar,)); self._db.commit()
+                return None
+            self._db.execute("UPDATE sonuclar SET son_erisim=? WHERE anahtar=?", (simdi, anahtar)); self._db.commit()
+        try: return json.loads(satir[0])
+        except: return None
+
+    def kaydet(self, anahtar, sonuc):
+        metin = json.dumps(self._sadelestir(sonuc), ensure_ascii=False)
+        simdi = time.time()
+        with self._kilit:
+            self._db.execute("INSERT OR REPLACE INTO sonuclar VALUES (?, ?, ?, ?, ?)", (anahtar, metin, len(metin.encode("utf-8")), simdi, simdi))
+            self._db.commit()
+
+    def buda(self):
+        # Önce süresi geçenler, sonra toplam boyut sınırın altına inene kadar en eski erişilenler silinir
+        with self._kilit:
+            self._db.execute("DELETE FROM sonuclar WHERE olusturma < ?", (time.time() - self.max_yas,))
+            toplam = self._db.execute("SELECT COALESCE(SUM(boyut), 0) FROM sonuclar").fetchone()[0]
+            if toplam > self.max_boyut:
+                silinecek = []
+                for anahtar, boyut in self._db.execute("SELECT anahtar, boyut FROM sonuclar ORDER BY son_erisim"):
+                    if toplam <= self.max_boyut: break
+                    silinecek.append((anahtar,)); toplam -= boyut
+                self._db.executemany("DELETE FROM sonuclar WHERE anahtar=?", silinecek)
+            self._db.commit()
+
+    def temizle(self):
+        with self._kilit:
+            self._db.execute("DELETE FROM sonuclar"); self._db.commit()
@@ -0,0 +1,86 @@
+import asyncio
+
+from istemler import model_json
+from olcum import OLCUM
+
+# --- ÇOKLU FİŞ PAKETLEME ---
+# Tek tek gelen fiş görselleri kısa bir süre bekletilip tek generateContent çağrısında toplanır:
+# [istem, "[Parça 1]", görsel, "[Parça 2]", görsel, ...] -> [{"parca": 1, ...}, {"parca": 2, ...}]
+# Paket boyu yüke göre belirlenir (adet ve base64 bayt sınırı). Yanıt bozuk/eksikse o fişler için
+# None döner, çağıran tekli çağrıya düşer; paket boyu yarıya iner, başarılı paketlerle tekrar büyür
+# (1'e inerse o çalıştırmada paketleme kapanır).
+
+MAX_ADET = 8
+MAX_BAYT = 4 * 1024 * 1024 # Satır içi istek sınırı 20 MB; doğruluk için paketler küçük tutulur
+BEKLEME = 0.3 # İlk fişten sonra paketin dolması için beklenen süre (sn)
+
+class Paketleyici:
+    def __init__(self, motor, model, prompt_fn, max_adet=MAX_ADET, max_bayt=MAX_BAYT, bekleme=BEKLEME):
+        # prompt_fn(adet) -> paket istemi; parçaların QR ipuçları etiket metnine eklenir
+        self.motor = motor
+        self.model = model
+        self.prompt_fn = prompt_fn
+        self.max_adet = max_adet
+        self.max_bayt = max_bayt
+        self.bekleme = bekleme
+        self.adet = max_adet # Güncel paket boyu (uyarlanır)
+        self.istek = 0
+        self.paketlenen = 0
+        self._bekleyen = []  # [(hazir, future)]
+        self._bayt = 0
+        self._zamanlayici = None
+        self._gorevler = set()
+
+    def paketlenebilir(self, hazir):
+        return hazir.mime_type.startswith("image/") and len(hazir.base64_data) <= self.max_bayt and self.adet > 1
+
+    async def gonder(self, hazir):
+        # Paketin yanıtındaki fiş (dict) ya da None (tekli çağrı gerekir)
+        if not self.paketlenebilir(hazir): return None
+        if self._bekleyen and self._bayt + len(hazir.base64_data) > self.max_bayt: self._bosalt()
+        fut = asyncio.get_running_loop().create_future()
+        self._bekleyen.append((hazir, fut)); self._bayt += len(hazir.base64_data)
+        if len(self._bekleyen) >= self.adet: self._bosalt()
+        elif self._zamanlayici is None: self._zamanlayici = asyncio.create_task(self._sureli_bosalt())
+        return await fut
+
+    async def _sureli_bosalt(self):
+        await asyncio.sleep(self.bekleme)
+        self._zamanlayici = None
+        self._bosalt()
+
+    def _bosalt(self):
+        if self._zamanlayici is not None and self._zamanlayici is not asyncio.current_task(): self._zamanlayici.cancel()
+        self._zamanlayici = None
+        paket, self._bekleyen, self._bayt = self._bekleyen, [], 0
+        if not paket: return
+        gorev = asyncio.create_task(self._paketi_gonder(paket))
+        self._gorevler.add(gorev); gorev.add_done_callback(self._gorevler.discard)
+
+    async def _paketi_gonder(self, paket):
+        if len(paket) == 1: # Paketlenecek eş gelmedi: tekli istem daha doğru
+            paket[0][1].set_result(None); return
+        parts = [{"text": self.prompt_fn(len(paket))}]
+        for i, (hazir, _) in enumerate(paket, 1):
+            ipucu = f" (QR: '{hazir.qr_data}')" if hazir.qr_data else ""
+            parts += [{"text": f"[Parça {i}]{ipucu}"}, {"inline_data": {"mime_type": hazir.mime_type, "data": hazir.base64_data}}]
+        sonuclar = {}
+        try:
+            self.istek += 1
+            metin = await self.motor.uret(self.model, parts)
+            veri = model_json(metin)
+            for v in veri if isinstance(veri, list) else []:
+                if not isinstance(v, dict) or "toplam_tutar" not in v: continue
+                try: i = int(v.pop("parca"))
+                except (KeyError, TypeError, ValueError): continue
+                if 1 <= i <= len(paket): sonuclar.setdefault(i, v)
+        except Exception: pass # Bütün paket tekli çağrılara düşer
+        # Boy uyarlama: eksik yanıt -> yarıya in, tam yanıt -> bir büyüt
+        if len(sonuclar) < len(paket): self.adet = max(1, self.adet // 2)
+        else: self.adet = min(self.max_adet, self.adet + 1)
+        self.paketlenen += len(sonuclar)
+        OLCUM.sayac("paket_istek_toplam")
+        OLCUM.sayac("paket_fis_toplam", len(sonuclar), sonuc="okundu")
+        OLCUM.sayac("paket_fis_toplam", len(paket) - len(sonuclar), sonuc="tekliye_dustu")
+        for i, (_, fut) in enumerate(paket, 1):
+            if not fut.done(): fut.set_result(sonuclar.get(i))
@@ -0,0 +1,63 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+
+from muhasebe import temizle_ve_sayiya_cevir
+
+# --- GİB e-ARŞİV / e-FATURA QR ÇÖZÜCÜ ---
+# Karekod JSON'undan fiş no, tarih, toplam ve KDV doğrudan okunur. Alanlar tam ve tutarlıysa
+# görsel Gemini'ye hiç gönderilmez; eksik kalan işyeri/kategori için VKN hafızasına,
+# o da yoksa ucuz bir metin-only çağrıya gidilir.
+
+FATURA_NO = re.compile(r"^[A-Z0-9]{3}20\d{2}\d{9}$") # GİB: 3 karakter seri + yıl + 9 hane sıra
+VKN = re.compile(r"^\d{10,11}$")
+
+def _anahtar(k):
+    return re.sub(r"\s+", "", str(k)).lower()
+
+def qr_fatura_coz(qr_data):
+    # Geçerli bir GİB karekodu değilse None; değilse fiş alanları (uygulamanın kullandığı biçimde)
+    if not qr_data or not str(qr_data).lstrip().startswith("{"): return None
+    try: ham = json.loads(qr_data)
+    except ValueError: return None
+    if not isinstance(ham, dict): return None
+    j = {_anahtar(k): v for k, v in ham.items()}
+
+    no = str(j.get("no", "")).strip().upper()
+    vkn = str(j.get("vkntckn", "")).strip()
+    try: tarih = date.fromisoformat(str(j.get("tarih", "")).strip()[:10])
+    except ValueError: tarih = None
+    toplam = temizle_ve_sayiya_cevir(j.get("odenecek") or j.get("vergidahil") or 0)
+    kdv_alanlari = [v for k, v in j.items() if k.startswith("hesaplanankdv")]
+    kdv = round(sum(temizle_ve_sayiya_cevir(v) for v in kdv_alanlari), 2)
+
+    if not (FATURA_NO.match(no) and VKN.match(vkn) and tarih and toplam > 0 and kdv_alanlari and 0 <= kdv < toplam): return None
+    return {"fiş_no": no, "tarih": tarih.strftime("%d.%m.%Y"), "toplam_tutar": f"{toplam:.2f}", "toplam_kdv": f"{kdv:.2f}",
+            "vkn": vkn, "ettn": str(j.get("ettn", "")), "_kdv_orani": round(100 * kdv / (toplam - kdv)) if toplam > kdv else 0}
+
+def kategori_promptu(alanlar, kategoriler):
+    return f"""Türkiye'de kesilmiş bir e-Arşiv/e-Fatura: satıcı VKN {alanlar['vkn']}, toplam {alanlar['toplam_tutar']} TL, KDV oranı yaklaşık %{alanlar['_kdv_orani']}.
+    Sadece JSON: {{"kategori": "{'/'.join(kategoriler)}"}}"""
+
+class VknHafizasi:
+    # VKN -> (işyeri adı, kategori). Tam analizlerden ve kullanıcının kaydettiği fişlerden öğrenilir.
+    def __init__(self, yol):
+        os.makedirs(os.path.dirname(os.path.abspath(yol)), exist_ok=True)
+        self._kilit = threading.Lock()
+        self._db = sqlite3.connect(yol, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS vkn (vkn TEXT PRIMARY KEY, isyeri_adi TEXT, kategori TEXT)")
+        self._db.commit()
+
+    def getir(self, vkn):
+        with self._kilit: satir = self._db.execute("SELECT isyeri_adi, kategori FROM vkn WHERE vkn=?", (vkn,)).fetchone()
+        return {"isyeri_adi": satir[0], "kategori": satir[1]} if satir else None
+
+    def ogren(self, kayitlar):
+        satirlar = [(k["vkn"], k.get("isyeri_adi"), k.get("kategori")) for k in kayitlar
+                    if k.get("vkn") and k.get("isyeri_adi") and not str(k["isyeri_adi"]).startswith("VKN ")]
+        if not satirlar: return
+        with self._kilit:
+            self._db.executemany("INSERT OR REPLACE INTO vkn VALUES (?, ?, ?)", satirlar); self._db.commit()
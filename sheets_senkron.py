@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from olcum import OLCUM
+
+# --- SHEETS SENKRON KATMANI ---
+# Spreadsheet / worksheet tutamaçları ve müşteri listesi süreç genelinde önbelleklenir (TTL),
+# yazmalar kuyruğa alınıp sayfa başına tek append_rows çağrısında birleştirilir,
+# okumalar artımlıdır: sadece son okumadan sonra eklenen satırlar çekilir.
+# İstemci dışarıdan verilir; yerel sahte gspread (dev/sahte_gspread.py) ile test edilebilir.
+# gspread ilk Sheets çağrısında yüklenir (modül import'u uygulama açılışını yavaşlatmaz). Müşteri listesi
+# diske de yazılır: kenar çubuğu (musteriler_onbellekten) süreç yeni açılmış olsa da Sheets'i beklemez.
+
+DB_ADI = "Muhabese Veritabanı"
+MUSTERI_SAYFASI = "Musteriler"
+VARSAYILAN_MUSTERI = "Varsayılan Müşteri"
+BASLIKLAR = ["Dosya Adı", "İşyeri", "Fiş No", "Tarih", "Kategori", "Tutar", "KDV", "Zaman", "Durum", "QR"]
+
+class SheetsSenkron:
+    def __init__(self, client, db_adi=DB_ADI, ttl=300, musteri_dosyasi=None):
+        self.client = client
+        self.db_adi = db_adi
+        self.ttl = ttl
+        self.musteri_dosyasi = musteri_dosyasi
+        self._kilit = threading.RLock()
+        self._sheet = None
+        self._ws = {}
+        self._musteriler = None
+        self._musteri_zamani = 0.0
+        self._kuyruk = defaultdict(list)
+        self._baslikli = set() # Başlık satırı olduğu bilinen sayfalar (her yazmada tekrar okunmaz)
+        self._yenileme_kilidi = threading.Lock()
+        self._musteri_yenileniyor = False
+
+    # --- TUTAMAÇLAR ---
+    def _spreadsheet(self):
+        if self._sheet is None: self._sheet = self.client.open(self.db_adi)
+        return self._sheet
+
+    def worksheet(self, ad, olustur=False, satir=2, sutun=10):
+        from gspread.exceptions import WorksheetNotFound
+        with self._kilit:
+            if ad in self._ws: return self._ws[ad]
+            try: ws = self._spreadsheet().worksheet(ad)
+            except WorksheetNotFound:
+                if not olustur: raise
+                ws = self._spreadsheet().add_worksheet(ad, satir, sutun)
+            self._ws[ad] = ws
+            return ws
+
+    def gecersiz_kil(self, musteri=None):
+        with self._kilit:
+            if musteri is None:
+                self._sheet = None; self._ws.clear(); self._baslikli.clear()
+                self._musteriler = None
+            else:
+                self._ws.pop(musteri, None); self._baslikli.discard(musteri)
+
+    # --- MÜŞTERİLER ---
+    def musteriler(self, zorla=False):
+        from gspread.exceptions import WorksheetNotFound
+        with self._kilit:
+            if not zorla and self._musteriler is not None and time.time() - self._musteri_zamani < self.ttl:
+                return list(self._musteriler)
+            try: ws = self.worksheet(MUSTERI_SAYFASI)
+            except WorksheetNotFound:
+                ws = self.worksheet(MUSTERI_SAYFASI, olustur=True, satir=100, sutun=2)
+                ws.append_rows([["Müşteri", "Tarih"], [VARSAYILAN_MUSTERI, str(datetime.now())]])
+            with OLCUM.sure("sheets_okuma_saniye", tur="musteri"): liste = ws.col_values(1)[1:] or [VARSAYILAN_MUSTERI]
+            self._musteri_listesi_yaz(liste)
+            return list(liste)
+
+    def musteriler_onbellekten(self):
+        # Eldeki liste (bellek, yoksa disk) hemen döner; süresi geçmişse arka planda yenilenir.
+        # Sadece hiç liste yokken (ilk kurulum) Sheets beklenir
+        liste, zaman = self._musteriler, self._musteri_zamani
+        if liste is None:
+            liste, zaman = self._musteri_dosyasi_oku()
+            if liste is not None:
+                with self._kilit:
+                    if self._musteriler is None: self._musteriler, self._musteri_zamani = liste, zaman
+        if liste is None: return self.musteriler()
+        if time.time() - zaman >= self.ttl: self._musterileri_arka_planda_yenile()
+        return list(liste)
+
+    def _musterileri_arka_planda_yenile(self):
+        with self._yenileme_kilidi:
+            if self._musteri_yenileniyor: return
+            self._musteri_yenileniyor = True
+        def yenile():
+            try: self.musteriler(zorla=True)
+            except Exception: self.gecersiz_kil(MUSTERI_SAYFASI) # Eski liste gösterilmeye devam eder, sonraki rerun tekrar dener
+            finally:
+                with self._yenileme_kilidi: self._musteri_yenileniyor = False
+        threading.Thread(target=yenile, name="musteri-listesi", daemon=True).start()
+
+    def _musteri_listesi_yaz(self, liste):
+        with self._kilit:
+            self._musteriler, self._musteri_zamani = list(liste), time.time()
+            if not self.musteri_dosyasi: return
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.musteri_dosyasi)), exist_ok=True)
+                gecici = f"{self.musteri_dosyasi}.{os.getpid()}.tmp"
+                with open(gecici, "w", encoding="utf-8") as f:
+                    json.dump({"db": self.db_adi, "zaman": self._musteri_zamani, "musteriler": self._musteriler}, f, ensure_ascii=False)
+                os.replace(gecici, self.musteri_dosyasi)
+            except OSError: pass
+
+    def _musteri_dosyasi_oku(self):
+        if not self.musteri_dosyasi: return None, 0.0
+        try:
+            with open(self.musteri_dosyasi, encoding="utf-8") as f: kayit = json.load(f)
+            if kayit.get("db") == self.db_adi and kayit.get("musteriler"): return list(kayit["musteriler"]), float(kayit.get("zaman", 0))
+        except (OSError, ValueError, AttributeError): pass
+        return None, 0.0
+
+    def musteri_ekle(self, ad):
+        with self._kilit:
+            mevcut = self.musteriler(zorla=True)
+            if ad in mevcut: return "Mevcut"
+            self.worksheet(MUSTERI_SAYFASI).append_row([ad, str(datetime.now())])
+            try:
+                ns = self.worksheet(ad, olustur=True)
+                if not ns.row_values(1): ns.append_row(BASLIKLAR)
+                self._baslikli.add(ad)
+            except Exception: pass
+            self._musteri_listesi_yaz(mevcut + [ad]) # Yerel kopya da güncellenir: kenar çubuğu yeni müşteriyi hemen görür
+            return True
+
+    def musteri_sil(self, ad):
+        with self._kilit:
+            ws = self.worksheet(MUSTERI_SAYFASI)
+            cell = ws.find(ad)
+            if cell: ws.delete_rows(cell.row)
+            try: self._spreadsheet().del_worksheet(self.worksheet(ad))
+            except Exception: pass
+            self._kuyruk.pop(ad, None)
+            self.gecersiz_kil(ad)
+            self.musteriler(zorla=True) # Yerel kopya da güncellenir
+            return True
+
+    # --- YAZMA KUYRUĞU ---
+    def kuyruga_ekle(self, musteri, satirlar):
+        with self._kilit: self._kuyruk[musteri].extend(satirlar)
+
+    def bosalt(self, musteri=None):
+        # Bekleyen satırlar sayfa başına tek append_rows çağrısıyla yazılır; musteri verilirse sadece onunkiler.
+        # Yazılamayanlar kuyruğa geri konmaz: çağıran (kullanıcı tekrar kaydedince) aynı satırları yeniden kuyruğa alır,
+        # geri konsalardı o satırlar ikinci kez yazılırdı
+        with self._kilit:
+            if musteri is None: bekleyen, self._kuyruk = self._kuyruk, defaultdict(list)
+            else: bekleyen = {musteri: self._kuyruk.pop(musteri, [])}
+            yazilan = 0
+            for ad, satirlar in bekleyen.items():
+                if not satirlar: continue
+                ws = self.worksheet(ad, olustur=True)
+                if ad not in self._baslikli and not ws.row_values(1): satirlar = [BASLIKLAR] + satirlar
+                with OLCUM.sure("sheets_yazma_saniye"): ws.append_rows(satirlar)
+                OLCUM.sayac("sheets_yazilan_satir_toplam", len(satirlar))
+                self._baslikli.add(ad)
+                yazilan += len(bekleyen[ad])
+            return yazilan
+
+    def kaydet(self, musteri, satirlar):
+        # Kuyruğa alma ve yazma tek kilit altında: eşzamanlı başka bir kaydetme bu satırları yazıp sayısını sahiplenemez.
+        # Dönüş: bu çağrının yazdığı veri satırı sayısı
+        with self._kilit:
+            self.kuyruga_ekle(musteri, satirlar)
+            return self.bosalt(musteri)
+
+    # --- ARTIMLI OKUMA ---
+    def yeni_satirlar(self, musteri, bilinen, baslik=None):
+        # Başlık hariç ilk "bilinen" veri satırından sonrakiler: (baslik, yeni_satirlar)
+        ws = self.worksheet(musteri)
+        if bilinen <= 0 or not baslik:
+            with OLCUM.sure("sheets_okuma_saniye", tur="tam"): tum = ws.get_all_values()
+            return (tum[0] if tum else []), tum[1:][max(bilinen, 0):]
+        from gspread.utils import rowcol_to_a1
+        son_sutun = rowcol_to_a1(1, len(baslik)).rstrip("0123456789")
+        with OLCUM.sure("sheets_okuma_saniye", tur="artimli"): return baslik, ws.get_values(f"A{bilinen + 2}:{son_sutun}")
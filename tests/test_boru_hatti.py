@@ -0,0 +1,34 @@
+"""Süreç havuzu: işçiler Streamlit'in __main__'ini (app.py) yeniden çalıştırmadan ön işleme yapar."""
+import asyncio
+import io
+import os
+import sys
+import types
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+import boru_hatti
+import havuz_isci
+from on_isleme import goruntu_hazirla
+
+def test_isciler_ana_betigi_yeniden_calistirmaz(tmp_path, monkeypatch):
+    from PIL import Image
+    isaret = tmp_path / "calisti"
+    betik = tmp_path / "uygulama.py"
+    betik.write_text(f"open({str(isaret)!r}, 'w').close()\nraise SystemExit('işçide çalışmamalı')\n", encoding="utf-8")
+    ana = types.ModuleType("__main__") # Streamlit'in script modülü gibi: dosyası var, __spec__ yok
+    ana.__file__ = str(betik)
+    monkeypatch.setitem(sys.modules, "__main__", ana)
+    monkeypatch.delenv(havuz_isci.ANA_DOSYA, raising=False)
+    monkeypatch.setattr(boru_hatti, "_havuz", None)
+
+    buf = io.BytesIO()
+    Image.new("RGB", (300, 400), "white").save(buf, "JPEG")
+    sonuclar = []
+    async def ag_asamasi(is_, hazir): sonuclar.append(hazir)
+    try:
+        asyncio.run(boru_hatti.boru_hatti_calistir(range(4), goruntu_hazirla, lambda is_: (buf.getvalue(), "image/jpeg"), ag_asamasi, 2))
+    finally: boru_hatti._havuzu_sifirla()
+    assert len(sonuclar) == 4 and not any(isinstance(s, Exception) for s in sonuclar)
+    assert not isaret.exists()
@@ -0,0 +1,46 @@
+"""DefterDeposu senkronu: baştan çekme arka planda, artımlı çekme çizim sırasında (dev/sahte_gspread.py ile)."""
+import os
+import sys
+import time
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [KOK, os.path.join(KOK, "dev")]
+
+from defter_deposu import DefterDeposu
+from sahte_gspread import SahteIstemci
+from sheets_senkron import SheetsSenkron
+
+def satir(no, tutar):
+    return [f"{no}.jpg", f"ISYERI {no}", str(no), "01.02.2024", "Gıda", tutar, "1.00", "2024-02-01 10:00:00", "✅", "-"]
+
+def bekle(defter, musteri):
+    for _ in range(200):
+        if not defter.cekiliyor_mu(musteri): return
+        time.sleep(0.01)
+    raise AssertionError("Arka plan çekmesi bitmedi")
+
+def test_bastan_cekme_arka_planda_artimli_cekme_hemen(tmp_path):
+    senkron = SheetsSenkron(SahteIstemci())
+    senkron.kuyruga_ekle("M", [satir(1, "10.00"), satir(2, "20.00")]); senkron.bosalt()
+    defter = DefterDeposu(str(tmp_path / "defter.sqlite"), min_aralik=0)
+
+    assert defter.senkronla("M", senkron) == 0 # İlk senkron beklenmez
+    bekle(defter, "M")
+    assert defter.ozet("M")["adet"] == 2 and defter.son_hata("M") is None
+
+    senkron.kuyruga_ekle("M", [satir(3, "5.00")]); senkron.bosalt()
+    assert defter.senkronla("M", senkron) == 1 # Artımlı: sadece yeni satır
+    assert defter.ozet("M")["tutar"] == 35.0
+
+def test_bastan_cekme_hatasi_yerel_kopyayi_bozmaz(tmp_path, monkeypatch):
+    senkron = SheetsSenkron(SahteIstemci())
+    senkron.kuyruga_ekle("M", [satir(1, "10.00")]); senkron.bosalt()
+    defter = DefterDeposu(str(tmp_path / "defter.sqlite"), min_aralik=0, tam_yenileme=0)
+    defter.senkronla("M", senkron); bekle(defter, "M")
+
+    def bozuk(*a): raise ConnectionError("ağ yok")
+    monkeypatch.setattr(senkron, "yeni_satirlar", bozuk)
+    time.sleep(0.01)
+    defter.senkronla("M", senkron); bekle(defter, "M")
+    assert defter.son_hata("M") == "ağ yok"
+    assert defter.ozet("M")["adet"] == 1
@@ -0,0 +1,30 @@
+"""Dışa aktarım önbelleği: eski sürümün dosyaları silinir, başka bir sürümün yazılmakta olan geçici dosyası silinmez."""
+import os
+import sys
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from disa_aktarim import onbellekli_uret
+
+def yaz(metin):
+    def uret(yol):
+        with open(yol, "w") as f: f.write(metin)
+    return uret
+
+def test_eski_surum_silinir_yenisi_tekrar_uretilmez(tmp_path):
+    dizin = str(tmp_path)
+    eski = onbellekli_uret(dizin, "1", "liste_CSV.csv", yaz("a"))
+    yeni = onbellekli_uret(dizin, "2", "liste_CSV.csv", yaz("b"))
+    assert not os.path.exists(eski) and open(yeni).read() == "b"
+    assert onbellekli_uret(dizin, "2", "liste_CSV.csv", yaz("c")) == yeni and open(yeni).read() == "b"
+    assert os.listdir(dizin) == ["2_liste_CSV.csv"]
+
+def test_yazilmakta_olan_gecici_dosya_temizlikte_silinmez(tmp_path):
+    dizin = str(tmp_path)
+    def uret(yol):
+        with open(yol, "w") as f: # Yazarken başka sürüm isteyen bir oturum eski dosyaları temizler
+            f.write("tamam")
+            onbellekli_uret(dizin, f"baska{i}", "arsiv.zip", yaz("x"))
+    for i in range(30): # Geçici adın rastgele kısmı "_" içerebilir; tek denemeye bırakılmaz
+        assert open(onbellekli_uret(dizin, str(i), "arsiv.zip", uret)).read() == "tamam"
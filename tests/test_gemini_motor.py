@@ -0,0 +1,81 @@
+"""GeminiMotoru.uret yerel sahte sunucuya karşı: 429 + Retry-After ortak sınırlayıcıyı duraklatır,
+5xx ve zaman aşımı yeniden denenir, diğer 4xx hemen hata olur."""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from gemini_motor import GeminiHatasi, GeminiMotoru, HizSinirlayici
+
+CEVAP = {"candidates": [{"content": {"parts": [{"text": '{"toplam_tutar": "100.00"}'}]}}], "usageMetadata": {"totalTokenCount": 300}}
+
+@pytest.fixture
+def sunucu():
+    # Her istek sıradaki senaryo adımını oynatır: (durum, başlıklar, gecikme); adımlar bitince 200
+    senaryo, gelen = [], []
+
+    class Isleyici(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            gelen.append(time.monotonic())
+            durum, basliklar, gecikme = senaryo.pop(0) if senaryo else (200, {}, 0)
+            time.sleep(gecikme)
+            govde = json.dumps(CEVAP).encode() if durum == 200 else b"{}"
+            try:
+                self.send_response(durum)
+                for k, v in basliklar.items(): self.send_header(k, v)
+                self.send_header("Content-Length", str(len(govde))); self.end_headers(); self.wfile.write(govde)
+            except OSError: pass # İstemci zaman aşımında bağlantıyı kapatmış
+
+        def log_message(self, *a): pass
+
+    s = ThreadingHTTPServer(("127.0.0.1", 0), Isleyici)
+    threading.Thread(target=s.serve_forever, daemon=True).start()
+    s.senaryo, s.gelen = senaryo, gelen
+    yield s
+    s.shutdown(); s.server_close()
+
+@pytest.fixture(autouse=True)
+def hizli_bekleme(monkeypatch):
+    monkeypatch.setattr(GeminiMotoru, "_bekleme", staticmethod(lambda attempt: 0.01))
+
+def uret(sunucu, sinirlayici=None, **ayar):
+    async def calis():
+        motor = GeminiMotoru("anahtar", sinirlayici or HizSinirlayici(), temel_url=f"http://127.0.0.1:{sunucu.server_port}", **ayar)
+        async with motor: return await motor.uret("model", [{"text": "fiş"}]), motor.cagri
+    return asyncio.run(calis())
+
+def test_429_retry_after_ortak_sinirlayiciyi_duraklatir(sunucu):
+    sinirlayici = HizSinirlayici()
+    duraklatmalar = []
+    asil = sinirlayici.duraklat
+    sinirlayici.duraklat = lambda sure: (duraklatmalar.append(sure), asil(sure))
+    sunucu.senaryo.append((429, {"Retry-After": "0.3"}, 0))
+
+    assert uret(sunucu, sinirlayici) == ('{"toplam_tutar": "100.00"}', 1)
+    assert duraklatmalar == [0.3]
+    assert len(sunucu.gelen) == 2 and sunucu.gelen[1] - sunucu.gelen[0] >= 0.3
+
+def test_5xx_ve_zaman_asimi_yeniden_denenir(sunucu):
+    sunucu.senaryo += [(503, {}, 0), (500, {}, 0), (200, {}, 0.6)] # Üçüncü istek zaman aşımına düşer
+    assert uret(sunucu, zaman_asimi=0.2, retries=5)[1] == 1 # Yeniden denemeler çağrı sayılmaz
+    assert len(sunucu.gelen) == 4
+
+def test_yeniden_deneme_hakki_bitince_son_hata(sunucu):
+    sunucu.senaryo += [(503, {}, 0)] * 3
+    with pytest.raises(GeminiHatasi, match=r"API Hatası \(503\)"): uret(sunucu, retries=3)
+    assert len(sunucu.gelen) == 3
+
+@pytest.mark.parametrize("durum", [400, 403, 404])
+def test_diger_4xx_yeniden_denenmez(sunucu, durum):
+    sunucu.senaryo.append((durum, {}, 0))
+    with pytest.raises(GeminiHatasi, match=str(durum)): uret(sunucu)
+    assert len(sunucu.gelen) == 1
@@ -0,0 +1,20 @@
+"""IsGunlugu istatistikleri: önbellek isabeti oluşturmada sayılır, devam ettirilen işte sayılar toplanır."""
+import os
+import sys
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from is_motoru import BITTI, DURDU, IsGunlugu
+
+def dosya(no, sonuc=None):
+    return {"ad": f"{no}.jpg", "tur": "image/jpeg", "mod": "fis", "blob": f"b{no}", "anahtar": f"k{no}", "sonuc": sonuc}
+
+def test_devam_eden_isin_istatistikleri_toplanir(tmp_path):
+    gunluk = IsGunlugu(str(tmp_path / "isler.sqlite"))
+    is_id = gunluk.is_olustur("M", "oturum", "model", {}, [dosya(0, {"toplam_tutar": "1"})] + [dosya(i) for i in range(1, 5)])
+    assert gunluk.is_bilgisi(is_id)["istatistik"] == {"onbellek_isabet": 1}
+
+    gunluk.durum_yaz(is_id, DURDU, None, {"analiz": 4, "qr_hizli": 1, "paketli": 2, "paket_istegi": 1, "api_cagrisi": 2})
+    gunluk.durum_yaz(is_id, BITTI, None, {"analiz": 2, "qr_hizli": 0, "paketli": 0, "paket_istegi": 0, "api_cagrisi": 2})
+    assert gunluk.is_bilgisi(is_id)["istatistik"] == {"onbellek_isabet": 1, "analiz": 6, "qr_hizli": 1, "paketli": 2, "paket_istegi": 1, "api_cagrisi": 4}
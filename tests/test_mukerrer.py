@@ -0,0 +1,89 @@
+"""MukerrerIndeksi: kesin / olası eşleşmeler, gevşek anahtarın fiş↔ekstre kapsamı, görsel bantları ve defterden yeniden kurulum."""
+import os
+import sys
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from mukerrer import KESIN, OLASI, MukerrerIndeksi, anahtarlar, sayfa_sinirinda_birlestir
+
+FIS = {"isyeri_adi": "Örnek Taksi", "fiş_no": "0101", "tarih": "01.02.2024", "toplam_tutar": "150,00", "dosya_adi": "t1.jpg"}
+EKSTRE = {"isyeri_adi": "TAXI CO", "tarih": "01.02.2024", "toplam_tutar": "150.00", "dosya_adi": "Ekstre_a.pdf"}
+
+class Defter:
+    # DefterDeposu'nun indeksin kullandığı kısmı: (satır no, işyeri, fiş no, tarih, tutar) satırları + son tam çekim zamanı
+    def __init__(self, satirlar, tam):
+        self.satirlar, self.tam = satirlar, tam
+    def son_tam(self, musteri): return self.tam
+    def son_satir(self, musteri): return max((s[0] for s in self.satirlar), default=0)
+    def satirlar_sonrasi(self, musteri, satir): return [s for s in self.satirlar if s[0] > satir]
+
+def indeks(tmp_path):
+    return MukerrerIndeksi(str(tmp_path / "mukerrer.sqlite"))
+
+def seviye(sonuc):
+    return sonuc[0] if sonuc else None
+
+def test_anahtarlar_normalize_edilir():
+    a = dict(anahtarlar(FIS))
+    assert a["alan"] == "ornektaksi|101|2024-02-01|150.00"
+    assert a["gevsek_fis"] == "2024-02-01|150.00"
+    assert dict(anahtarlar(None, "Örnek Taksi", "101", "2024-02-01", 150.0)) == a # Defter satırı aynı anahtarı üretir
+    assert dict(anahtarlar(EKSTRE)) == {"alan": "taxico||2024-02-01|150.00", "gevsek_ekstre": "2024-02-01|150.00"}
+    assert anahtarlar({"isyeri_adi": "X", "tarih": "bozuk", "toplam_tutar": "5"}) == []
+
+def test_ayni_fis_kesin_fis_ve_ekstre_satiri_olasi(tmp_path):
+    ind = indeks(tmp_path)
+    sonuc = ind.toplu_kontrol("M", [FIS, dict(FIS, dosya_adi="t1b.jpg"), EKSTRE])
+    assert [seviye(s) for s in sonuc] == [None, KESIN, OLASI]
+    assert "t1.jpg" not in sonuc[1][1] and "#1" in sonuc[1][1]
+
+def test_gevsek_anahtar_sadece_fis_ile_ekstre_arasinda(tmp_path):
+    ind = indeks(tmp_path)
+    ikinci_fis = dict(FIS, **{"fiş_no": "102", "dosya_adi": "t2.jpg"}) # Aynı gün aynı tutarlı iki ayrı taksi fişi
+    baska_ekstre = dict(EKSTRE, dosya_adi="Ekstre_b.pdf")
+    assert [seviye(s) for s in ind.toplu_kontrol("M", [FIS, ikinci_fis])] == [None, None]
+    assert [seviye(s) for s in ind.toplu_kontrol("M", [EKSTRE, baska_ekstre])] == [None, KESIN] # İki ekstrede aynı satır
+
+def test_ayni_ekstrenin_satirlari_birbirini_tutmaz(tmp_path):
+    ind = indeks(tmp_path)
+    assert ind.toplu_kontrol("M", [EKSTRE, dict(EKSTRE)]) == [None, None]
+
+def test_benzer_gorsel_olasi_uzak_gorsel_degil(tmp_path):
+    ind = indeks(tmp_path)
+    ana = dict(FIS, phash="f0f0f0f0f0f0f0f0")
+    ind.ekle("M", [ana])
+    yakin = {"isyeri_adi": "Başka", "tarih": "05.03.2024", "toplam_tutar": "1", "phash": "f0f0f0f0f0f0f0f3"} # 2 bit fark
+    tek_bant = dict(yakin, toplam_tutar="2", phash="f0f0f0f0f0f00f0f") # Üç bant aynı ama 8 bit fark
+    yayik = dict(yakin, toplam_tutar="3", phash="f0f1f0f1f0f1f0f1") # 4 bit fark, her bantta bir: hiçbir bant tutmaz
+    sonuc = ind.toplu_kontrol("M", [yakin, tek_bant, yayik])
+    assert seviye(sonuc[0]) == OLASI and "benzer görsel: t1.jpg" in sonuc[0][1]
+    assert sonuc[1:] == [None, None]
+
+def test_defterden_artimli_guncelleme_ve_yeniden_kurulum(tmp_path):
+    ind = indeks(tmp_path)
+    satirlar = [(1, "A", "1", "2024-02-01", 10.0), (2, "B", "7", "2024-02-02", 20.0), (3, "C", "9", "2024-02-03", 30.0)]
+    ind.defterden_guncelle("M", Defter(satirlar, 1.0))
+    b = {"isyeri_adi": "B", "fiş_no": "7", "tarih": "02.02.2024", "toplam_tutar": "20", "qr_data": "QR-B", "dosya_adi": "b.jpg"}
+    c = {"isyeri_adi": "C", "fiş_no": "9", "tarih": "03.02.2024", "toplam_tutar": "30", "qr_data": "QR-C", "dosya_adi": "c.jpg"}
+    ind.ekle("M", [b, c])
+    assert ind.toplu_kontrol("M", [c])[0] == (KESIN, "🔁 Mükerrer (aynı QR: c.jpg)")
+
+    # Artımlı: sadece yeni satır eklenir
+    ind.defterden_guncelle("M", Defter(satirlar + [(4, "D", "3", "2024-02-04", 40.0)], 1.0))
+    assert seviye(ind.toplu_kontrol("M", [{"isyeri_adi": "D", "fiş_no": "3", "tarih": "04.02.2024", "toplam_tutar": "40"}])[0]) == KESIN
+
+    # Baştan çekim (son_tam değişti): C satırı Sheets'ten silinmiş. B'nin QR anahtarı bag ile korunur, C'ninki atılır
+    ind.defterden_guncelle("M", Defter(satirlar[:2] + [(3, "X", "5", "2024-02-05", 5.0)], 2.0))
+    assert ind.toplu_kontrol("M", [dict(b, fiş_no="-", isyeri_adi="?")])[0] == (KESIN, "🔁 Mükerrer (aynı QR: b.jpg)")
+    assert ind.toplu_kontrol("M", [c]) == [None]
+
+    # Diskten yeniden açılan indeks aynı sonucu verir
+    assert [seviye(s) for s in indeks(tmp_path).toplu_kontrol("M", [b, c])] == [KESIN, None]
+
+def test_sayfa_sinirinda_tekrar_eden_satir_atilir_gercek_tekrar_kalir():
+    s = lambda isyeri, tutar: {"isyeri_adi": isyeri, "tarih": "01.02.2024", "toplam_tutar": tutar}
+    sayfa1 = [s("A", "10"), s("B", "20"), s("B", "20")] # Aynı gün aynı tutarlı iki gerçek harcama
+    sayfa2 = [s("B", "20.00"), s("C", "30"), "bozuk"] # İlk satır önceki sayfanın son satırının tekrarı
+    birlesik = sayfa_sinirinda_birlestir([sayfa1, sayfa2])
+    assert [(v["isyeri_adi"], v["toplam_tutar"]) for v in birlesik] == [("A", "10"), ("B", "20"), ("B", "20"), ("C", "30")]
@@ -0,0 +1,34 @@
+"""Prometheus dışa aktarımı: sayaçlar _total ile biter, her ailenin # HELP / # TYPE satırı var, uç varsayılan olarak yerel."""
+import os
+import sys
+import urllib.request
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from olcum import Olcum, prometheus_ucu_baslat
+
+def test_sayaclar_total_ile_aciklamali_aktarilir():
+    olcum = Olcum()
+    olcum.sayac("gemini_istek_toplam", durum="200")
+    olcum.sayac("gemini_istek_toplam", 2, durum="429")
+    olcum.sayac("bilinmeyen_toplam")
+    olcum.sure_ekle("dosya_saniye", 0.2)
+    satirlar = olcum.prometheus().splitlines()
+
+    assert satirlar[:4] == ["# HELP muhabese_bilinmeyen_total bilinmeyen", "# TYPE muhabese_bilinmeyen_total counter", "muhabese_bilinmeyen_total 1",
+                            "# HELP muhabese_gemini_istek_total Gemini HTTP istekleri (durum kodu ya da baglanti)"]
+    assert 'muhabese_gemini_istek_total{durum="429"} 2' in satirlar
+    assert not any("_toplam" in s for s in satirlar)
+    assert "# TYPE muhabese_dosya_saniye histogram" in satirlar and 'muhabese_dosya_saniye_bucket{le="0.25"} 1' in satirlar
+    assert all(s.split()[2] in {s2.split()[2] for s2 in satirlar if s2.startswith("# HELP")} for s in satirlar if s.startswith("# TYPE"))
+
+def test_uc_varsayilan_olarak_yerel_adrese_baglanir():
+    olcum = Olcum()
+    olcum.sayac("qr_hizli_toplam")
+    sunucu = prometheus_ucu_baslat(0, olcum)
+    try:
+        assert sunucu.server_address[0] == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{sunucu.server_port}/metrics") as yanit:
+            assert "muhabese_qr_hizli_total 1" in yanit.read().decode("utf-8")
+    finally: sunucu.shutdown(); sunucu.server_close()
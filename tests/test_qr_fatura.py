@@ -0,0 +1,50 @@
+"""GİB karekodu çözücü: tam ve tutarlı karekod fiş alanlarına döner, eksik/bozuk olan None (tam analize düşer)."""
+import json
+import os
+import sys
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KOK)
+
+from qr_fatura import VknHafizasi, qr_fatura_coz
+
+GIB = {"vkntckn": "1234567890", "avkntckn": "11111111111", "senaryo": "EARSIVFATURA", "tip": "SATIS", "tarih": "2024-03-15",
+       "no": "ABC2024000000123", "ettn": "3f2b8c1e-0000-4000-8000-000000000001", "parabirimi": "TRY", "malhizmettoplam": "100,00",
+       "kdvmatrah(20)": "100,00", "hesaplanankdv(20)": "20,00", "vergidahil": "120,00", "odenecek": "120,00"}
+
+def karekod(**degisen):
+    return json.dumps({**GIB, **degisen})
+
+def test_gecerli_gib_karekodu_cozulur():
+    assert qr_fatura_coz(karekod()) == {"fiş_no": "ABC2024000000123", "tarih": "15.03.2024", "toplam_tutar": "120.00", "toplam_kdv": "20.00",
+                                        "vkn": "1234567890", "ettn": GIB["ettn"], "_kdv_orani": 20}
+
+def test_birden_fazla_kdv_orani_toplanir():
+    j = {**GIB, "hesaplanankdv(10)": "5,00", "odenecek": "175,00"}
+    assert qr_fatura_coz(json.dumps(j))["toplam_kdv"] == "25.00"
+
+def test_hesaplanan_kdv_yoksa_none():
+    j = {k: v for k, v in GIB.items() if not k.startswith("hesaplanankdv")}
+    assert qr_fatura_coz(json.dumps(j)) is None
+
+def test_bozuk_fatura_no_veya_vkn_none():
+    assert qr_fatura_coz(karekod(no="AB2024000000123")) is None
+    assert qr_fatura_coz(karekod(no="ABC202400000012")) is None
+    assert qr_fatura_coz(karekod(vkntckn="12345")) is None
+    assert qr_fatura_coz(karekod(vkntckn="12345678AB")) is None
+
+def test_kdv_toplamdan_kucuk_degilse_none():
+    assert qr_fatura_coz(karekod(**{"hesaplanankdv(20)": "120,00"})) is None
+    assert qr_fatura_coz(karekod(**{"hesaplanankdv(20)": "150,00"})) is None
+
+def test_json_olmayan_karekod_none():
+    assert qr_fatura_coz("https://example.com/fatura") is None
+    assert qr_fatura_coz("{bozuk") is None
+    assert qr_fatura_coz(None) is None
+
+def test_vkn_hafizasi_yer_tutucuyu_ogrenmez(tmp_path):
+    vkn = VknHafizasi(str(tmp_path / "vkn.sqlite"))
+    vkn.ogren([{"vkn": "1234567890", "isyeri_adi": "VKN 1234567890", "kategori": "Gıda"}])
+    assert vkn.getir("1234567890") is None
+    vkn.ogren([{"vkn": "1234567890", "isyeri_adi": "Örnek Market", "kategori": "Gıda"}])
+    assert vkn.getir("1234567890") == {"isyeri_adi": "Örnek Market", "kategori": "Gıda"}
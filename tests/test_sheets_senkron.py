@@ -0,0 +1,70 @@
+"""SheetsSenkron yazma kuyruğu ve müşteri listesi: dev/sahte_gspread.py ile, Google'a gitmeden."""
+import os
+import sys
+
+import pytest
+
+KOK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [KOK, os.path.join(KOK, "dev")]
+
+from sahte_gspread import SahteIstemci, SahteWorksheet
+from sheets_senkron import BASLIKLAR, SheetsSenkron
+
+SATIR = ["a.jpg", "ABC", "1", "01.02.2024", "Gıda", "10.00", "1.00", "2024-02-01 10:00:00", "✅", "-"]
+
+def test_kuyruk_tek_append_rows_ile_yazar():
+    istemci = SahteIstemci()
+    senkron = SheetsSenkron(istemci)
+    senkron.kuyruga_ekle("M", [SATIR])
+    senkron.kuyruga_ekle("M", [SATIR[:1] + ["DEF"] + SATIR[2:]])
+    assert senkron.bosalt() == 2
+    ws = istemci.open("Muhabese Veritabanı").sayfalar["M"]
+    assert ws.satirlar[0] == BASLIKLAR and len(ws.satirlar) == 3
+    assert istemci.cagrilar["append_rows"] == 1
+
+def test_basarisiz_yazma_tekrar_kaydedince_cift_yazmaz(monkeypatch):
+    istemci = SahteIstemci()
+    senkron = SheetsSenkron(istemci)
+    asil = SahteWorksheet.append_rows
+    def bozuk(self, satirlar): raise ConnectionError("ağ yok")
+    monkeypatch.setattr(SahteWorksheet, "append_rows", bozuk)
+    senkron.kuyruga_ekle("M", [SATIR])
+    with pytest.raises(ConnectionError): senkron.bosalt()
+
+    # Uygulamadaki gibi: kullanıcı tekrar "Kaydet"e basar, aynı satırlar yeniden kuyruğa girer
+    monkeypatch.setattr(SahteWorksheet, "append_rows", asil)
+    senkron.kuyruga_ekle("M", [SATIR])
+    assert senkron.bosalt() == 1
+    veri = istemci.open("Muhabese Veritabanı").sayfalar["M"].satirlar[1:]
+    assert veri == [SATIR]
+
+def test_musteri_listesi_yerel_kopyadan_doner(tmp_path):
+    istemci = SahteIstemci()
+    yol = str(tmp_path / "musteriler.json")
+    SheetsSenkron(istemci, musteri_dosyasi=yol).musteri_ekle("ABC Ltd")
+    istemci.cagrilar.clear()
+    # Yeni süreç: liste diskten gelir, Sheets'e gidilmez
+    assert SheetsSenkron(istemci, musteri_dosyasi=yol).musteriler_onbellekten() == ["Varsayılan Müşteri", "ABC Ltd"]
+    assert sum(istemci.cagrilar.values()) == 0
+
+def test_kaydet_sadece_kendi_satirlarini_yazar_ve_sayar():
+    istemci = SahteIstemci()
+    senkron = SheetsSenkron(istemci)
+    diger = SATIR[:1] + ["DEF"] + SATIR[2:]
+    senkron.kuyruga_ekle("N", [diger]) # Başka bir müşterinin bekleyen satırı
+    assert senkron.kaydet("M", [SATIR]) == 1
+    assert "N" not in istemci.open("Muhabese Veritabanı").sayfalar
+    assert senkron.kaydet("N", []) == 1
+
+def test_eszamanli_kaydetmeler_satir_kaybetmez_cift_yazmaz():
+    import threading
+    istemci = SahteIstemci()
+    senkron = SheetsSenkron(istemci)
+    sonuclar = []
+    def kaydet(no): sonuclar.append(senkron.kaydet("M", [SATIR[:2] + [str(no)] + SATIR[3:]]))
+    is_parcaciklari = [threading.Thread(target=kaydet, args=(i,)) for i in range(8)]
+    for t in is_parcaciklari: t.start()
+    for t in is_parcaciklari: t.join()
+    assert sonuclar == [1] * 8
+    veri = istemci.open("Muhabese Veritabanı").sayfalar["M"].satirlar[1:]
+    assert sorted(r[2] for r in veri) == [str(i) for i in range(8)]